@@ -12,9 +12,14 @@ import subprocess
 import shutil
 import webbrowser
 import json
+import queue
+import threading
 import tkinter as tk
 from tkinter import simpledialog, ttk
 
+from installerpro.utils import git_operations
+from installerpro.utils.bulk_update import run_bulk_update
+
 # --- referencias globales (se asignan en run_gui) ------------------------
 root: tk.Tk | None = None
 title_lbl: tk.Label | None = None
@@ -176,19 +181,6 @@ def ensure_git():
         raise SystemExit
 
 
-def safe_dir(path: str):
-    run(
-        [
-            "git",
-            "config",
-            "--global",
-            "--add",
-            "safe.directory",
-            path.replace("\\", "/"),
-        ]
-    )
-
-
 def auth_flow():
     webbrowser.open("https://github.com/login")
     show_msg("info", "Login", TXT["login"])
@@ -197,7 +189,6 @@ def auth_flow():
 # ---------- Clonar o actualizar -------------------------------------------
 def clone_or_pull(name: str, url: str, branch: str) -> str:
     dest = os.path.join(WORKSPACE, name)
-    safe_dir(dest)
 
     # --- clone ------------------------------------------------------------
     if not os.path.exists(dest) or not os.path.exists(os.path.join(dest, ".git")):
@@ -497,27 +488,66 @@ def update_selected():
 
     ensure_git()
     db = load_db()
-    jobs = [listbox.get(i) for i in sel]
+    jobs = [
+        {
+            "name": name,
+            "local_path": os.path.join(WORKSPACE, name),
+            "repo_url": db[name]["url"],
+            "branch": db[name]["branch"],
+        }
+        for name in (listbox.get(i) for i in sel)
+    ]
+
+    # safe.directory se prepara una sola vez para todos (sin duplicados) antes de lanzar los hilos:
+    # varios 'git config --global --add' a la vez chocan con el bloqueo de ~/.gitconfig.
+    try:
+        git_operations.ensure_safe_directories([job["local_path"] for job in jobs])
+    except git_operations.GitOperationError as e:
+        print("⚠️  No se pudo preparar safe.directory:", e)
 
     progress["maximum"] = len(jobs)
     progress["value"] = 0
-    root.update_idletasks()
-
-    for i, name in enumerate(jobs, 1):
-        data = db[name]
-        url = data["url"]
-        branch = data["branch"]
-        try:
-            clone_or_pull(name, url, branch)
-        except RuntimeError as e:
-            show_msg("error", "Git", f"{name} → {e}")
-            continue
-        finally:
-            progress["value"] = i
-            root.update_idletasks()
+    upd_btn.config(state="disabled")
+
+    # Los clones/pull van en paralelo en un hilo aparte; Tk solo lee la cola de resultados.
+    results: queue.Queue = queue.Queue()
 
-    show_msg("info", "OK", TXT["ok"].format(WORKSPACE))
-    progress["value"] = 0  # reinicia
+    def worker(job: dict) -> str:
+        clone_or_pull(job["name"], job["repo_url"], job["branch"])
+        return "clone_or_pull"
+
+    def run_jobs():
+        report = run_bulk_update(
+            jobs, worker=worker, on_result=lambda job, result: results.put((job, result))
+        )
+        results.put((None, report))
+
+    def poll_results():
+        while True:
+            try:
+                job, result = results.get_nowait()
+            except queue.Empty:
+                root.after(100, poll_results)
+                return
+            if job is not None:
+                progress["value"] += 1
+                continue
+            # informe final
+            upd_btn.config(state="normal")
+            progress["value"] = 0  # reinicia
+            failures = [
+                f"{os.path.basename(path)} → {r['error']}"
+                for path, r in result["results"].items()
+                if not r["ok"]
+            ]
+            if failures:
+                show_msg("error", "Git", "\n".join(failures))
+            else:
+                show_msg("info", "OK", TXT["ok"].format(WORKSPACE))
+            return
+
+    threading.Thread(target=run_jobs, daemon=True).start()
+    root.after(100, poll_results)
 
 
 def set_language(lang_code):
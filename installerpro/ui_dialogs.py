@@ -3,6 +3,8 @@ import os
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
+from installerpro.utils.perf_profiles import BUILTIN_PROFILES
+
 class HelpPopup:
     def __init__(self, anchor_widget, title_key, help_text_key, t_func):
         self.anchor_widget = anchor_widget
@@ -60,6 +62,14 @@ class HelpPopup:
             except tk.TclError: pass
         self.popup_window = None
 
+# Modos de clonado ofrecidos al añadir un proyecto -> clone_options guardadas en projects.json
+CLONE_MODES = {
+    "full": {},
+    "shallow": {"depth": 1},
+    "blobless": {"filter": "blob:none"},
+    "treeless": {"filter": "tree:0"},
+}
+
 class AddProjectDialog(tk.Toplevel):
     def __init__(self, master, t_func, base_folder):
         super().__init__(master)
@@ -120,8 +130,27 @@ class AddProjectDialog(tk.Toplevel):
         self.name_entry = self.entries['name']
         self._update_local_path_on_name_change()
 
+        # Modo de clonado: completo, superficial (depth 1), sin blobs o sin árboles
+        clone_row = len(fields)
+        ttk.Label(frame, text=self.t("Clone Mode Label")).grid(row=clone_row, column=0, padx=5, pady=5, sticky="w")
+        self.clone_modes = {self.t(f"clone_mode.{mode}"): options for mode, options in CLONE_MODES.items()}
+        self.clone_mode_var = tk.StringVar(value=self.t("clone_mode.full"))
+        ttk.Combobox(frame, textvariable=self.clone_mode_var, values=list(self.clone_modes), state="readonly").grid(row=clone_row, column=1, padx=5, pady=5, sticky="ew")
+        self.single_branch_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame, text=self.t("Single Branch Label"), variable=self.single_branch_var).grid(row=clone_row, column=2, columnspan=2, padx=5, pady=5, sticky="w")
+
+        # Perfil de rendimiento (perf_profiles) y, opcionalmente, directorios del sparse-checkout
+        profile_row = clone_row + 1
+        ttk.Label(frame, text=self.t("Performance Profile Label")).grid(row=profile_row, column=0, padx=5, pady=5, sticky="w")
+        self.perf_profiles = {self.t(f"perf_profile.{name}"): name for name in BUILTIN_PROFILES}
+        self.perf_profile_var = tk.StringVar(value=self.t("perf_profile.default"))
+        ttk.Combobox(frame, textvariable=self.perf_profile_var, values=list(self.perf_profiles), state="readonly").grid(row=profile_row, column=1, padx=5, pady=5, sticky="ew")
+        ttk.Label(frame, text=self.t("Sparse Paths Label")).grid(row=profile_row + 1, column=0, padx=5, pady=5, sticky="w")
+        self.sparse_paths_entry = ttk.Entry(frame, width=40)
+        self.sparse_paths_entry.grid(row=profile_row + 1, column=1, padx=5, pady=5, sticky="ew")
+
         button_frame = ttk.Frame(frame)
-        button_frame.grid(row=len(fields), column=0, columnspan=4, pady=10)
+        button_frame.grid(row=profile_row + 2, column=0, columnspan=4, pady=10)
         ttk.Button(button_frame, text=self.t("Add Button"), command=self._on_ok).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text=self.t("Cancel Button"), command=self._on_cancel).pack(side=tk.LEFT, padx=5)
 
@@ -144,7 +173,12 @@ class AddProjectDialog(tk.Toplevel):
             messagebox.showerror(self.t("Input Error"), self.t("Input error empty fields message"))
             return
             
-        self.result = {'name': name, 'local_path_full': local_path, 'repo_url': repo_url, 'branch': self.entries['branch'].get().strip() or 'main'}
+        clone_options = dict(self.clone_modes.get(self.clone_mode_var.get(), {}))
+        if self.single_branch_var.get(): clone_options['single_branch'] = True
+        perf_profile = dict(BUILTIN_PROFILES.get(self.perf_profiles.get(self.perf_profile_var.get()), {}))
+        sparse_paths = [p.strip().strip("/") for p in self.sparse_paths_entry.get().split(",") if p.strip().strip("/")]
+        if sparse_paths: perf_profile['sparse_paths'] = sparse_paths
+        self.result = {'name': name, 'local_path_full': local_path, 'repo_url': repo_url, 'branch': self.entries['branch'].get().strip() or 'main', 'clone_options': clone_options or None, 'perf_profile': perf_profile or None}
         self.destroy()
 
     def exec_(self):
@@ -157,6 +191,34 @@ class AddProjectDialog(tk.Toplevel):
         y = self.master.winfo_y() + (self.master.winfo_height()//2) - (self.winfo_reqheight()//2)
         self.geometry(f"+{x}+{y}")
 
+class BatchResultDialog(tk.Toplevel):
+    """Tabla de resultados de una operación sobre varios proyectos (filas de ProjectManager.results_table)."""
+    COLUMNS = (("name", "Project Name Column", 150), ("action", "Batch Action Column", 140), ("commit", "Commit Column", 80),
+               ("status", "Status Column", 100), ("error", "Error Column", 300))
+
+    def __init__(self, master, t_func, title, summary, rows):
+        super().__init__(master)
+        self.t = t_func
+        self.title(title)
+        self.transient(master)
+
+        frame = ttk.Frame(self, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.columnconfigure(0, weight=1); frame.rowconfigure(1, weight=1)
+        ttk.Label(frame, text=summary).grid(row=0, column=0, columnspan=2, sticky="w", pady=(0, 5))
+        tree = ttk.Treeview(frame, columns=[c[0] for c in self.COLUMNS], show="headings", height=min(max(len(rows), 3), 15))
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview); tree.configure(yscrollcommand=scrollbar.set)
+        tree.grid(row=1, column=0, sticky="nsew"); scrollbar.grid(row=1, column=1, sticky="ns")
+        for key, label_key, width in self.COLUMNS:
+            tree.heading(key, text=self.t(label_key)); tree.column(key, width=width, anchor="w")
+        tree.tag_configure('failed', foreground='#B00020')
+        for name, local_path, action, commit, status, error in rows:
+            action_display = self.t(f"batch_action.{action}", fallback=action) if action else ""
+            status_display = self.t(f"status.{status.lower().replace(' ', '_')}", fallback=status) if status else ""
+            tree.insert("", tk.END, iid=local_path, values=(name, action_display, commit, status_display, error), tags=('failed',) if error else ())
+        ttk.Button(frame, text=self.t("Close Button"), command=self.destroy).grid(row=2, column=0, columnspan=2, pady=(10, 0))
+        self.bind("<Escape>", lambda e: self.destroy())
+
 class Tooltip:
     """
     Crea un tooltip (mensaje emergente) para un widget de tkinter.
@@ -0,0 +1,77 @@
+# installerpro/utils/batch_commit.py
+"""
+Commit y push de varios repositorios a la vez.
+Aplica el mismo mensaje a los cambios ya preparados (índice) de cada repositorio y publica
+los commits en paralelo, con los mismos límites global y por host que bulk_update.
+"""
+import logging
+import functools
+
+from installerpro.utils import bulk_update, git_metadata, git_operations
+
+logger = logging.getLogger(__name__)
+
+# Valores de 'action' en el resultado de cada repositorio
+COMMITTED_AND_PUSHED = "committed_and_pushed"
+COMMITTED = "committed"
+PUSHED = "pushed"
+NOTHING_TO_DO = "nothing_to_do"
+
+def has_staged_changes(local_path):
+    """True si el índice difiere de HEAD ('git diff --cached --quiet' devuelve 1)."""
+    return_code, _stdout, stderr = git_operations._run_cmd_with_output(["git", "diff", "--cached", "--quiet"], cwd=local_path)
+    if return_code not in (0, 1):
+        raise git_operations.GitOperationError(f"Could not inspect the index of {local_path}. Error: {stderr}")
+    return return_code == 1
+
+def _needs_push(local_path, committed):
+    """
+    Con upstream, solo si hay commits por delante. Sin upstream no hay con qué comparar: solo se
+    intenta (y git decidirá) si se acaba de hacer un commit; si no, no hay nada nuevo que publicar.
+    """
+    metadata = git_metadata.read_repo_metadata(local_path) or {}
+    if not metadata.get("upstream_sha"):
+        return committed
+    ahead, _behind = git_operations.get_ahead_behind(local_path, metadata.get("head_sha"), metadata["upstream_sha"])
+    return ahead > 0
+
+def commit_and_push(job, commit_message, push=True, cancel_token=None, timeout=None):
+    """
+    Hace commit de lo preparado en job['local_path'] y, si push=True, publica la rama.
+    Un repositorio sin nada en el índice no falla: solo se publica si ya iba por delante.
+    Devuelve COMMITTED_AND_PUSHED, COMMITTED, PUSHED o NOTHING_TO_DO.
+    """
+    local_path = job["local_path"]
+    committed = False
+    if has_staged_changes(local_path):
+        git_operations.commit_changes(local_path, commit_message)
+        committed = True
+    pushed = False
+    if push and _needs_push(local_path, committed):
+        git_operations.push_repository(local_path, timeout=timeout, cancel_token=cancel_token)
+        pushed = True
+    if committed:
+        return COMMITTED_AND_PUSHED if pushed else COMMITTED
+    return PUSHED if pushed else NOTHING_TO_DO
+
+def run_commit_and_push(jobs, commit_message, push=True, max_workers=bulk_update.DEFAULT_MAX_WORKERS,
+                        per_host_limit=bulk_update.DEFAULT_PER_HOST_LIMIT, on_result=None, cancel_token=None):
+    """
+    Ejecuta commit_and_push para cada job en paralelo (ver bulk_update.run_bulk_update).
+    Cada resultado añade 'commit': el SHA de HEAD tras la operación (None si falló).
+    Devuelve el informe de run_bulk_update.
+    """
+    if not commit_message.strip():
+        raise git_operations.GitOperationError("Commit message cannot be empty.")
+    worker = functools.partial(commit_and_push, commit_message=commit_message, push=push, cancel_token=cancel_token)
+
+    def add_commit(job, result):
+        result["commit"] = None
+        if result["ok"]:
+            result["commit"] = (git_metadata.read_repo_metadata(job["local_path"]) or {}).get("head_sha")
+        if on_result: on_result(job, result)
+
+    report = bulk_update.run_bulk_update(jobs, worker=worker, max_workers=max_workers, per_host_limit=per_host_limit,
+                                         on_result=add_commit, cancel_token=cancel_token)
+    logger.info(f"Batch commit finished for {len(report['results'])} repositories ({report['succeeded']} ok).")
+    return report
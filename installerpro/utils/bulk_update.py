@@ -0,0 +1,148 @@
+# installerpro/utils/bulk_update.py
+"""
+Clonado / actualización masiva de proyectos.
+Ejecuta clone-o-pull en paralelo con un límite global y otro por host remoto
+(para no saturar un mismo servidor Git) y devuelve un informe agregado.
+"""
+import os
+import re
+import time
+import logging
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+
+from installerpro.utils import git_operations, git_progress, perf_profiles
+from installerpro.utils.git_operations import GitCancelledError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PER_HOST_LIMIT = 4
+
+# git@host:ruta (sintaxis tipo scp, sin '://')
+_SCP_LIKE_URL = re.compile(r"^(?:[^@/]+@)?(?P<host>[^:/]+):(?!//)")
+
+def remote_host(repo_url):
+    """Host de una URL de git ("github.com"), o "local" para rutas y URLs file://."""
+    if not repo_url:
+        return "local"
+    if "://" in repo_url:
+        parts = urlsplit(repo_url)
+        return (parts.hostname or "local").lower() if parts.scheme != "file" else "local"
+    match = _SCP_LIKE_URL.match(repo_url)
+    # En Windows "C:\\ruta" también encaja con la sintaxis scp: una letra sola es una unidad.
+    if match and len(match.group("host")) > 1:
+        return match.group("host").lower()
+    return "local"
+
+def clone_or_pull(job, cancel_token=None, on_progress=None, mirror_cache=None, dissociate=True):
+    """
+    Clona el proyecto si su carpeta no es un repositorio y hace pull si ya lo es.
+    job es un diccionario con 'local_path', 'repo_url', 'branch' y opcionalmente 'clone_options' y
+    'perf_profile' (perf_profiles), que se aplica al clon recién creado.
+    Con mirror_cache (mirror_cache.MirrorCache) el clon toma los objetos del mirror local; con
+    dissociate (por defecto) los copia y no queda dependiendo del mirror.
+    Devuelve "clone" o "pull".
+    """
+    local_path = job["local_path"]
+    branch = job.get("branch") or "main"
+    if git_operations.is_git_repository(local_path):
+        git_operations.pull_repository(local_path, branch, cancel_token=cancel_token, on_progress=on_progress)
+        return "pull"
+    if os.path.isdir(local_path) and os.listdir(local_path):
+        raise git_operations.GitOperationError(f"'{local_path}' exists, is not empty and is not a Git repository.")
+    reference = None
+    if mirror_cache is not None:
+        reference = mirror_cache.reference_for(job["repo_url"], cancel_token=cancel_token, on_progress=git_progress.bind_progress(on_progress, os.path.normpath(local_path), "mirror"),
+                                               clone_options=job.get("clone_options"))
+    profile = perf_profiles.resolve_profile(job.get("perf_profile"))
+    git_operations.clone_repository(job["repo_url"], local_path, branch, cancel_token=cancel_token, on_progress=on_progress,
+                                    clone_options=job.get("clone_options"), reference=reference, dissociate=dissociate,
+                                    sparse=bool(profile.get("sparse_paths")))
+    if profile:
+        perf_profiles.apply_profile(local_path, profile)
+    return "clone"
+
+def _cancelled_result():
+    return {"action": None, "ok": False, "error": "cancelled", "cancelled": True, "seconds": 0.0}
+
+def run_bulk_update(jobs, worker=None, max_workers=DEFAULT_MAX_WORKERS, per_host_limit=DEFAULT_PER_HOST_LIMIT,
+                    on_result=None, cancel_token=None, on_progress=None, mirror_cache=None, dissociate=True):
+    """
+    Ejecuta worker(job) para cada job con como mucho max_workers a la vez y per_host_limit
+    por host remoto. Un job de un host saturado no ocupa hilo: espera en cola mientras
+    avanzan los de otros hosts.
+    on_result(job, result) se llama al terminar cada job; result es {'action', 'ok', 'error', 'cancelled', 'seconds'}.
+    Devuelve {'results': {local_path: result}, 'succeeded': n, 'failed': n, 'cancelled': n, 'elapsed': s}.
+    """
+    if worker is None:
+        worker = functools.partial(clone_or_pull, cancel_token=cancel_token, on_progress=on_progress, mirror_cache=mirror_cache, dissociate=dissociate)
+    max_workers = max(1, max_workers)
+    per_host_limit = max(1, per_host_limit)
+    pending = deque(jobs)
+    running_per_host = {}
+    results = {}
+    started_at = time.monotonic()
+
+    def run_job(job):
+        job_started = time.monotonic()
+        try:
+            action = worker(job)
+            return {"action": action, "ok": True, "error": None, "cancelled": False, "seconds": time.monotonic() - job_started}
+        except GitCancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Bulk update failed for {job.get('local_path')}: {e}")
+            return {"action": None, "ok": False, "error": str(e), "cancelled": False, "seconds": time.monotonic() - job_started}
+
+    def record(job, result):
+        results[os.path.normpath(job["local_path"])] = result
+        if on_result: on_result(job, result)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        while pending or futures:
+            if cancel_token and cancel_token.cancelled:
+                break
+            # Lanzamos todo lo que quepa respetando ambos límites, en el orden recibido.
+            deferred = deque()
+            while pending and len(futures) < max_workers:
+                job = pending.popleft()
+                host = remote_host(job.get("repo_url"))
+                if running_per_host.get(host, 0) >= per_host_limit:
+                    deferred.append(job)
+                    continue
+                running_per_host[host] = running_per_host.get(host, 0) + 1
+                futures[executor.submit(run_job, job)] = (job, host)
+            pending.extendleft(reversed(deferred))
+            if not futures:
+                break
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                job, host = futures.pop(future)
+                running_per_host[host] -= 1
+                try:
+                    record(job, future.result())
+                except GitCancelledError:
+                    record(job, _cancelled_result())
+
+        # Tras una cancelación esperamos a los que ya estaban en marcha (el token mata sus procesos).
+        for future, (job, _host) in futures.items():
+            try:
+                record(job, future.result())
+            except GitCancelledError:
+                record(job, _cancelled_result())
+    for job in pending:
+        record(job, _cancelled_result())
+
+    cancelled = sum(1 for r in results.values() if r["cancelled"])
+    succeeded = sum(1 for r in results.values() if r["ok"])
+    report = {
+        "results": results, "succeeded": succeeded, "failed": len(results) - succeeded - cancelled,
+        "cancelled": cancelled, "elapsed": time.monotonic() - started_at,
+    }
+    logger.info(f"Bulk update finished in {report['elapsed']:.1f}s: {succeeded} ok, {report['failed']} failed, {cancelled} cancelled.")
+    return report
@@ -0,0 +1,121 @@
+# installerpro/utils/fetch_scheduler.py
+"""
+Planificador de fetch con TTL.
+Recuerda el último fetch correcto de cada repositorio, omite los fetch más recientes que el TTL
+y agrupa las peticiones simultáneas sobre el mismo repositorio en un único fetch.
+Con un fichero de estado (set_state_path) esos momentos sobreviven a un reinicio.
+"""
+import os
+import time
+import logging
+import threading
+
+from installerpro.utils import persistence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FETCH_TTL = 300  # segundos
+
+class _InflightFetch:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = False
+
+def _default_fetch(local_path, cancel_token=None):
+    from installerpro.utils import git_operations
+    return git_operations.fetch_remote(local_path, cancel_token=cancel_token)
+
+class FetchScheduler:
+    def __init__(self, ttl_seconds=DEFAULT_FETCH_TTL, fetch_func=_default_fetch):
+        self.ttl_seconds = ttl_seconds
+        self._fetch_func = fetch_func
+        self._last_success = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._state_path = None
+        self._writer = None
+
+    def set_state_path(self, state_path):
+        """Carga y, a partir de ahora, guarda en state_path los momentos de los fetch correctos."""
+        state = persistence.load_json_state(state_path, "fetch state")
+        with self._lock:
+            self._state_path = state_path
+            for key, when in state.items():
+                if isinstance(when, (int, float)) and when > self._last_success.get(key, 0):
+                    self._last_success[key] = when
+            if self._writer is None:
+                # Un refresco completo termina muchos fetch seguidos: se escriben juntos.
+                self._writer = persistence.WriteBehind(self._write_state, name="fetch-state-writer")
+
+    def _write_state(self):
+        with self._lock:
+            state, state_path = dict(self._last_success), self._state_path
+        persistence.atomic_write_json(state_path, state)
+
+    def last_fetch(self, local_path):
+        """
+        Momento (epoch) del último fetch correcto hecho por este planificador, o None si no se conoce.
+        No se usa el mtime de FETCH_HEAD: también lo escriben los fetch fallidos y los pull de una
+        sola rama, que no ponen al día el resto de refs remotas.
+        """
+        with self._lock:
+            return self._last_success.get(os.path.normpath(local_path))
+
+    def is_fresh(self, local_path, ttl_seconds=None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        last = self.last_fetch(local_path)
+        return last is not None and time.time() - last < ttl
+
+    def fetch(self, local_path, force=False, cancel_token=None):
+        """
+        Hace fetch si el último es más antiguo que el TTL (o si force=True).
+        Si ya hay un fetch en curso para el mismo repositorio, espera a ese y devuelve su resultado;
+        mientras espera, un cancel_token cancelado lanza GitCancelledError.
+        Devuelve True si los datos remotos están al día (fetch correcto u omitido por TTL).
+        """
+        key = os.path.normpath(local_path)
+        if not force and self.is_fresh(key):
+            logger.debug(f"Skipping fetch for {key}: last fetch is younger than {self.ttl_seconds}s.")
+            return True
+
+        with self._lock:
+            inflight = self._inflight.get(key)
+            owner = inflight is None
+            if owner:
+                inflight = self._inflight[key] = _InflightFetch()
+        if not owner:
+            logger.debug(f"Joining in-flight fetch for {key}.")
+            # Se espera por tramos para que cancelar este refresco no dependa del fetch ajeno.
+            while not inflight.event.wait(0.1):
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+            return inflight.result
+
+        try:
+            inflight.result = bool(self._fetch_func(key, cancel_token=cancel_token))
+            if inflight.result:
+                with self._lock:
+                    self._last_success[key] = time.time()
+                    writer = self._writer
+                if writer is not None:
+                    writer.schedule()
+            return inflight.result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            inflight.event.set()
+
+    def status_as_of(self, local_path):
+        """Alias legible de last_fetch: el estado remoto de un repositorio es válido 'a fecha de' este momento."""
+        return self.last_fetch(local_path)
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """Devuelve el planificador compartido por toda la aplicación."""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = FetchScheduler()
+        return _default_scheduler
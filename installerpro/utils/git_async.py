@@ -0,0 +1,264 @@
+# installerpro/utils/git_async.py
+"""
+Capa de ejecución de git basada en asyncio.
+Equivalente asíncrono de _run_cmd_with_output / run_git_operation: un único bucle de eventos
+puede lanzar cientos de fetch a la vez sin crear dos hilos por proceso.
+"""
+import os
+import asyncio
+import logging
+import threading
+
+from installerpro.utils import git_progress
+from installerpro.utils.git_operations import (
+    AUTOSTASH_OPERATIONS, DIRTY_CHECK_COMMAND, NO_RETRY, STASH_OPERATIONS, GitOperationError, GitTimeoutError,
+    _add_safe_directory, _kill_process_tree, _known_clean, _popen_group_kwargs, _with_autostash, blocked_by_local_files,
+    is_git_repository, remember_tree_state,
+)
+
+logger = logging.getLogger(__name__)
+
+# Límite de longitud de línea para los StreamReader (la salida de git puede ser larga)
+_STREAM_LIMIT = 1024 * 1024
+
+async def _kill_process(process):
+    if process.returncode is None:
+        # Mata todo el grupo de procesos (ssh, git-remote-https...), igual que la capa síncrona.
+        _kill_process_tree(process)
+        await process.wait()
+
+async def _pump_stream(stream, stream_name, lines, on_line):
+    while True:
+        line_bytes = await stream.readline()
+        if not line_bytes:
+            break
+        line_str = line_bytes.decode('utf-8', errors='replace').strip()
+        lines.append(line_str)
+        if on_line:
+            on_line(stream_name, line_str)
+
+async def _pump_stderr(stream, lines, on_line, on_progress):
+    # stderr se lee por bloques: git separa las actualizaciones de progreso con '\r', no con '\n'.
+    buffer = b""
+    while True:
+        chunk = await stream.read(65536)
+        if chunk:
+            records, buffer = git_progress.split_records(buffer + chunk)
+        else:
+            records, buffer = ([buffer.decode('utf-8', errors='replace').strip()] if buffer.strip() else []), b""
+        for line_str in records:
+            event = git_progress.parse_progress_line(line_str)
+            if event and on_progress:
+                on_progress(event)
+            if event and not event.done:
+                continue
+            lines.append(line_str)
+            if on_line:
+                on_line("stderr", line_str)
+        if not chunk:
+            break
+
+async def run_cmd_async(command, cwd=None, timeout=None, on_line=None, on_progress=None):
+    """
+    Ejecuta un comando y devuelve (código, stdout, stderr) como _run_cmd_with_output.
+    on_line(stream, línea) recibe cada línea ("stdout" o "stderr") en cuanto llega.
+    on_progress recibe los git_progress.ProgressEvent; las líneas de progreso intermedias no pasan por on_line.
+    Si vence el timeout se mata el grupo de procesos y se lanza GitTimeoutError; si la tarea
+    se cancela, el proceso también se mata antes de propagar la cancelación.
+    """
+    logger.debug(f"Ejecutando comando (async): {' '.join(command)} en {cwd or os.getcwd()}")
+    process = await asyncio.create_subprocess_exec(
+        *command, cwd=cwd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, limit=_STREAM_LIMIT,
+        **_popen_group_kwargs(),
+    )
+    stdout_lines, stderr_lines = [], []
+
+    async def communicate():
+        await asyncio.gather(
+            _pump_stream(process.stdout, "stdout", stdout_lines, on_line),
+            _pump_stderr(process.stderr, stderr_lines, on_line, on_progress),
+        )
+        return await process.wait()
+
+    try:
+        return_code = await asyncio.wait_for(communicate(), timeout)
+    except asyncio.TimeoutError:
+        await _kill_process(process)
+        raise GitTimeoutError(f"Command '{' '.join(command)}' timed out after {timeout}s.")
+    except asyncio.CancelledError:
+        await _kill_process(process)
+        raise
+    return return_code, "\n".join(stdout_lines), "\n".join(stderr_lines)
+
+async def iter_cmd_lines(command, cwd=None, timeout=None):
+    """
+    Generador asíncrono que entrega (stream, línea) mientras el comando se ejecuta.
+    Al terminar lanza GitOperationError si el código de retorno no es 0.
+    """
+    queue = asyncio.Queue()
+    done = object()
+
+    async def runner():
+        try:
+            return await run_cmd_async(command, cwd, timeout, on_line=lambda stream, line: queue.put_nowait((stream, line)))
+        finally:
+            queue.put_nowait(done)
+
+    task = asyncio.ensure_future(runner())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            yield item
+        return_code, _, stderr = await task
+        if return_code != 0:
+            raise GitOperationError(f"Command '{' '.join(command)}' failed with code {return_code}: {stderr}")
+    finally:
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, GitOperationError):
+                pass
+
+async def _add_safe_directory_async(path):
+    # Misma ruta que la capa síncrona (sin duplicados, serializada y atómica), en un hilo para no bloquear el bucle.
+    return await asyncio.to_thread(_add_safe_directory, path)
+
+async def _is_worktree_dirty_async(local_path):
+    """Versión asíncrona de git_operations.is_worktree_dirty (mismo atajo sin procesos)."""
+    if _known_clean(local_path):
+        return False
+    return_code, stdout, _ = await run_cmd_async(DIRTY_CHECK_COMMAND, cwd=local_path)
+    dirty = return_code != 0 or bool(stdout)
+    remember_tree_state(local_path, not dirty)
+    return dirty
+
+async def run_git_operation_async(project_path, operation_name, *git_args, timeout=None, on_line=None, retry_policy=None, on_progress=None):
+    """
+    Versión asíncrona de run_git_operation: mismo manejo de 'clone', auto-stash, dubious ownership
+    y reintentos con backoff (retry_policy). La cancelación se hace cancelando la tarea asyncio.
+    Devuelve stdout o lanza GitOperationError.
+    """
+    project_path = os.path.normpath(project_path)
+    retry_policy = retry_policy or NO_RETRY
+    on_progress = git_progress.bind_progress(on_progress, project_path, operation_name)
+    if operation_name == "clone":
+        parent_dir = os.path.dirname(project_path)
+        os.makedirs(parent_dir, exist_ok=True)
+        current_cwd = parent_dir
+        git_command = ["git"] + list(git_args[:-1]) + [os.path.basename(project_path)]
+    else:
+        if not os.path.isdir(project_path):
+            raise GitOperationError(f"El directorio '{project_path}' no existe para la operación '{operation_name}'.")
+        current_cwd = project_path
+        git_command = ["git"] + list(git_args)
+        if operation_name in AUTOSTASH_OPERATIONS:
+            git_command = _with_autostash(git_command)
+
+    safe_directory_added = False
+    force_stash = False
+    attempt = 0
+    while True:
+        attempt += 1
+        stashed = False
+        if force_stash or (operation_name in STASH_OPERATIONS and is_git_repository(project_path) and await _is_worktree_dirty_async(project_path)):
+            stash_code, stash_stdout, _ = await run_cmd_async(["git", "stash", "save", "--include-untracked", "InstallerPro auto-stash"], cwd=project_path)
+            stashed = stash_code == 0 and "No local changes to save" not in stash_stdout
+
+        timeout_error = None
+        try:
+            return_code, stdout, stderr = await run_cmd_async(git_command, cwd=current_cwd, timeout=timeout, on_line=on_line, on_progress=on_progress)
+        except GitTimeoutError as e:
+            timeout_error = e
+        finally:
+            if stashed:
+                pop_code, pop_stdout, pop_stderr = await run_cmd_async(["git", "stash", "pop"], cwd=project_path)
+                if pop_code != 0:
+                    logger.warning(f"Fallo al restaurar cambios locales para '{project_path}'. Salida: {pop_stdout} {pop_stderr}")
+
+        if timeout_error is not None:
+            if retry_policy.retry_on_timeout and attempt < retry_policy.max_attempts:
+                await asyncio.sleep(retry_policy.delay_for(attempt))
+                continue
+            raise timeout_error
+
+        if return_code == 0:
+            logger.info(f"Operación Git '{operation_name}' completada exitosamente en '{project_path}'.")
+            return stdout
+
+        full_error_output = f"stdout: {stdout}\nstderr: {stderr}"
+        if "fatal: detected dubious ownership" in full_error_output and not safe_directory_added:
+            if await _add_safe_directory_async(project_path):
+                safe_directory_added = True
+                continue
+        elif operation_name in AUTOSTASH_OPERATIONS + STASH_OPERATIONS and not force_stash and blocked_by_local_files(full_error_output):
+            force_stash = True
+            continue
+        elif retry_policy.is_transient(full_error_output) and attempt < retry_policy.max_attempts:
+            await asyncio.sleep(retry_policy.delay_for(attempt))
+            continue
+        raise GitOperationError(f"Falló la operación Git '{operation_name}': {full_error_output}")
+
+async def gather_limited(coroutines, limit):
+    """
+    Ejecuta las corrutinas con como mucho 'limit' activas a la vez.
+    Devuelve los resultados en el mismo orden; las excepciones se devuelven en lugar de propagarse.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def guarded(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(guarded(c) for c in coroutines), return_exceptions=True)
+
+async def fetch_all_async(local_paths, limit=32, timeout=None, retry_policy=None, on_progress=None):
+    """
+    Lanza 'git fetch' en muchos repositorios sobre un solo bucle. Devuelve {ruta: True/excepción}.
+    on_progress (p. ej. un git_progress.ProgressTracker) recibe el progreso de cada repositorio.
+    """
+    local_paths = list(local_paths)
+    verbosity = "--progress" if on_progress else "--quiet"
+    results = await gather_limited(
+        (run_git_operation_async(path, "fetch", "fetch", verbosity, timeout=timeout, retry_policy=retry_policy, on_progress=on_progress) for path in local_paths), limit
+    )
+    return {path: (True if not isinstance(result, BaseException) else result) for path, result in zip(local_paths, results)}
+
+class BackgroundEventLoop:
+    """
+    Bucle de eventos en un único hilo de fondo, para que la UI Tk (o cualquier código síncrono)
+    pueda lanzar corrutinas sin crear un hilo por acción. submit() devuelve un concurrent.futures.Future.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run_loop():
+                    asyncio.set_event_loop(self._loop)
+                    self._loop.call_soon(ready.set)
+                    self._loop.run_forever()
+
+                self._thread = threading.Thread(target=run_loop, name="git-async-loop", daemon=True)
+                self._thread.start()
+                ready.wait()
+            return self._loop
+
+    def submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_started())
+
+    def stop(self):
+        with self._lock:
+            if self._loop and self._thread and self._thread.is_alive():
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout=5)
+            self._thread = None
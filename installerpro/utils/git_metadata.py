@@ -0,0 +1,334 @@
+# installerpro/utils/git_metadata.py
+"""
+Lector ligero de metadatos de un repositorio Git (HEAD, refs, packed-refs y config).
+Lee los ficheros de .git directamente, sin lanzar procesos ni construir objetos GitPython,
+y memoriza cada fichero interpretado según su mtime y tamaño.
+"""
+import os
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def _read_cached(path, parser):
+    """
+    Devuelve parser(contenido) para 'path', reutilizando el resultado mientras
+    el mtime y el tamaño del fichero no cambien. Devuelve None si el fichero no existe.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (path, parser.__name__)
+    signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            value = parser(f.read())
+    except OSError as e:
+        logger.debug(f"Could not read git metadata file {path}: {e}")
+        return None
+    with _cache_lock:
+        _cache[key] = (signature, value)
+    return value
+
+def clear_cache():
+    """Vacía la caché de ficheros interpretados."""
+    with _cache_lock:
+        _cache.clear()
+
+# ------------------------------------------------------------------------------
+# Localización de .git (repositorios normales, worktrees y ficheros 'gitdir:')
+# ------------------------------------------------------------------------------
+def _parse_text(content):
+    return content.strip()
+
+def find_git_dirs(worktree_path):
+    """
+    Devuelve (git_dir, common_dir) para un directorio de trabajo, o None si no es un repositorio.
+    git_dir contiene HEAD e index del worktree; common_dir contiene refs, objects y config compartidos.
+    """
+    dot_git = os.path.join(worktree_path, ".git")
+    if os.path.isdir(dot_git):
+        git_dir = dot_git
+    elif os.path.isfile(dot_git):
+        content = _read_cached(dot_git, _parse_text) or ""
+        if not content.startswith("gitdir:"):
+            return None
+        git_dir = content[len("gitdir:"):].strip()
+        if not os.path.isabs(git_dir):
+            git_dir = os.path.join(worktree_path, git_dir)
+        git_dir = os.path.normpath(git_dir)
+        if not os.path.isdir(git_dir):
+            return None
+    else:
+        return None
+
+    common_dir = git_dir
+    commondir_file = os.path.join(git_dir, "commondir")
+    commondir = _read_cached(commondir_file, _parse_text)
+    if commondir:
+        common_dir = commondir if os.path.isabs(commondir) else os.path.join(git_dir, commondir)
+        common_dir = os.path.normpath(common_dir)
+    return git_dir, common_dir
+
+# ------------------------------------------------------------------------------
+# HEAD y referencias
+# ------------------------------------------------------------------------------
+def _parse_packed_refs(content):
+    refs = {}
+    for line in content.splitlines():
+        if not line or line[0] in "#^":
+            continue
+        sha, _, refname = line.partition(" ")
+        if refname:
+            refs[refname.strip()] = sha
+    return refs
+
+def _ref_locations(git_dir, common_dir, refname):
+    # Las refs propias de cada worktree (HEAD, refs/bisect, refs/worktree...) viven en git_dir.
+    if git_dir != common_dir:
+        yield os.path.join(git_dir, *refname.split("/"))
+    yield os.path.join(common_dir, *refname.split("/"))
+
+def read_ref(git_dir, common_dir, refname, _depth=0):
+    """Resuelve una referencia (loose o en packed-refs) a su SHA. Sigue refs simbólicas."""
+    if _depth > 5:
+        return None
+    for path in _ref_locations(git_dir, common_dir, refname):
+        content = _read_cached(path, _parse_text)
+        if content:
+            if content.startswith("ref:"):
+                return read_ref(git_dir, common_dir, content[4:].strip(), _depth + 1)
+            return content
+    packed = _read_cached(os.path.join(common_dir, "packed-refs"), _parse_packed_refs) or {}
+    return packed.get(refname)
+
+def read_head(git_dir):
+    """Devuelve ('ref', 'refs/heads/<rama>') o ('detached', sha) según el contenido de HEAD."""
+    content = _read_cached(os.path.join(git_dir, "HEAD"), _parse_text)
+    if not content:
+        return None, None
+    if content.startswith("ref:"):
+        return "ref", content[4:].strip()
+    return "detached", content
+
+def list_refs(worktree_path, prefix="refs/"):
+    """
+    Lista {refname: sha} combinando packed-refs y refs sueltas bajo 'prefix'.
+    Las refs sueltas tienen prioridad, igual que en git.
+    """
+    dirs = find_git_dirs(worktree_path)
+    if not dirs:
+        return {}
+    git_dir, common_dir = dirs
+    packed = _read_cached(os.path.join(common_dir, "packed-refs"), _parse_packed_refs) or {}
+    refs = {name: sha for name, sha in packed.items() if name.startswith(prefix)}
+    base = os.path.join(common_dir, *prefix.rstrip("/").split("/"))
+    for root, _dirs, files in os.walk(base):
+        for filename in files:
+            full_path = os.path.join(root, filename)
+            refname = os.path.relpath(full_path, common_dir).replace(os.sep, "/")
+            sha = _read_cached(full_path, _parse_text)
+            if sha and not sha.startswith("ref:"):
+                refs[refname] = sha
+    return refs
+
+# ------------------------------------------------------------------------------
+# Fichero de configuración
+# ------------------------------------------------------------------------------
+def _unquote_value(raw):
+    """Interpreta comillas, escapes y comentarios de un valor de git config."""
+    result, in_quotes, i = [], False, 0
+    while i < len(raw):
+        ch = raw[i]
+        if ch == "\\" and i + 1 < len(raw):
+            nxt = raw[i + 1]
+            result.append({"n": "\n", "t": "\t", "b": "\b"}.get(nxt, nxt))
+            i += 2
+            continue
+        if ch == '"':
+            in_quotes = not in_quotes
+        elif ch in "#;" and not in_quotes:
+            break
+        else:
+            result.append(ch)
+        i += 1
+    return "".join(result).strip()
+
+def _parse_config(content):
+    """
+    Interpreta un fichero de configuración de git.
+    Devuelve {(seccion, subseccion): {clave: [valores]}} con sección y clave en minúsculas.
+    Las directivas [include] no se siguen.
+    """
+    config = {}
+    section = None
+    pending = ""
+    for raw_line in content.splitlines():
+        line = pending + raw_line
+        if line.endswith("\\") and not line.endswith("\\\\"):
+            pending = line[:-1]
+            continue
+        pending = ""
+        stripped = line.strip()
+        if not stripped or stripped[0] in "#;":
+            continue
+        if stripped.startswith("["):
+            header, _, rest = stripped[1:].partition("]")
+            if '"' in header:
+                name, _, sub = header.partition('"')
+                section = (name.strip().lower(), sub.rsplit('"', 1)[0].replace('\\"', '"').replace("\\\\", "\\"))
+            elif "." in header:
+                name, _, sub = header.partition(".")
+                section = (name.strip().lower(), sub.strip().lower())
+            else:
+                section = (header.strip().lower(), None)
+            config.setdefault(section, {})
+            stripped = rest.strip()
+            if not stripped or stripped[0] in "#;":
+                continue
+        if section is None:
+            continue
+        key, sep, value = stripped.partition("=")
+        key = key.strip().lower()
+        value = _unquote_value(value) if sep else "true"
+        config[section].setdefault(key, []).append(value)
+    return config
+
+def read_config_file(path):
+    """Interpreta un fichero de configuración concreto (p. ej. el 'config' de un repositorio bare)."""
+    return _read_cached(path, _parse_config) or {}
+
+def read_config(worktree_path):
+    """Devuelve la configuración del repositorio (config común + config.worktree si existe)."""
+    dirs = find_git_dirs(worktree_path)
+    if not dirs:
+        return {}
+    git_dir, common_dir = dirs
+    config = {}
+    for path in (os.path.join(common_dir, "config"), os.path.join(git_dir, "config.worktree")):
+        parsed = _read_cached(path, _parse_config) or {}
+        for section, values in parsed.items():
+            merged = config.setdefault(section, {})
+            for key, vals in values.items():
+                merged[key] = merged.get(key, []) + vals
+    return config
+
+def get_config_value(config, section, subsection, key, default=None):
+    """Devuelve el último valor de section[.subsection].key, como hace 'git config --get'."""
+    values = config.get((section.lower(), subsection), {}).get(key.lower())
+    return values[-1] if values else default
+
+# ------------------------------------------------------------------------------
+# API de alto nivel
+# ------------------------------------------------------------------------------
+def read_repo_metadata(worktree_path):
+    """
+    Devuelve un diccionario con 'branch', 'detached', 'head_sha', 'upstream' (ej. "origin/main"),
+    'upstream_ref', 'upstream_sha' y 'remote_url' (de 'origin'), o None si no es un repositorio.
+    """
+    dirs = find_git_dirs(worktree_path)
+    if not dirs:
+        return None
+    git_dir, common_dir = dirs
+    config = read_config(worktree_path)
+
+    kind, value = read_head(git_dir)
+    metadata = {
+        "branch": "N/A", "detached": False, "head_sha": None,
+        "upstream": None, "upstream_ref": None, "upstream_sha": None,
+        "remote_url": get_config_value(config, "remote", "origin", "url", "no_remote"),
+    }
+    if kind == "detached":
+        metadata.update(branch="detached", detached=True, head_sha=value)
+        return metadata
+    if kind != "ref":
+        return metadata
+
+    branch = value[len("refs/heads/"):] if value.startswith("refs/heads/") else value
+    metadata["branch"] = branch
+    metadata["head_sha"] = read_ref(git_dir, common_dir, value)
+
+    remote = get_config_value(config, "branch", branch, "remote")
+    merge = get_config_value(config, "branch", branch, "merge")
+    if remote and merge:
+        merge_branch = merge[len("refs/heads/"):] if merge.startswith("refs/heads/") else merge
+        if remote == ".":
+            metadata["upstream_ref"] = merge
+            metadata["upstream"] = merge_branch
+        else:
+            metadata["upstream_ref"] = f"refs/remotes/{remote}/{merge_branch}"
+            metadata["upstream"] = f"{remote}/{merge_branch}"
+        metadata["upstream_sha"] = read_ref(git_dir, common_dir, metadata["upstream_ref"])
+    return metadata
+
+def get_current_branch(worktree_path):
+    """Rama actual, "detached" si HEAD está desacoplado o "N/A" si no es un repositorio."""
+    metadata = read_repo_metadata(worktree_path)
+    return metadata["branch"] if metadata else "N/A"
+
+def get_remote_url(worktree_path, remote="origin"):
+    """URL del remoto indicado, "no_remote" si no existe o "N/A" si no es un repositorio."""
+    if not find_git_dirs(worktree_path):
+        return "N/A"
+    return get_config_value(read_config(worktree_path), "remote", remote, "url", "no_remote")
+
+def list_worktrees(worktree_path):
+    """
+    Worktrees enlazados del repositorio (sin el principal), leyendo <common_dir>/worktrees/*:
+    [{'path', 'branch', 'head_sha', 'detached', 'locked', 'prunable'}]. 'prunable' indica que la
+    carpeta del worktree ya no existe. Lista vacía si no es un repositorio.
+    """
+    dirs = find_git_dirs(worktree_path)
+    if not dirs:
+        return []
+    admin_root = os.path.join(dirs[1], "worktrees")
+    try:
+        names = sorted(os.listdir(admin_root))
+    except OSError:
+        return []
+    worktrees = []
+    for name in names:
+        admin_dir = os.path.join(admin_root, name)
+        gitdir = _read_cached(os.path.join(admin_dir, "gitdir"), _parse_text)
+        if not gitdir:
+            continue
+        kind, value = read_head(admin_dir)
+        branch = value[len("refs/heads/"):] if kind == "ref" and value.startswith("refs/heads/") else None
+        worktrees.append({
+            "path": os.path.normpath(os.path.dirname(gitdir)),
+            "branch": branch if kind == "ref" else "detached",
+            "head_sha": read_ref(admin_dir, dirs[1], value) if kind == "ref" else value,
+            "detached": kind == "detached",
+            "locked": os.path.exists(os.path.join(admin_dir, "locked")),
+            "prunable": not os.path.exists(gitdir),
+        })
+    return worktrees
+
+def list_remotes(worktree_path):
+    """Nombres de los remotos con URL configurada, en el orden del fichero de configuración."""
+    return [sub for (section, sub), values in read_config(worktree_path).items() if section == "remote" and sub and values.get("url")]
+
+def get_clone_shape(worktree_path, remote="origin"):
+    """
+    Describe cómo se clonó el repositorio: {'shallow': bool, 'partial_filter': str o None,
+    'single_branch': bool}. Devuelve None si no es un repositorio.
+    """
+    dirs = find_git_dirs(worktree_path)
+    if not dirs:
+        return None
+    _git_dir, common_dir = dirs
+    config = read_config(worktree_path)
+    refspecs = config.get(("remote", remote), {}).get("fetch", [])
+    return {
+        "shallow": os.path.isfile(os.path.join(common_dir, "shallow")),
+        "partial_filter": get_config_value(config, "remote", remote, "partialclonefilter"),
+        "single_branch": bool(refspecs) and not any("*" in spec for spec in refspecs),
+    }
@@ -5,6 +5,12 @@ import logging
 import sys
 import git
 import threading
+import time
+import random
+import signal
+import collections
+
+from installerpro.utils import git_metadata, git_progress
 
 logger = logging.getLogger(__name__)
 
@@ -12,15 +18,144 @@ class GitOperationError(Exception):
     """Excepción personalizada para errores en operaciones Git."""
     pass
 
-def _run_cmd_with_output(command, cwd=None):
+class GitTimeoutError(GitOperationError):
+    """El comando git superó su tiempo máximo y se mató junto con sus procesos hijos."""
+    pass
+
+class GitCancelledError(GitOperationError):
+    """El comando git se canceló mediante un CancellationToken."""
+    pass
+
+class CancellationToken:
+    """
+    Token de cancelación cooperativa. Quien lanza las operaciones llama a cancel();
+    los comandos en curso que recibieron el token se matan y lanzan GitCancelledError.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.debug(f"Cancellation callback failed: {e}")
+
+    def add_callback(self, callback):
+        """Registra callback(); si el token ya está cancelado se llama inmediatamente."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait(self, timeout):
+        """Espera hasta 'timeout' segundos; devuelve True si se canceló mientras tanto."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise GitCancelledError("Operación cancelada.")
+
+# Fragmentos de salida de git que indican un fallo de red transitorio
+TRANSIENT_ERROR_PATTERNS = (
+    "could not resolve host",
+    "temporary failure in name resolution",
+    "connection timed out",
+    "operation timed out",
+    "connection reset",
+    "connection refused",
+    "the remote end hung up unexpectedly",
+    "early eof",
+    "rpc failed",
+    "gnutls_handshake() failed",
+    "ssl_read",
+    "the requested url returned error: 5",
+    "ssh: connect to host",
+)
+
+class RetryPolicy:
+    """
+    Política de reintentos con backoff exponencial y jitter para errores de red transitorios.
+    max_attempts cuenta el primer intento. Los timeouts no se reintentan salvo retry_on_timeout=True,
+    para que un remoto colgado no retenga una operación masiva.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=1.0, max_delay=30.0, jitter=0.5, retry_on_timeout=False):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retry_on_timeout = retry_on_timeout
+
+    def delay_for(self, attempt):
+        """Espera antes del reintento número 'attempt' (1 = primer reintento)."""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return delay * (1 - self.jitter) + random.uniform(0, delay * self.jitter)
+
+    def is_transient(self, error_output):
+        error_output = error_output.lower()
+        return any(pattern in error_output for pattern in TRANSIENT_ERROR_PATTERNS)
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+NETWORK_RETRY_POLICY = RetryPolicy(max_attempts=3)
+DEFAULT_FETCH_TIMEOUT = 120
+
+def _popen_group_kwargs():
+    """Lanza el proceso en su propio grupo para poder matar también a sus hijos (ssh, git-remote-https...)."""
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+def _kill_process_tree(process):
+    # Sirve tanto para subprocess.Popen como para asyncio.subprocess.Process
+    finished = process.poll() if hasattr(process, "poll") else process.returncode
+    if finished is not None:
+        return
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except (OSError, ProcessLookupError):
+        pass
+    try:
+        process.kill()
+    except OSError:
+        pass
+
+def _run_cmd_with_output(command, cwd=None, timeout=None, cancel_token=None, on_progress=None):
     """
     Ejecuta un comando de shell, registrando stdout y stderr de forma informativa.
     El éxito o fracaso se determina por el código de retorno.
+    timeout: segundos máximos; al vencer se mata todo el grupo de procesos y se lanza GitTimeoutError.
+    cancel_token: CancellationToken; si se cancela, se mata el grupo y se lanza GitCancelledError.
+    on_progress: callback que recibe cada git_progress.ProgressEvent de stderr. Las líneas de progreso
+    intermedias no se registran en el log ni forman parte del stderr devuelto.
     """
     logger.debug(f"Ejecutando comando: {' '.join(command)} en {cwd or os.getcwd()}")
+    if cancel_token:
+        cancel_token.raise_if_cancelled()
     
     process = subprocess.Popen(
-        command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **_popen_group_kwargs()
     )
 
     # Leemos stdout y stderr en hilos separados para evitar bloqueos
@@ -32,36 +167,291 @@ def _run_cmd_with_output(command, cwd=None):
             log_level(f"GIT_PIPE: {line_str}")
         pipe.close()
 
+    def read_stderr(pipe, line_list):
+        for line_str in git_progress.iter_pipe_records(pipe):
+            event = git_progress.parse_progress_line(line_str)
+            if event and on_progress:
+                on_progress(event)
+            if event and not event.done:
+                continue
+            line_list.append(line_str)
+            logger.warning(f"GIT_PIPE: {line_str}") # Usamos WARNING para stderr
+        pipe.close()
+
     stdout_thread = threading.Thread(target=read_pipe, args=(process.stdout, stdout_lines, logger.info))
-    stderr_thread = threading.Thread(target=read_pipe, args=(process.stderr, stderr_lines, logger.warning)) # Usamos WARNING para stderr
+    stderr_thread = threading.Thread(target=read_stderr, args=(process.stderr, stderr_lines))
     stdout_thread.start()
     stderr_thread.start()
-    stdout_thread.join()
-    stderr_thread.join()
+
+    kill = lambda: _kill_process_tree(process)
+    if cancel_token:
+        cancel_token.add_callback(kill)
+    try:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in (stdout_thread, stderr_thread):
+            thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+        timed_out = stdout_thread.is_alive() or stderr_thread.is_alive()
+        if timed_out:
+            kill()
+            stdout_thread.join()
+            stderr_thread.join()
+    finally:
+        if cancel_token:
+            cancel_token.remove_callback(kill)
 
     return_code = process.wait()
+    if cancel_token and cancel_token.cancelled:
+        raise GitCancelledError(f"Command '{' '.join(command)}' was cancelled.")
+    if timed_out:
+        raise GitTimeoutError(f"Command '{' '.join(command)}' timed out after {timeout}s.")
     return return_code, "\n".join(stdout_lines), "\n".join(stderr_lines)
 
 def _add_safe_directory(path):
-    """Añade una ruta al listado de directorios seguros de Git globalmente."""
+    """Añade una ruta al listado de directorios seguros de Git globalmente (sin duplicarla si ya está)."""
     logger.info(f"Intentando añadir '{path}' a la lista de directorios seguros de Git.")
-    command = ["git", "config", "--global", "--add", "safe.directory", os.path.normpath(path)]
-    return_code, stdout, stderr = _run_cmd_with_output(command)
-    if return_code == 0:
-        logger.info(f"'{path}' añadido a directorios seguros de Git.")
-        return True
+    try:
+        ensure_safe_directories([path], check_ownership=False)
+    except GitOperationError as e:
+        logger.error(f"Fallo al añadir '{path}' a directorios seguros. Error: {e}")
+        return False
+    logger.info(f"'{path}' añadido a directorios seguros de Git.")
+    return True
+
+def _global_config_path():
+    """El fichero que usa 'git config --global': GIT_CONFIG_GLOBAL, ~/.gitconfig o, si solo existe ese, el de XDG."""
+    if os.environ.get("GIT_CONFIG_GLOBAL"):
+        return os.environ["GIT_CONFIG_GLOBAL"]
+    home_config = os.path.join(os.path.expanduser("~"), ".gitconfig")
+    xdg_home = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    xdg_config = os.path.join(xdg_home, "git", "config")
+    if not os.path.exists(home_config) and os.path.exists(xdg_config):
+        return xdg_config
+    return home_config
+
+def _safe_directory_key(path):
+    return os.path.normcase(os.path.normpath(path.rstrip("/\\") or path))
+
+def read_safe_directories():
+    """Valores de safe.directory en la configuración global, en orden y con duplicados."""
+    return_code, stdout, stderr = _run_cmd_with_output(["git", "config", "--global", "--get-all", "safe.directory"])
+    if return_code == 1:  # la clave no existe
+        return []
+    if return_code != 0:
+        raise GitOperationError(f"Could not read safe.directory from the global git config: {stderr}")
+    return stdout.splitlines()
+
+def _expected_owner_uid():
+    """uid que git exige como propietario; con sudo, git acepta el del usuario original (SUDO_UID)."""
+    uid = os.geteuid()
+    if uid == 0 and os.environ.get("SUDO_UID", "").isdigit():
+        return int(os.environ["SUDO_UID"])
+    return uid
+
+def needs_safe_directory(path):
+    """
+    True si git rechazaría el repositorio por 'dubious ownership'. En POSIX basta con comparar el
+    propietario del árbol y del directorio .git; en Windows (sin API de propietarios en la
+    biblioteca estándar) se pregunta a git con un único 'rev-parse'.
+    """
+    if hasattr(os, "geteuid"):
+        dirs = git_metadata.find_git_dirs(path)
+        candidates = [path] + ([dirs[0]] if dirs else [])
+        try:
+            return any(os.stat(candidate).st_uid != _expected_owner_uid() for candidate in candidates)
+        except OSError:
+            return False
+    return_code, _stdout, stderr = _run_cmd_with_output(["git", "rev-parse", "--git-dir"], cwd=path)
+    return return_code != 0 and "dubious ownership" in stderr
+
+def _config_value(value):
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+# Serializa las escrituras de safe.directory de esta aplicación (preflight, reintentos, capa asíncrona).
+_safe_directory_lock = threading.Lock()
+
+def _write_global_config(config_path, entries, unset_existing):
+    """
+    Reescribe la configuración global con el protocolo de bloqueo de git: el contenido nuevo se
+    escribe en '<config>.lock' (creado en exclusiva, así ningún 'git config' escribe a la vez) y se
+    renombra sobre el original. Si unset_existing, se quitan antes las entradas safe.directory actuales.
+    """
+    config_path = os.path.realpath(config_path)  # un ~/.gitconfig enlazado se escribe en su destino
+    lock_path = f"{config_path}.lock"
+    os.makedirs(os.path.dirname(config_path) or ".", exist_ok=True)
+    try:
+        fd = os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        raise GitOperationError(f"{config_path} is locked by another git process ({lock_path} exists).")
+    try:
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                content = f.read()
+            mode = os.stat(config_path).st_mode & 0o777
+        except FileNotFoundError:
+            content, mode = "", None
+        if unset_existing:
+            scratch_path = f"{config_path}.safe-directory.tmp"
+            try:
+                with open(scratch_path, "w", encoding="utf-8") as f:
+                    f.write(content)
+                return_code, _stdout, stderr = _run_cmd_with_output(["git", "config", "--file", scratch_path, "--unset-all", "safe.directory"])
+                if return_code not in (0, 5):  # 5: la clave ya no existe
+                    raise GitOperationError(f"Could not rewrite safe.directory in the global git config: {stderr}")
+                with open(scratch_path, "r", encoding="utf-8") as f:
+                    content = f.read()
+            finally:
+                if os.path.exists(scratch_path):
+                    os.remove(scratch_path)
+        block = "[safe]\n" + "".join(f"\tdirectory = {_config_value(entry)}\n" for entry in entries)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            fd = None
+            f.write(content + ("\n" if content and not content.endswith("\n") else "") + block)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(lock_path, mode)
+        os.replace(lock_path, config_path)
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        if os.path.exists(lock_path):
+            os.remove(lock_path)
+        raise
+
+def ensure_safe_directories(paths, check_ownership=True):
+    """
+    Comprobación previa en bloque: añade a safe.directory (configuración global) las rutas que lo
+    necesitan y aún no están, y elimina las entradas duplicadas, todo de una vez. Así run_git_operation
+    nunca llega a fallar por 'dubious ownership' ni a reintentar. Con check_ownership=False se añaden
+    todas las rutas sin mirar su propietario. Devuelve la lista de rutas añadidas.
+    Las llamadas concurrentes se serializan y el fichero se reemplaza de forma atómica.
+    """
+    with _safe_directory_lock:
+        values = read_safe_directories()
+        # Un valor vacío vacía la lista: solo cuentan las entradas posteriores.
+        if "" in values:
+            values = values[len(values) - values[::-1].index(""):]
+        if "*" in values:
+            return []
+        effective, seen = [], set()
+        for value in values:
+            if _safe_directory_key(value) not in seen:
+                seen.add(_safe_directory_key(value))
+                effective.append(value)
+        missing = []
+        for path in paths:
+            path = os.path.normpath(path)
+            if _safe_directory_key(path) in seen or not os.path.isdir(path):
+                continue
+            if check_ownership and not needs_safe_directory(path):
+                continue
+            seen.add(_safe_directory_key(path))
+            missing.append(path)
+        rewrite = len(effective) != len(values)
+        if not missing and not rewrite:
+            return []
+        config_path = _global_config_path()
+        if rewrite:
+            logger.info(f"Removing {len(values) - len(effective)} duplicated safe.directory entries from {config_path}.")
+        # Una sola escritura para todas las entradas; se añaden al final para no tocar el resto del fichero.
+        try:
+            _write_global_config(config_path, effective + missing if rewrite else missing, unset_existing=rewrite)
+        except OSError as e:
+            raise GitOperationError(f"Could not write safe.directory entries to {config_path}: {e}")
+        if missing:
+            logger.info(f"Added {len(missing)} repositories to safe.directory in {config_path}.")
+        return missing
+
+def _wait_before_retry(attempt, retry_policy, cancel_token, operation_name):
+    delay = retry_policy.delay_for(attempt)
+    logger.info(f"Error transitorio en '{operation_name}', reintentando en {delay:.1f}s (intento {attempt + 1}/{retry_policy.max_attempts})...")
+    if cancel_token:
+        if cancel_token.wait(delay):
+            raise GitCancelledError(f"Operación '{operation_name}' cancelada durante la espera de reintento.")
     else:
-        logger.error(f"Fallo al añadir '{path}' a directorios seguros. Error: {stderr}")
+        time.sleep(delay)
+
+# Operaciones con '--autostash' nativo: git solo guarda los cambios si el árbol está sucio.
+AUTOSTASH_OPERATIONS = ("pull",)
+# Operaciones sin '--autostash': se guardan los cambios con 'git stash' solo si el árbol está sucio.
+STASH_OPERATIONS = ("checkout", "switch")
+# '--autostash' no guarda los ficheros sin seguimiento y la caché de árbol limpio no los ve: si git se
+# niega a pisarlos, la operación se repite una vez guardándolo todo con 'git stash --include-untracked'.
+_OVERWRITE_MARKERS = ("would be overwritten by", "would be removed by")
+
+def blocked_by_local_files(output):
+    """True si git rechazó la operación para no sobrescribir cambios locales o ficheros sin seguimiento."""
+    return any(marker in output for marker in _OVERWRITE_MARKERS)
+
+# Árboles vistos limpios por última vez, con la firma (stat de index y HEAD) de ese momento.
+_clean_tree_cache = {}
+_clean_tree_lock = threading.Lock()
+
+def _tree_signature(local_path):
+    dirs = git_metadata.find_git_dirs(local_path)
+    if not dirs:
+        return None
+    signature = []
+    for name in ("index", "HEAD"):
+        try:
+            st = os.stat(os.path.join(dirs[0], name))
+            signature.append((st.st_mtime_ns, st.st_size, st.st_ino))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+def remember_tree_state(local_path, clean):
+    """Registra el resultado de un status reciente para que is_worktree_dirty pueda evitar otro proceso."""
+    key = os.path.normpath(local_path)
+    signature = _tree_signature(key) if clean else None
+    with _clean_tree_lock:
+        if signature is not None:
+            _clean_tree_cache[key] = signature
+        else:
+            _clean_tree_cache.pop(key, None)
+
+def _known_clean(key):
+    with _clean_tree_lock:
+        cached = _clean_tree_cache.get(key)
+    return cached is not None and cached == _tree_signature(key)
+
+DIRTY_CHECK_COMMAND = ["git", "status", "--porcelain", "-z", "--untracked-files=all"]
+
+def is_worktree_dirty(local_path, use_cache=True):
+    """
+    Indica si hay cambios sin confirmar (incluidos ficheros sin seguimiento).
+    Si el último status vio el árbol limpio y el index y HEAD no han cambiado desde entonces,
+    responde sin lanzar procesos. Una edición en sitio posterior puede pasar desapercibida,
+    lo que es inocuo aquí: checkout/switch conservan esos cambios o se niegan a sobrescribirlos.
+    """
+    key = os.path.normpath(local_path)
+    if use_cache and _known_clean(key):
         return False
+    return_code, stdout, _ = _run_cmd_bytes(DIRTY_CHECK_COMMAND, cwd=key)
+    dirty = return_code != 0 or bool(stdout)
+    remember_tree_state(key, not dirty)
+    return dirty
 
-def run_git_operation(project_path, operation_name, *git_args):
+def _with_autostash(git_command):
+    """Añade '--autostash' justo detrás del subcomando (['git', 'pull', ...])."""
+    if "--autostash" in git_command or "--no-autostash" in git_command:
+        return git_command
+    return git_command[:2] + ["--autostash"] + git_command[2:]
+
+def run_git_operation(project_path, operation_name, *git_args, timeout=None, cancel_token=None, retry_policy=None, on_progress=None):
     """
     Ejecuta una operación Git en un hilo seguro, con manejo de stash y dubious ownership.
     project_path: Ruta local del repositorio.
     operation_name: Nombre de la operación (ej. "pull", "clone", "checkout").
     git_args: Argumentos específicos del comando Git (ej. ["pull", "origin", "main"]).
+    timeout: segundos máximos por intento (None = sin límite).
+    cancel_token: CancellationToken para abortar la operación desde otro hilo.
+    retry_policy: RetryPolicy para errores de red transitorios (por defecto, sin reintentos).
+    on_progress: callback de git_progress.ProgressEvent (incluye '--progress' en git_args para que git lo emita sin terminal).
     """
     project_path = os.path.normpath(project_path)
+    retry_policy = retry_policy or NO_RETRY
+    on_progress = git_progress.bind_progress(on_progress, project_path, operation_name)
     
     # Para 'clone', el directorio final no existirá, pero sí su padre.
     if operation_name == "clone":
@@ -78,249 +468,600 @@ def run_git_operation(project_path, operation_name, *git_args):
             raise GitOperationError(f"El directorio '{project_path}' no existe para la operación '{operation_name}'.")
         current_cwd = project_path
         git_command = ["git"] + list(git_args)
+        if operation_name in AUTOSTASH_OPERATIONS:
+            git_command = _with_autostash(git_command)
 
-    max_retries = 2
-    for attempt in range(max_retries):
-        if attempt > 0:
-            logger.info(f"Reintentando operación Git '{operation_name}' (Intento {attempt}/{max_retries-1})...")
+    safe_directory_added = False
+    force_stash = False
+    attempt = 0
+    while True:
+        attempt += 1
+        if attempt > 1:
+            logger.info(f"Reintentando operación Git '{operation_name}' (Intento {attempt})...")
 
         stashed = False
-        if operation_name in ["pull", "checkout", "switch"] and os.path.isdir(os.path.join(project_path, ".git")):
+        if force_stash or (operation_name in STASH_OPERATIONS and is_git_repository(project_path) and is_worktree_dirty(project_path)):
             logger.info(f"Intentando guardar cambios locales (git stash) antes de '{operation_name}'...")
             stash_return_code, stash_stdout, stash_stderr = _run_cmd_with_output(["git", "stash", "save", "--include-untracked", "InstallerPro auto-stash"], cwd=project_path)
-            if stash_return_code == 0 or "No local changes to save" in stash_stdout: 
+            if stash_return_code == 0 and "No local changes to save" not in stash_stdout:
                 stashed = True
-                logger.info(f"Cambios locales guardados exitosamente o no había cambios para '{project_path}'.")
+                logger.info(f"Cambios locales guardados exitosamente para '{project_path}'.")
             else:
                 logger.warning(f"No se pudieron guardar los cambios locales para '{project_path}'. Salida: {stash_stdout} {stash_stderr}")
                 # Aquí podrías decidir si abortar o continuar. Por ahora, continuamos pero con advertencia.
 
-        return_code, stdout, stderr = _run_cmd_with_output(git_command, cwd=current_cwd)
+        timeout_error = None
+        try:
+            return_code, stdout, stderr = _run_cmd_with_output(git_command, cwd=current_cwd, timeout=timeout, cancel_token=cancel_token, on_progress=on_progress)
+        except GitTimeoutError as e:
+            timeout_error = e
+        finally:
+            # También restauramos el stash si el comando se canceló o superó el timeout.
+            if stashed:
+                logger.info("Intentando restaurar cambios locales guardados (git stash pop)...")
+                pop_return_code, pop_stdout, pop_stderr = _run_cmd_with_output(["git", "stash", "pop"], cwd=project_path)
+                if pop_return_code != 0 and "No stash entries found" not in pop_stdout:
+                    logger.warning(f"Fallo al restaurar cambios locales para '{project_path}'. Por favor, resuelve manualmente. Salida: {pop_stdout} {pop_stderr}")
+                else:
+                    logger.info(f"Cambios locales restaurados exitosamente para '{project_path}' o no había nada que restaurar.")
 
-        if stashed and os.path.isdir(os.path.join(project_path, ".git")):
-            logger.info("Intentando restaurar cambios locales guardados (git stash pop)...")
-            pop_return_code, pop_stdout, pop_stderr = _run_cmd_with_output(["git", "stash", "pop"], cwd=project_path)
-            if pop_return_code != 0 and "No stash entries found" not in pop_stdout:
-                logger.warning(f"Fallo al restaurar cambios locales para '{project_path}'. Por favor, resuelve manualmente. Salida: {pop_stdout} {pop_stderr}")
-            else:
-                logger.info(f"Cambios locales restaurados exitosamente para '{project_path}' o no había nada que restaurar.")
+        if timeout_error is not None:
+            logger.error(f"Operación Git '{operation_name}' superó el timeout de {timeout}s en '{project_path}'.")
+            if retry_policy.retry_on_timeout and attempt < retry_policy.max_attempts:
+                _wait_before_retry(attempt, retry_policy, cancel_token, operation_name)
+                continue
+            raise timeout_error
 
         if return_code != 0:
             full_error_output = f"stdout: {stdout}\nstderr: {stderr}"
             logger.error(f"Operación Git '{operation_name}' falló con código {return_code}. Detalles:\n{full_error_output}")
 
-            if "fatal: detected dubious ownership" in full_error_output:
+            if "fatal: detected dubious ownership" in full_error_output and not safe_directory_added:
                 if _add_safe_directory(project_path):
+                    safe_directory_added = True
                     logger.info(f"Directorio añadido a seguros, reintentando operación '{operation_name}'.")
                     continue # Reintentar la operación después de añadir el directorio seguro
                 else:
                     raise GitOperationError(f"Falló la operación Git '{operation_name}' y no se pudo añadir el directorio a la lista de seguros: {full_error_output}")
+            elif operation_name in AUTOSTASH_OPERATIONS + STASH_OPERATIONS and not force_stash and blocked_by_local_files(full_error_output):
+                logger.info(f"'{operation_name}' chocó con ficheros locales en '{project_path}'; se repite con 'git stash --include-untracked'.")
+                force_stash = True
+                continue
+            elif retry_policy.is_transient(full_error_output) and attempt < retry_policy.max_attempts:
+                _wait_before_retry(attempt, retry_policy, cancel_token, operation_name)
+                continue
             else:
                 raise GitOperationError(f"Falló la operación Git '{operation_name}': {full_error_output}")
         else:
             logger.info(f"Operación Git '{operation_name}' completada exitosamente en '{project_path}'.")
             return stdout
 
-    raise GitOperationError(f"La operación Git '{operation_name}' falló después de múltiples reintentos y correcciones.")
-
 # Funciones de alto nivel que project_manager.py usará
 # Las funciones que aún dependen de la consola se mantienen
-def clone_repository(repo_url, local_path, branch="main"):
-    # Esta operación sigue siendo más fácil con subprocess
-    return_code, stdout, stderr = _run_cmd_with_output(["git", "clone", "--branch", branch, repo_url, os.path.basename(local_path)], cwd=os.path.dirname(local_path))
+CLONE_FILTERS = ("blob:none", "tree:0")
+
+def clone_options_to_args(clone_options):
+    """
+    Traduce las opciones de clonado de un proyecto a argumentos de 'git clone'.
+    clone_options: {'depth': int, 'filter': "blob:none" | "tree:0", 'single_branch': bool}; todas opcionales.
+    """
+    clone_options = clone_options or {}
+    args = []
+    depth = clone_options.get('depth')
+    if depth:
+        if not str(depth).isdigit() or int(depth) < 1:
+            raise GitOperationError(f"Invalid clone depth: {depth!r}")
+        args += ["--depth", str(int(depth))]
+    clone_filter = clone_options.get('filter')
+    if clone_filter:
+        if clone_filter not in CLONE_FILTERS:
+            raise GitOperationError(f"Unsupported clone filter: {clone_filter!r} (expected one of {', '.join(CLONE_FILTERS)})")
+        args.append(f"--filter={clone_filter}")
+    single_branch = clone_options.get('single_branch')
+    if single_branch:
+        args.append("--single-branch")
+    elif single_branch is False and depth:
+        # --depth implica --single-branch salvo que se pida lo contrario
+        args.append("--no-single-branch")
+    return args
+
+def clone_repository(repo_url, local_path, branch="main", timeout=None, cancel_token=None, on_progress=None, clone_options=None, reference=None, dissociate=False, sparse=False):
+    """
+    Clona repo_url en local_path. reference: repositorio local (p. ej. un mirror de mirror_cache)
+    del que tomar los objetos vía alternates; con dissociate=True se copian y el clon queda independiente.
+    sparse=True deja el checkout inicial en los ficheros de la raíz ('--sparse'), a la espera de 'sparse-checkout set'.
+    """
+    progress_args = ["--progress"] if on_progress else []
+    option_args = clone_options_to_args(clone_options) + (["--sparse"] if sparse else [])
+    if reference:
+        option_args += ["--reference-if-able", reference] + (["--dissociate"] if dissociate else [])
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    on_progress = git_progress.bind_progress(on_progress, os.path.normpath(local_path), "clone")
+    return_code, stdout, stderr = _run_cmd_with_output(["git", "clone", *progress_args, *option_args, "--branch", branch, repo_url, os.path.basename(local_path)], cwd=os.path.dirname(local_path), timeout=timeout, cancel_token=cancel_token, on_progress=on_progress)
     if return_code != 0: raise GitOperationError(f"Failed to clone repository. Error: {stderr}")
     return stdout
 
-def pull_repository(local_path, branch="main"):
-    return_code, stdout, stderr = _run_cmd_with_output(["git", "pull", "origin", branch], cwd=local_path)
-    if return_code != 0: raise GitOperationError(f"Failed to pull repository. Error: {stderr}")
-    return stdout
+def hydrate_repository(local_path, remote="origin", timeout=None, cancel_token=None, on_progress=None):
+    """
+    Convierte un clon superficial, parcial o de una sola rama en un clon completo:
+    recupera toda la historia (--unshallow), todos los objetos (--refetch sin filtro) y todas las ramas.
+    Devuelve la lista de pasos aplicados (vacía si el repositorio ya estaba completo).
+    """
+    shape = git_metadata.get_clone_shape(local_path, remote)
+    if shape is None:
+        raise GitOperationError(f"'{local_path}' is not a Git repository.")
+    progress_args = ["--progress"] if on_progress else ["--quiet"]
+    steps = []
+    if shape['single_branch']:
+        run_git_operation(local_path, "config", "config", "--replace-all", f"remote.{remote}.fetch", f"+refs/heads/*:refs/remotes/{remote}/*", timeout=timeout, cancel_token=cancel_token)
+        steps.append("all_branches")
+    if shape['partial_filter']:
+        run_git_operation(local_path, "config", "config", "--unset-all", f"remote.{remote}.partialclonefilter", timeout=timeout, cancel_token=cancel_token)
+        run_git_operation(local_path, "fetch", "fetch", *progress_args, "--refetch", remote, timeout=timeout, cancel_token=cancel_token, on_progress=on_progress)
+        # Con todos los objetos en local el remoto deja de ser 'promisor': git ya no intentará pedirle
+        # objetos que falten ni tratará el repositorio como parcial.
+        promisor_keys = [f"remote.{remote}.promisor"]
+        if git_metadata.get_config_value(git_metadata.read_config(local_path), "extensions", None, "partialclone") == remote:
+            promisor_keys.append("extensions.partialClone")
+        for key in promisor_keys:
+            return_code, _stdout, stderr = _run_cmd_with_output(["git", "config", "--unset-all", key], cwd=local_path)
+            if return_code not in (0, 5):  # 5: la clave no existía
+                raise GitOperationError(f"Could not unset {key} in '{local_path}': {stderr}")
+        steps.append("refetch")
+    if shape['shallow']:
+        run_git_operation(local_path, "fetch", "fetch", *progress_args, "--unshallow", remote, timeout=timeout, cancel_token=cancel_token, on_progress=on_progress)
+        steps.append("unshallow")
+    elif shape['single_branch'] and not shape['partial_filter']:
+        run_git_operation(local_path, "fetch", "fetch", *progress_args, remote, timeout=timeout, cancel_token=cancel_token, on_progress=on_progress)
+    logger.info(f"Hydrated {local_path}: {', '.join(steps) or 'already complete'}")
+    return steps
+
+def add_worktree(local_path, worktree_path, branch, new_branch=False, start_point=None):
+    """
+    Crea un worktree de local_path en worktree_path con 'branch' (comparte objetos y refs con el repositorio).
+    Si la rama solo existe en un remoto, git crea la rama local con seguimiento. Con new_branch=True
+    se crea la rama desde start_point (por defecto HEAD).
+    """
+    if os.path.exists(worktree_path) and os.listdir(worktree_path):
+        raise GitOperationError(f"'{worktree_path}' already exists and is not empty.")
+    os.makedirs(os.path.dirname(os.path.abspath(worktree_path)), exist_ok=True)
+    if new_branch:
+        args = ["worktree", "add", "-b", branch, worktree_path] + ([start_point] if start_point else [])
+    else:
+        args = ["worktree", "add", worktree_path, branch]
+    return run_git_operation(local_path, "worktree", *args)
+
+def remove_worktree(local_path, worktree_path, force=False):
+    """Elimina un worktree (con force=True aunque tenga cambios) y limpia los registros huérfanos."""
+    if os.path.exists(worktree_path):
+        run_git_operation(local_path, "worktree", "worktree", "remove", *(["--force"] if force else []), worktree_path)
+    run_git_operation(local_path, "worktree", "worktree", "prune")
+
+def pull_repository(local_path, branch="main", timeout=None, cancel_token=None, on_progress=None):
+    """'git pull --autostash' (ver run_git_operation: si choca con ficheros sin seguimiento se guardan con stash -u)."""
+    progress_args = ["--progress"] if on_progress else []
+    return run_git_operation(local_path, "pull", "pull", *progress_args, "origin", branch, timeout=timeout, cancel_token=cancel_token, on_progress=on_progress)
     
-def push_repository(local_path):
-    return_code, stdout, stderr = _run_cmd_with_output(["git", "push"], cwd=local_path)
+def push_repository(local_path, timeout=None, cancel_token=None):
+    return_code, stdout, stderr = _run_cmd_with_output(["git", "push"], cwd=local_path, timeout=timeout, cancel_token=cancel_token)
     if return_code != 0: raise GitOperationError(f"Failed to push repository. Error: {stderr}")
     return stdout
 
-def stage_files(local_path, files_to_stage):
-    if not files_to_stage: return "No files to stage."
-    repo = git.Repo(local_path)
-    repo.index.add(files_to_stage)
-    logger.info(f"Staged files in {local_path}: {', '.join(files_to_stage)}")
-    return "Files staged successfully."
+def _run_cmd_bytes(command, cwd=None):
+    """
+    Ejecuta un comando y devuelve (código, stdout en bytes, stderr como texto).
+    Pensado para salidas con separador NUL (-z), que no deben partirse por líneas.
+    """
+    logger.debug(f"Ejecutando comando: {' '.join(command)} en {cwd or os.getcwd()}")
+    process = subprocess.run(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return process.returncode, process.stdout, process.stderr.decode('utf-8', errors='replace').strip()
 
-def commit_changes(local_path, commit_message):
-    if not commit_message.strip(): raise GitOperationError("Commit message cannot be empty.")
-    repo = git.Repo(local_path)
-    repo.index.commit(commit_message)
-    logger.info(f"Successfully committed in {local_path} with message: {commit_message}")
-    return "Commit successful."
+def _parse_porcelain_v2(raw_output):
+    """
+    Interpreta la salida de 'git status --porcelain=v2 --branch -z'.
+    Devuelve un diccionario con la rama, el upstream, ahead/behind y los contadores de cambios.
+    """
+    record = {
+        "oid": None, "branch": "N/A", "detached": False, "upstream": None,
+        "ahead": 0, "behind": 0, "staged": 0, "unstaged": 0, "untracked": 0, "conflicted": 0,
+    }
+    entries = raw_output.decode('utf-8', errors='surrogateescape').split('\0')
+    skip_next = False
+    for entry in entries:
+        if skip_next:
+            # En entradas de renombrado/copia (tipo 2) la ruta original va en un campo aparte.
+            skip_next = False
+            continue
+        if not entry:
+            continue
+        if entry.startswith("# branch.oid "):
+            oid = entry[len("# branch.oid "):]
+            record["oid"] = None if oid == "(initial)" else oid
+        elif entry.startswith("# branch.head "):
+            head = entry[len("# branch.head "):]
+            record["detached"] = head == "(detached)"
+            record["branch"] = "detached" if record["detached"] else head
+        elif entry.startswith("# branch.upstream "):
+            record["upstream"] = entry[len("# branch.upstream "):]
+        elif entry.startswith("# branch.ab "):
+            ahead, behind = entry[len("# branch.ab "):].split()
+            record["ahead"] = int(ahead[1:]) if ahead[1:].isdigit() else 0
+            record["behind"] = int(behind[1:]) if behind[1:].isdigit() else 0
+        elif entry[0] in "12":
+            xy = entry[2:4]
+            if xy[0] != ".": record["staged"] += 1
+            if xy[1] != ".": record["unstaged"] += 1
+            skip_next = entry[0] == "2"
+        elif entry[0] == "u":
+            record["conflicted"] += 1
+        elif entry[0] == "?":
+            record["untracked"] += 1
+    return record
+
+def _classify_status(record):
+    """Traduce un registro de estado a la clave estandarizada que usa la UI."""
+    if record["staged"] or record["unstaged"] or record["untracked"] or record["conflicted"]:
+        return "modified"
+    if record["ahead"]:
+        return "local_commits"
+    if record["behind"]:
+        return "needs_pull"
+    return "clean"
 
-# Dentro de git_operations.py
+# Caché de ahead/behind indexada por (sha local, sha upstream). El grafo de commits es inmutable,
+# así que el resultado de un par nunca cambia y sirve para cualquier clon o worktree.
+_AHEAD_BEHIND_CACHE_SIZE = 4096
+_ahead_behind_cache = collections.OrderedDict()
+_ahead_behind_lock = threading.Lock()
 
-def get_repo_status(local_path):
+def get_ahead_behind(local_path, local_sha=None, upstream_sha=None):
     """
-    Analiza el estado del repositorio y devuelve una clave estandarizada.
-    Ej: "clean", "modified", "local_commits", "needs_pull", "unknown"
+    Devuelve (ahead, behind) de la rama actual respecto a su upstream configurado
+    (branch.<rama>.remote/merge), no respecto a un 'origin/main' fijo.
+    Usa 'git rev-list --left-right --count', que aprovecha el commit-graph si existe,
+    y memoriza el resultado por par de commits: un repositorio sin cambios no lanza ningún proceso.
+    Devuelve (0, 0) si no hay upstream o no se puede calcular.
     """
+    if local_sha is None or upstream_sha is None:
+        metadata = git_metadata.read_repo_metadata(local_path) or {}
+        local_sha = local_sha or metadata.get("head_sha")
+        upstream_sha = upstream_sha or metadata.get("upstream_sha")
+    if not local_sha or not upstream_sha:
+        return 0, 0
+    if local_sha == upstream_sha:
+        return 0, 0
+
+    key = (local_sha, upstream_sha)
+    with _ahead_behind_lock:
+        if key in _ahead_behind_cache:
+            _ahead_behind_cache.move_to_end(key)
+            return _ahead_behind_cache[key]
+
+    return_code, stdout, stderr = _run_cmd_with_output(["git", "rev-list", "--left-right", "--count", f"{local_sha}...{upstream_sha}"], cwd=local_path)
     try:
-        # Obtenemos la salida de 'git status --porcelain --branch'
-        stdout = run_git_operation(local_path, "status", "status", "--porcelain", "--branch")
+        ahead, behind = (int(n) for n in stdout.split())
+    except ValueError:
+        logger.warning(f"Could not compute ahead/behind for {local_path}: {stderr}")
+        return 0, 0
+    if return_code != 0:
+        return 0, 0
 
-        lines = stdout.strip().split('\n')
+    with _ahead_behind_lock:
+        _ahead_behind_cache[key] = (ahead, behind)
+        if len(_ahead_behind_cache) > _AHEAD_BEHIND_CACHE_SIZE:
+            _ahead_behind_cache.popitem(last=False)
+    return ahead, behind
 
-        if not lines or not lines[0]:
-            return "unknown"
+def fetch_remote(local_path, remote="origin", timeout=DEFAULT_FETCH_TIMEOUT, cancel_token=None, retry_policy=NETWORK_RETRY_POLICY, on_progress=None):
+    """
+    Descarga los cambios del remoto. Devuelve True si el fetch terminó bien.
+    Nunca bloquea más de 'timeout' segundos por intento; los errores de red transitorios se reintentan.
+    """
+    verbosity = "--progress" if on_progress else "--quiet"
+    try:
+        run_git_operation(local_path, "fetch", "fetch", verbosity, remote, timeout=timeout, cancel_token=cancel_token, retry_policy=retry_policy, on_progress=on_progress)
+        return True
+    except GitCancelledError:
+        raise
+    except GitOperationError as e:
+        logger.warning(f"Fetch of '{remote}' failed for {local_path}: {e}")
+        return False
 
-        branch_line = lines[0]
-        status_lines = lines[1:]
+def collect_repo_status(local_path, fetch=False, cancel_token=None, force_fetch=False):
+    """
+    Recolecta en una sola pasada rama, upstream, ahead/behind, contadores de cambios y URL remota.
+    Usa un único 'git status --porcelain=v2 --branch -z' más lecturas directas de .git (config y refs).
+    Si fetch=True, antes descarga los cambios de 'origin' (solo si existe ese remoto) a través del
+    FetchScheduler, que omite el fetch si el último es más reciente que su TTL (salvo force_fetch).
+    'fetched_at' indica a qué momento corresponde la información remota (ahead/behind).
+    """
+    from installerpro.utils import fetch_scheduler
 
-        # Analizar el estado de la rama (si está adelantado o atrasado)
-        if '...' in branch_line:
-            if 'ahead' in branch_line:
-                return "local_commits"
-            if 'behind' in branch_line:
-                return "needs_pull"
+    if not is_git_repository(local_path):
+        return {"status": "missing_not_a_repo", "branch": "N/A", "repo_url": "N/A"}
 
-        # Analizar si hay archivos modificados, nuevos, etc.
-        if any(line.strip() for line in status_lines):
-            return "modified"
+    remote_url = git_metadata.get_remote_url(local_path)
+    scheduler = fetch_scheduler.get_scheduler()
+    if fetch and remote_url != "no_remote":
+        scheduler.fetch(local_path, force=force_fetch, cancel_token=cancel_token)
 
-        # Si no hay nada de lo anterior, el repositorio está limpio
-        return "clean"
-    except GitOperationError:
-        # Si la operación de git falla, el estado es desconocido
-        return "unknown"
+    # --no-ahead-behind evita que status recorra el historial en cada llamada;
+    # ahead/behind se obtiene de get_ahead_behind, memorizado por par de commits.
+    return_code, stdout, stderr = _run_cmd_bytes(["git", "status", "--porcelain=v2", "--branch", "--no-ahead-behind", "-z"], cwd=local_path)
+    if return_code != 0:
+        logger.error(f"Error getting repo status for {local_path}: {stderr}")
+        return {"status": "unknown", "branch": "N/A", "repo_url": remote_url, "error": stderr}
 
-def is_git_repository(path):
-    return os.path.isdir(os.path.join(path, ".git"))
+    record = _parse_porcelain_v2(stdout)
+    if record["upstream"] and record["oid"]:
+        metadata = git_metadata.read_repo_metadata(local_path) or {}
+        record["ahead"], record["behind"] = get_ahead_behind(local_path, record["oid"], metadata.get("upstream_sha"))
+    record["repo_url"] = remote_url
+    record["fetched_at"] = scheduler.status_as_of(local_path)
+    record["status"] = _classify_status(record)
+    remember_tree_state(local_path, not (record["staged"] or record["unstaged"] or record["untracked"] or record["conflicted"]))
+    return record
 
-def get_repo_current_branch(local_path):
-    """Obtiene la rama actual del repositorio con logging detallado."""
-    try:
-        repo = git.Repo(local_path)
-        branch_name = repo.active_branch.name
-        logger.info(f"GitPython: Branch for {local_path} is '{branch_name}'")
-        return branch_name
-    except TypeError:
-        logger.warning(f"GitPython: Detached HEAD detected for {local_path}")
-        return "detached"
-    except Exception as e:
-        logger.error(f"GitPython: Could not get branch for {local_path}. ERROR: {e}")
-        return "N/A"
+def get_repo_status(local_path, fetch=True):
+    """
+    Analiza el estado del repositorio y devuelve una clave estandarizada (ej. "clean", "modified").
+    El fetch previo respeta el TTL del FetchScheduler; usa fetch=False para un estado solo local.
+    """
+    return collect_repo_status(local_path, fetch=fetch)["status"]
 
-def get_repo_remote_url(local_path):
-    """Obtiene la URL del remoto 'origin' con logging detallado."""
-    try:
-        repo = git.Repo(local_path)
-        if 'origin' in repo.remotes:
-            remote_url = repo.remotes.origin.url
-            logger.info(f"GitPython: Remote URL for {local_path} is '{remote_url}'")
-            return remote_url
-        else:
-            logger.warning(f"GitPython: No remote named 'origin' found for {local_path}")
-            return "no_remote"
-    except Exception as e:
-        logger.error(f"GitPython: Could not get remote URL for {local_path}. ERROR: {e}")
-        return "N/A"
-
-def get_repo_status(local_path):
-    """Analiza el estado del repositorio usando GitPython."""
+_CHANGE_TYPES = {'M': 'modified', 'T': 'modified', 'A': 'added', 'D': 'deleted', 'R': 'renamed', 'C': 'copied', 'U': 'unmerged'}
+
+def _changed_file_entry(record, orig_path=None):
+    """Traduce una entrada de 'status --porcelain=v2' (tipos 1, 2, u y ?) al diccionario de la UI."""
+    kind = record[0]
+    if kind == "?":
+        path = record[2:]
+        return {'status': 'untracked', 'path': path, 'staged': False, 'is_dir': path.endswith('/')}
+    if kind == "u":
+        path = record.split(" ", 10)[10]
+        return {'status': 'unmerged', 'path': path, 'staged': False, 'is_dir': False}
+    fields = record.split(" ", 9 if kind == "2" else 8)
+    xy, path = fields[1], fields[-1]
+    # Un renombrado/copia en el índice manda; si no, el cambio del árbol de trabajo y después el del índice.
+    code = xy[0] if xy[0] in "RC" else (xy[1] if xy[1] != "." else xy[0])
+    entry = {'status': _CHANGE_TYPES.get(code, 'modified'), 'path': path, 'staged': xy[0] != ".", 'is_dir': False}
+    if orig_path is not None:
+        entry['orig_path'] = orig_path
+    return entry
+
+def iter_changed_files(local_path, pathspecs=None, untracked="normal", chunk_size=65536):
+    """
+    Generador de ficheros cambiados a partir de 'git status --porcelain=v2 -z', leído por bloques:
+    la memoria no depende del tamaño del changeset. Los ficheros ignorados no aparecen.
+    untracked="normal" agrupa los directorios sin seguimiento en una sola entrada "dir/" (is_dir=True);
+    para desplegar uno, llama de nuevo con pathspecs=["dir/"] y untracked="all".
+    Cerrar el generador antes de tiempo termina el proceso git.
+    """
+    command = ["git", "status", "--porcelain=v2", "-z", f"--untracked-files={untracked}"]
+    if pathspecs:
+        command += ["--", *pathspecs]
+    logger.debug(f"Ejecutando comando: {' '.join(command)} en {local_path}")
+    process = subprocess.Popen(command, cwd=local_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **_popen_group_kwargs())
+    finished = False
     try:
-        repo = git.Repo(local_path)
-        if repo.is_dirty(untracked_files=True):
-            return "modified"
-        
-        # Comprobar commits locales vs remotos
-        repo.remotes.origin.fetch()
-        commits_ahead = repo.iter_commits('origin/main..main')
-        commits_behind = repo.iter_commits('main..origin/main')
-        
-        if sum(1 for c in commits_ahead):
-            return "local_commits"
-        if sum(1 for c in commits_behind):
-            return "needs_pull"
-
-        return "clean"
-    except (git.exc.InvalidGitRepositoryError, git.exc.NoSuchPathError):
-        return "missing_not_a_repo"
-    except Exception as e:
-        logger.error(f"Error getting repo status for {local_path}: {e}")
-        return "unknown"
+        buffer, pending_rename = b"", None
+        for chunk in iter(lambda: process.stdout.read1(chunk_size), b""):
+            *fields, buffer = (buffer + chunk).split(b"\0")
+            for field in fields:
+                text = field.decode('utf-8', errors='surrogateescape')
+                if pending_rename is not None:
+                    # En renombrados/copias (tipo 2) la ruta original llega en el campo siguiente.
+                    yield _changed_file_entry(pending_rename, orig_path=text)
+                    pending_rename = None
+                elif not text or text[0] not in "12u?":
+                    continue
+                elif text[0] == "2":
+                    pending_rename = text
+                else:
+                    yield _changed_file_entry(text)
+        finished = True
+    finally:
+        if not finished and process.poll() is None:
+            _kill_process_tree(process)
+        process.stdout.close()
+        stderr = process.stderr.read().decode('utf-8', errors='replace').strip()
+        process.stderr.close()
+        return_code = process.wait()
+    if return_code != 0:
+        raise GitOperationError(f"git status failed for '{local_path}': {stderr}")
+
+class ChangedFilesPager:
+    """
+    Entrega los ficheros cambiados de un repositorio por páginas, manteniendo abierto un único
+    'git status' entre página y página. Llama a close() (o usa 'with') al dejar de paginar.
+    """
+
+    def __init__(self, local_path, page_size=500, pathspecs=None, untracked="normal"):
+        self.page_size = page_size
+        self.loaded = 0
+        self._iterator = iter_changed_files(local_path, pathspecs=pathspecs, untracked=untracked)
+        self._lookahead = None
+        self.has_more = self._advance()
+
+    def _advance(self):
+        try:
+            self._lookahead = next(self._iterator)
+            return True
+        except StopIteration:
+            self._lookahead = None
+            return False
+
+    def next_page(self):
+        page = []
+        while self.has_more and len(page) < self.page_size:
+            page.append(self._lookahead)
+            self.has_more = self._advance()
+        self.loaded += len(page)
+        return page
+
+    def close(self):
+        self._iterator.close()
+        self.has_more = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
 def get_changed_files(local_path):
     """
-    Obtiene una lista de archivos con cambios, respetando las reglas de .gitignore.
+    Obtiene una lista de archivos con cambios (índice y árbol de trabajo), respetando .gitignore.
+    Para repositorios con muchos cambios usa iter_changed_files o ChangedFilesPager.
     """
     try:
-        repo = git.Repo(local_path)
-        changed_files = []
-
-        # Obtenemos todos los diffs (modificados, eliminados, renombrados, etc.)
-        all_diffs = repo.index.diff(None)
-        
-        # Obtenemos los archivos no rastreados
-        untracked_files_list = repo.untracked_files
-
-        # Combinamos y procesamos todas las rutas de archivo
-        all_paths_to_check = [diff.a_path for diff in all_diffs] + untracked_files_list
-        
-        # --- ¡LA MAGIA OCURRE AQUÍ! ---
-        # GitPython nos da una lista de archivos ignorados.
-        # Usamos 'set' para una comprobación más rápida.
-        ignored_files = set(repo.ignored(all_paths_to_check))
-        
-        # Ahora construimos la lista final, solo con los archivos NO ignorados.
-        
-        # Archivos modificados/eliminados/etc.
-        for diff_item in all_diffs:
-            if diff_item.a_path not in ignored_files:
-                # Determinamos el tipo de cambio
-                change_type_map = {'A': 'added', 'D': 'deleted', 'R': 'renamed', 'M': 'modified', 'T': 'modified'}
-                status_keyword = change_type_map.get(diff_item.change_type, 'modified')
-                changed_files.append({'status': status_keyword, 'path': diff_item.a_path})
-
-        # Archivos no rastreados
-        for untracked_file in untracked_files_list:
-             if untracked_file not in ignored_files:
-                changed_files.append({'status': 'untracked', 'path': untracked_file})
-
-        logger.info(f"GitPython found {len(changed_files)} relevant changed files (after .gitignore filter).")
+        changed_files = list(iter_changed_files(local_path))
+        logger.info(f"Found {len(changed_files)} relevant changed files (after .gitignore filter).")
         return changed_files
-    except Exception as e:
-        logger.error(f"Error getting changed files with GitPython for {local_path}: {e}", exc_info=True)
+    except (GitOperationError, OSError) as e:
+        logger.error(f"Error getting changed files for {local_path}: {e}")
         return []
 
 def is_git_repository(path):
-    return os.path.isdir(os.path.join(path, ".git"))
+    """True si 'path' tiene un directorio .git o un fichero 'gitdir:' (worktrees, submódulos)."""
+    return git_metadata.find_git_dirs(path) is not None
 
 def get_repo_current_branch(local_path):
-    try:
-        return git.Repo(local_path).active_branch.name
-    except Exception: return "N/A"
+    """Obtiene la rama actual leyendo .git/HEAD directamente ("detached" o "N/A" si no aplica)."""
+    return git_metadata.get_current_branch(local_path)
 
 def get_repo_remote_url(local_path):
-    try:
-        return git.Repo(local_path).remotes.origin.url
-    except Exception: return "N/A"
+    """Obtiene la URL del remoto 'origin' leyendo el fichero de configuración del repositorio."""
+    return git_metadata.get_remote_url(local_path)
+
+# Rutas por llamada a git al (des)preparar ficheros; cada lote reescribe el índice una vez.
+STAGE_CHUNK_SIZE = 5000
+
+def _run_cmd_stdin(command, cwd, input_bytes):
+    """Ejecuta un comando pasándole input_bytes por stdin. Devuelve (código, stdout, stderr) como texto."""
+    logger.debug(f"Ejecutando comando: {' '.join(command)} en {cwd} ({len(input_bytes)} bytes por stdin)")
+    process = subprocess.run(command, cwd=cwd, input=input_bytes, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    decode = lambda data: data.decode('utf-8', errors='replace').strip()
+    return process.returncode, decode(process.stdout), decode(process.stderr)
+
+def _report_paths_progress(on_progress, local_path, operation, phase, current, total):
+    if on_progress:
+        on_progress(git_progress.ProgressEvent(
+            local_path=os.path.normpath(local_path), operation=operation, phase=phase,
+            percent=100 * current // total if total else 100, current=current, total=total,
+            bytes_done=None, throughput=None, done=current >= total,
+        ))
+
+def _apply_pathspecs_in_chunks(local_path, git_args, paths, operation, phase, on_progress, chunk_size):
+    """
+    Ejecuta 'git <git_args> --pathspec-from-file=- --pathspec-file-nul' por lotes de chunk_size rutas,
+    enviadas por stdin separadas por NUL: sin límite de longitud de argv ni problemas con nombres raros.
+    Las rutas se tratan literalmente (--literal-pathspecs), como tras un '--'.
+    """
+    total = len(paths)
+    for start in range(0, total, chunk_size):
+        chunk = paths[start:start + chunk_size]
+        command = ["git", "--literal-pathspecs", *git_args, "--pathspec-from-file=-", "--pathspec-file-nul"]
+        return_code, _stdout, stderr = _run_cmd_stdin(command, local_path, "\0".join(chunk).encode('utf-8', errors='surrogateescape'))
+        if return_code != 0:
+            raise GitOperationError(f"Failed to {operation} files. Error: {stderr}")
+        _report_paths_progress(on_progress, local_path, operation, phase, start + len(chunk), total)
+
+def _stage_files_gitpython(local_path, files_to_stage, on_progress, chunk_size):
+    # Se acumulan los lotes en memoria y el índice se escribe una sola vez al final.
+    index = git.Repo(local_path).index
+    total = len(files_to_stage)
+    for start in range(0, total, chunk_size):
+        chunk = files_to_stage[start:start + chunk_size]
+        existing = [f for f in chunk if os.path.lexists(os.path.join(local_path, f))]
+        removed = [f for f in chunk if not os.path.lexists(os.path.join(local_path, f))]
+        if existing: index.add(existing, write=False)
+        # index.remove() pasa por 'git rm' y relee el índice de disco: las bajas se aplican en memoria.
+        for path in removed: index.entries.pop((path.replace(os.sep, "/"), 0), None)
+        _report_paths_progress(on_progress, local_path, "stage", "Staging files", start + len(chunk), total)
+    index.write()
 
-def stage_files(local_path, files_to_stage):
+def stage_files(local_path, files_to_stage, on_progress=None, chunk_size=STAGE_CHUNK_SIZE, backend="cli"):
     """
     Añade una lista de archivos al staging area de Git.
+    on_progress recibe git_progress.ProgressEvent (operation "stage") tras cada lote.
+    backend="gitpython" usa el índice de GitPython escribiéndolo una única vez.
     """
     if not files_to_stage:
         logger.warning("No files provided to stage.")
         return "No files to stage."
+    files_to_stage = list(files_to_stage)
+    if backend == "gitpython":
+        _stage_files_gitpython(local_path, files_to_stage, on_progress, chunk_size)
+    else:
+        _apply_pathspecs_in_chunks(local_path, ["add", "--all"], files_to_stage, "stage", "Staging files", on_progress, chunk_size)
+    logger.info(f"Staged {len(files_to_stage)} files in {local_path}.")
+    return "Files staged successfully."
 
-    # El comando 'git add --' es una forma segura de manejar nombres de archivo que podrían
-    # parecerse a opciones de línea de comandos.
-    command = ["git", "add", "--"] + files_to_stage
-    return_code, stdout, stderr = _run_cmd_with_output(command, cwd=local_path)
+def _has_head(local_path):
+    """False en una rama recién creada sin commits (HEAD apunta a una rama que aún no existe)."""
+    dirs = git_metadata.find_git_dirs(local_path)
+    if not dirs:
+        return False
+    kind, value = git_metadata.read_head(dirs[0])
+    return kind == "detached" or (kind == "ref" and git_metadata.read_ref(dirs[0], dirs[1], value) is not None)
+
+def unstage_files(local_path, files_to_unstage, on_progress=None, chunk_size=STAGE_CHUNK_SIZE):
+    """
+    Saca ficheros del staging area (sin tocar el árbol de trabajo), por lotes y vía stdin.
+    Sin ningún commit todavía no hay HEAD al que volver con 'reset': se usa 'rm --cached'.
+    """
+    if not files_to_unstage:
+        return "No files to unstage."
+    files_to_unstage = list(files_to_unstage)
+    git_args = ["reset", "-q"] if _has_head(local_path) else ["rm", "--cached", "-r", "-q", "--ignore-unmatch"]
+    _apply_pathspecs_in_chunks(local_path, git_args, files_to_unstage, "unstage", "Unstaging files", on_progress, chunk_size)
+    logger.info(f"Unstaged {len(files_to_unstage)} files in {local_path}.")
+    return "Files unstaged successfully."
 
+def get_staged_changes(local_path):
+    """
+    Cambios preparados en el índice respecto a HEAD (o todo el índice si aún no hay commits), incluidos
+    los que no se han mostrado al usuario. Lista de (ruta, ruta_original); ruta_original solo en renombrados.
+    """
+    return_code, stdout, stderr = _run_cmd_bytes(["git", "diff", "--cached", "--name-status", "-z", "-M"], cwd=local_path)
     if return_code != 0:
-        raise GitOperationError(f"Failed to stage files. Error: {stderr}")
+        raise GitOperationError(f"Could not list staged files in {local_path}: {stderr}")
+    tokens = [token.decode('utf-8', errors='surrogateescape') for token in stdout.split(b"\0")]
+    changes, i = [], 0
+    while i < len(tokens) and tokens[i]:
+        status = tokens[i]
+        if status[0] in "RC":
+            changes.append((tokens[i + 2], tokens[i + 1]))
+            i += 3
+        else:
+            changes.append((tokens[i + 1], None))
+            i += 2
+    return changes
 
-    logger.info(f"Staged files in {local_path}: {', '.join(files_to_stage)}")
-    return "Files staged successfully."
+def unstage_unselected(local_path, selected_paths, on_progress=None):
+    """
+    Deja en el índice solo los cambios de selected_paths (ficheros o directorios 'dir/'): saca lo demás
+    que estuviera preparado. Un renombrado se conserva si está elegida cualquiera de sus dos rutas.
+    Devuelve las rutas sacadas del índice.
+    """
+    selected = {path.replace(os.sep, "/") for path in selected_paths}
+
+    def is_selected(path):
+        while path:
+            if path in selected or f"{path}/" in selected:
+                return True
+            path = path.rpartition("/")[0]
+        return False
+
+    unselected = []
+    for path, orig_path in get_staged_changes(local_path):
+        if not is_selected(path) and not (orig_path and is_selected(orig_path)):
+            unselected += [path] + ([orig_path] if orig_path else [])
+    if unselected:
+        logger.info(f"Unstaging {len(unselected)} staged files not selected for the commit in {local_path}.")
+        unstage_files(local_path, unselected, on_progress=on_progress)
+    return unselected
 
 def commit_changes(local_path, commit_message):
     """
@@ -0,0 +1,148 @@
+# installerpro/utils/git_progress.py
+"""
+Interpretación de la salida '--progress' de git (clone, fetch, pull).
+Convierte líneas como "Receiving objects:  45% (450/1000), 1.20 MiB | 2.40 MiB/s"
+en eventos estructurados que la UI Tk o una CLI pueden pintar en vivo.
+"""
+import re
+import queue
+import threading
+from collections import namedtuple
+
+# local_path y operation los rellena quien lanza el comando; el resto sale de la línea de git.
+ProgressEvent = namedtuple(
+    "ProgressEvent",
+    "local_path operation phase percent current total bytes_done throughput done",
+)
+
+_UNITS = {"bytes": 1, "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3, "TiB": 1024 ** 4}
+
+_PROGRESS_RE = re.compile(
+    r"^(?:remote:\s*)?(?P<phase>[A-Z][A-Za-z ]*?):\s+"
+    r"(?:(?P<percent>\d+)%\s+\((?P<current>\d+)/(?P<total>\d+)\)|(?P<count>\d+))"
+    r"(?:,\s+(?P<size>[\d.]+)\s+(?P<size_unit>bytes|[KMGT]iB))?"
+    r"(?:\s+\|\s+(?P<rate>[\d.]+)\s+(?P<rate_unit>bytes|[KMGT]iB)/s)?"
+    r"(?P<done>,\s+done\.?)?"
+)
+
+# git separa las actualizaciones de progreso con '\r' y las líneas normales con '\n'
+_RECORD_SEPARATOR = re.compile(rb"\r\n|\r|\n")
+
+def split_records(buffer):
+    """Separa un bloque de bytes en registros completos. Devuelve (registros, resto sin terminar)."""
+    *records, rest = _RECORD_SEPARATOR.split(buffer)
+    return [r.decode('utf-8', errors='replace').strip() for r in records if r.strip()], rest
+
+def iter_pipe_records(pipe, chunk_size=65536):
+    """Lee un pipe binario y entrega cada registro de texto en cuanto está completo."""
+    read = getattr(pipe, "read1", pipe.read)
+    buffer = b""
+    for chunk in iter(lambda: read(chunk_size), b""):
+        records, buffer = split_records(buffer + chunk)
+        yield from records
+    if buffer.strip():
+        yield buffer.decode('utf-8', errors='replace').strip()
+
+def _to_bytes(value, unit):
+    return int(float(value) * _UNITS[unit]) if value else None
+
+def parse_progress_line(line, local_path=None, operation=None):
+    """Devuelve un ProgressEvent si la línea es de progreso de git, o None en caso contrario."""
+    match = _PROGRESS_RE.match(line)
+    if not match:
+        return None
+    groups = match.groupdict()
+    if groups["percent"] is not None:
+        percent, current, total = int(groups["percent"]), int(groups["current"]), int(groups["total"])
+    else:
+        percent, current, total = None, int(groups["count"]), None
+    return ProgressEvent(
+        local_path=local_path, operation=operation, phase=groups["phase"].strip(),
+        percent=percent, current=current, total=total,
+        bytes_done=_to_bytes(groups["size"], groups["size_unit"]),
+        throughput=_to_bytes(groups["rate"], groups["rate_unit"]),
+        done=groups["done"] is not None,
+    )
+
+def bind_progress(on_progress, local_path, operation):
+    """Envuelve un callback para que los eventos lleguen con la ruta y la operación ya rellenas."""
+    if on_progress is None:
+        return None
+    return lambda event: on_progress(event._replace(local_path=local_path, operation=operation))
+
+def format_bytes(value):
+    value = float(value or 0)
+    for unit in ("bytes", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            return f"{value:.0f} {unit}" if unit == "bytes" else f"{value:.1f} {unit}"
+        value /= 1024
+
+def format_event(event):
+    """Texto corto para mostrar un evento, p. ej. "Receiving objects 45% (450/1000), 1.2 MiB | 2.4 MiB/s"."""
+    text = event.phase
+    if event.percent is not None:
+        text += f" {event.percent}% ({event.current}/{event.total})"
+    else:
+        text += f" {event.current}"
+    if event.bytes_done is not None:
+        text += f", {format_bytes(event.bytes_done)}"
+    if event.throughput is not None:
+        text += f" | {format_bytes(event.throughput)}/s"
+    return text + (", done" if event.done else "")
+
+class ProgressTracker:
+    """
+    Último evento de progreso por repositorio, seguro entre hilos. Se puede pasar directamente
+    como on_progress; la UI consulta snapshot() periódicamente en lugar de recibir cada evento.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest = {}
+
+    def __call__(self, event):
+        self.update(event)
+
+    def update(self, event):
+        with self._lock:
+            self._latest[event.local_path] = event
+
+    def finish(self, local_path):
+        with self._lock:
+            self._latest.pop(local_path, None)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._latest)
+
+    def aggregate_throughput(self):
+        """Suma de la velocidad de descarga (bytes/s) de las transferencias en curso."""
+        with self._lock:
+            return sum(e.throughput or 0 for e in self._latest.values() if not e.done)
+
+def iter_progress(operation, *args, **kwargs):
+    """
+    Ejecuta operation(*args, on_progress=..., **kwargs) en un hilo y entrega sus ProgressEvent
+    a medida que llegan (útil para una CLI). Si la operación falla, la excepción se relanza al final.
+    """
+    events = queue.Queue()
+    finished = object()
+    outcome = {}
+
+    def runner():
+        try:
+            outcome["result"] = operation(*args, on_progress=events.put, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            events.put(finished)
+
+    threading.Thread(target=runner, name="git-progress", daemon=True).start()
+    while True:
+        event = events.get()
+        if event is finished:
+            break
+        yield event
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
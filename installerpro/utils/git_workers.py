@@ -0,0 +1,239 @@
+# installerpro/utils/git_workers.py
+"""
+Procesos git persistentes por repositorio para consultas de solo lectura.
+Un 'git cat-file --batch' / '--batch-check' se reutiliza entre llamadas y se cierra
+tras un periodo de inactividad, evitando un fork/exec y dos hilos por consulta.
+Cada consulta tiene un plazo: si el proceso no responde a tiempo (p. ej. porque está descargando
+un objeto de un remoto promisor), el hilo de limpieza lo mata y la consulta falla en vez de colgarse.
+"""
+import os
+import logging
+import subprocess
+import threading
+import time
+import atexit
+
+from installerpro.utils import git_metadata
+from installerpro.utils.git_operations import GitOperationError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IDLE_TIMEOUT = 60.0
+DEFAULT_REQUEST_TIMEOUT = 30.0
+
+class _BatchWorker:
+    """Un proceso 'git cat-file --batch' o '--batch-check' atado a un repositorio."""
+
+    def __init__(self, repo_path, mode):
+        self.repo_path = repo_path
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.closed = False
+        self.deadline = None  # fin del plazo de la consulta en curso (monotonic), o None
+        self.expired = False
+        logger.debug(f"Starting git cat-file {mode} worker for {repo_path}")
+        self.process = subprocess.Popen(
+            ["git", "cat-file", mode], cwd=repo_path,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def request(self, object_name, timeout=DEFAULT_REQUEST_TIMEOUT):
+        """
+        Envía un nombre de objeto y devuelve (sha, tipo, tamaño, contenido).
+        contenido es None en modo --batch-check. Devuelve None si el objeto no existe.
+        Si no hay respuesta en 'timeout' segundos, kill_if_expired mata el proceso y se lanza GitOperationError.
+        """
+        if "\n" in object_name:
+            raise GitOperationError(f"Invalid object name: {object_name!r}")
+        with self.lock:
+            self.last_used = time.monotonic()
+            self.deadline = self.last_used + timeout if timeout else None
+            try:
+                return self._exchange(object_name)
+            except GitOperationError:
+                if self.expired:
+                    raise GitOperationError(f"git cat-file worker for '{self.repo_path}' did not answer within {timeout}s.")
+                raise
+            finally:
+                self.deadline = None
+
+    def _exchange(self, object_name):
+        try:
+            self.process.stdin.write(object_name.encode('utf-8') + b"\n")
+            self.process.stdin.flush()
+            header = self.process.stdout.readline().decode('utf-8', errors='replace').rstrip("\n")
+        except (BrokenPipeError, OSError, ValueError) as e:
+            raise GitOperationError(f"git cat-file worker for '{self.repo_path}' died: {e}")
+        if not header:
+            raise GitOperationError(f"git cat-file worker for '{self.repo_path}' exited unexpectedly.")
+        if header.endswith(" missing") or header.endswith(" ambiguous"):
+            return None
+        sha, obj_type, size = header.split()
+        size = int(size)
+        content = None
+        if self.mode == "--batch":
+            content = self.process.stdout.read(size)
+            if len(content) < size or self.process.stdout.read(1) != b"\n":  # salto de línea final
+                raise GitOperationError(f"git cat-file worker for '{self.repo_path}' exited unexpectedly.")
+        return sha, obj_type, size, content
+
+    def kill_if_expired(self, now):
+        """Mata el proceso si la consulta en curso superó su plazo (sin esperar al candado, que tiene la consulta)."""
+        deadline = self.deadline
+        if deadline is None or now < deadline or self.expired:
+            return False
+        logger.warning(f"git cat-file {self.mode} worker for {self.repo_path} did not answer in time; killing it.")
+        self.expired = True
+        self.process.kill()
+        self.process.wait()
+        return True
+
+    def close(self):
+        if not self.lock.acquire(timeout=5):
+            # Una consulta colgada tiene el candado: matar el proceso la desbloquea.
+            self.process.kill()
+            self.lock.acquire()
+        try:
+            self.closed = True
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=5)
+            except Exception:
+                self.process.kill()
+                self.process.wait()
+            finally:
+                self.process.stdout.close()
+        finally:
+            self.lock.release()
+
+class GitWorkerPool:
+    """
+    Pool de procesos cat-file reutilizables, uno por (repositorio, modo).
+    Un hilo de limpieza cierra los que lleven más de idle_timeout segundos sin uso.
+    """
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT, request_timeout=DEFAULT_REQUEST_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self.request_timeout = request_timeout
+        self._workers = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+        self._stop = threading.Event()
+
+    def _get_worker(self, repo_path, mode):
+        key = (os.path.normpath(repo_path), mode)
+        with self._lock:
+            worker = self._workers.get(key)
+            if worker is None or not worker.alive:
+                worker = _BatchWorker(key[0], mode)
+                self._workers[key] = worker
+            # Bajo el candado del pool: close_idle ya no puede elegirlo hasta pasado idle_timeout.
+            worker.last_used = time.monotonic()
+            self._ensure_reaper()
+            return worker
+
+    def _ensure_reaper(self):
+        if self._reaper is None or not self._reaper.is_alive():
+            self._stop.clear()
+            self._reaper = threading.Thread(target=self._reap_loop, name="git-worker-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        interval = min(self.idle_timeout, self.request_timeout or self.idle_timeout) / 2
+        while not self._stop.wait(max(interval, 0.05)):
+            self.kill_expired()
+            self.close_idle()
+            with self._lock:
+                if not self._workers:
+                    self._reaper = None
+                    return
+
+    def _request(self, repo_path, mode, object_name, _retry=True):
+        worker = self._get_worker(repo_path, mode)
+        try:
+            return worker.request(object_name, timeout=self.request_timeout)
+        except GitOperationError:
+            # El proceso murió: lo descartamos para que la siguiente llamada lo recree.
+            with self._lock:
+                if self._workers.get((worker.repo_path, mode)) is worker:
+                    del self._workers[(worker.repo_path, mode)]
+            # Si lo cerró la limpieza de inactivos no es un error: se repite una vez con un proceso nuevo.
+            if worker.closed and not worker.expired and _retry:
+                return self._request(repo_path, mode, object_name, _retry=False)
+            raise
+
+    def object_info(self, repo_path, object_name):
+        """Devuelve (sha, tipo, tamaño) de un objeto o None si no existe."""
+        result = self._request(repo_path, "--batch-check", object_name)
+        return result[:3] if result else None
+
+    def read_object(self, repo_path, object_name):
+        """Devuelve (tipo, contenido en bytes) de un objeto o None si no existe."""
+        result = self._request(repo_path, "--batch", object_name)
+        return (result[1], result[3]) if result else None
+
+    def kill_expired(self):
+        """Mata los procesos cuya consulta en curso superó request_timeout."""
+        now = time.monotonic()
+        with self._lock:
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.kill_if_expired(now)
+
+    def close_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            idle = [key for key, w in self._workers.items() if not w.lock.locked() and now - w.last_used > self.idle_timeout]
+            workers = [self._workers.pop(key) for key in idle]
+        for worker in workers:
+            logger.debug(f"Closing idle git cat-file {worker.mode} worker for {worker.repo_path}")
+            worker.close()
+
+    def close_all(self):
+        self._stop.set()
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.close()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._workers)
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+def get_pool():
+    """Devuelve el pool compartido por toda la aplicación."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = GitWorkerPool()
+            atexit.register(_default_pool.close_all)
+        return _default_pool
+
+def object_exists(repo_path, object_name):
+    return get_pool().object_info(repo_path, object_name) is not None
+
+def read_blob(repo_path, path, revision="HEAD"):
+    """
+    Lee el contenido de 'path' en 'revision' (usa revision="" para leer el índice).
+    Devuelve bytes o None si el fichero no existe en esa revisión.
+    """
+    result = get_pool().read_object(repo_path, f"{revision}:{path}")
+    if result is None or result[0] != "blob":
+        return None
+    return result[1]
+
+def list_refs(repo_path, prefix="refs/"):
+    """
+    Lista {refname: sha}. 'for-each-ref' no admite un modo persistente, así que las refs
+    se leen directamente de .git (refs sueltas + packed-refs) sin lanzar procesos.
+    """
+    return git_metadata.list_refs(repo_path, prefix)
@@ -0,0 +1,232 @@
+# installerpro/utils/maintenance.py
+"""
+Mantenimiento periódico de los repositorios registrados, al estilo de 'git maintenance':
+poda de ramas remotas borradas (fetch --prune), empaquetado de objetos sueltos, repack
+incremental con multi-pack-index y escritura del commit-graph.
+Cada pasada tiene un presupuesto de tiempo, que se comprueba entre tareas: una tarea local nunca se
+interrumpe a medias, porque matar 'repack' o 'commit-graph write' dejaría ficheros .lock y packs
+temporales que harían fallar las siguientes ejecuciones. Los comandos corren con prioridad baja
+(nice/ionice) y pocos hilos de compresión. Se guarda por repositorio cuánto tardaba 'git status'
+antes y después del mantenimiento (mediana en caliente) para poder comprobar la mejora.
+"""
+import os
+import json
+import glob
+import time
+import shutil
+import logging
+import threading
+
+from installerpro.utils import git_metadata, perf_profiles, persistence
+from installerpro.utils.git_operations import (
+    CancellationToken, DEFAULT_FETCH_TIMEOUT, GitCancelledError, GitOperationError,
+    _run_cmd_with_output, is_git_repository, run_git_operation,
+)
+
+logger = logging.getLogger(__name__)
+
+# Tarea -> intervalo mínimo (segundos) entre ejecuciones sobre un mismo repositorio, en orden de ejecución.
+# El commit-graph va al final para incluir lo que hayan traído o reempaquetado las anteriores.
+MAINTENANCE_TASKS = {
+    "prune-remote": 24 * 3600,
+    "loose-objects": 24 * 3600,
+    "incremental-repack": 24 * 3600,
+    "commit-graph": 3600,
+}
+DEFAULT_BUDGET_SECONDS = 300      # tiempo máximo de una pasada completa
+DEFAULT_PACK_THREADS = 1
+DEFAULT_POLL_SECONDS = 15 * 60
+MAX_TIMINGS_PER_REPO = 10
+TIMING_RUNS = 3
+_MAX_REPACK_BATCH = 2 * 1024 ** 3
+
+def _low_priority_prefix():
+    """'nice' (y 'ionice -c3' en Linux) delante del comando si están disponibles."""
+    if os.name == "nt":
+        return []
+    prefix = ["nice", "-n", "10"] if shutil.which("nice") else []
+    if shutil.which("ionice"):
+        prefix += ["ionice", "-c", "3"]
+    return prefix
+
+def _repack_batch_size(local_path):
+    """
+    Como hace git maintenance: reempaqueta juntos los packs pequeños, usando como tamaño
+    de lote la suma de todos menos el mayor (con un máximo de 2 GiB). 0 si no hay nada que juntar.
+    """
+    dirs = git_metadata.find_git_dirs(local_path)
+    if not dirs:
+        return 0
+    sizes = sorted(os.path.getsize(p) for p in glob.glob(os.path.join(dirs[1], "objects", "pack", "*.pack")))
+    if len(sizes) < 2:
+        return 0
+    return min(sum(sizes[:-1]), _MAX_REPACK_BATCH)
+
+class MaintenanceRunner:
+    """Ejecuta las tareas de mantenimiento sobre un repositorio con límites de tiempo y CPU."""
+
+    def __init__(self, pack_threads=DEFAULT_PACK_THREADS, low_priority=True, cancel_token=None):
+        self.pack_threads = pack_threads
+        self.prefix = _low_priority_prefix() if low_priority else []
+        self.cancel_token = cancel_token
+
+    def git(self, local_path, *args):
+        # Sin timeout ni cancelación: ver la cabecera del módulo.
+        command = self.prefix + ["git", "-c", f"pack.threads={self.pack_threads}", *args]
+        return_code, stdout, stderr = _run_cmd_with_output(command, cwd=local_path)
+        if return_code != 0:
+            raise GitOperationError(f"'git {' '.join(args)}' failed in {local_path}: {stderr}")
+        return stdout
+
+    def prune_remote(self, local_path):
+        # La única tarea de red: un remoto colgado sí se corta (timeout) y se puede cancelar.
+        for remote in git_metadata.list_remotes(local_path):
+            run_git_operation(local_path, "fetch", "fetch", "--prune", "--quiet", remote,
+                              timeout=DEFAULT_FETCH_TIMEOUT, cancel_token=self.cancel_token)
+
+    def loose_objects(self, local_path):
+        # 'repack -d' sin -a solo mete en un pack nuevo los objetos sueltos y borra los ya empaquetados.
+        self.git(local_path, "repack", "-d", "-q", "--no-write-bitmap-index")
+
+    def incremental_repack(self, local_path):
+        self.git(local_path, "multi-pack-index", "write", "--no-progress")
+        self.git(local_path, "multi-pack-index", "expire", "--no-progress")
+        batch_size = _repack_batch_size(local_path)
+        if batch_size:
+            self.git(local_path, "multi-pack-index", "repack", "--no-progress", f"--batch-size={batch_size}")
+
+    def commit_graph(self, local_path):
+        self.git(local_path, "commit-graph", "write", "--reachable", "--split", "--changed-paths", "--no-progress")
+
+    def run_task(self, task, local_path):
+        getattr(self, task.replace("-", "_"))(local_path)
+
+def time_status(local_path, runs=TIMING_RUNS):
+    """Mediana de segundos de 'git status' en el repositorio, tras una ejecución de calentamiento."""
+    return perf_profiles.time_status(local_path, runs)
+
+class MaintenanceScheduler:
+    """
+    Planifica las tareas de MAINTENANCE_TASKS sobre un conjunto de proyectos.
+    El estado ({'tasks': {tarea: último epoch}, 'timings': [...]}) se guarda en state_path.
+    measure_status=True mide 'git status' antes y después de cada pasada (2 x (TIMING_RUNS + 1)
+    status completos por repositorio); por defecto no se mide.
+    """
+
+    def __init__(self, state_path, budget_seconds=DEFAULT_BUDGET_SECONDS, pack_threads=DEFAULT_PACK_THREADS,
+                 low_priority=True, tasks=None, measure_status=False):
+        self.state_path = state_path
+        self.budget_seconds = budget_seconds
+        self.measure_status = measure_status
+        self.tasks = dict(MAINTENANCE_TASKS if tasks is None else tasks)
+        self._lock = threading.Lock()
+        self._projects = set()
+        self._state = self._load_state()
+        self._thread = None
+        self._stop = threading.Event()
+        self._cancel_token = CancellationToken()
+        self.runner = MaintenanceRunner(pack_threads, low_priority, self._cancel_token)
+
+    def _load_state(self):
+        return persistence.load_json_state(self.state_path, "maintenance state")
+
+    def _save_state(self):
+        with self._lock:
+            state = json.loads(json.dumps(self._state))
+        persistence.save_json_state(self.state_path, state, "maintenance state")
+
+    def set_projects(self, local_paths):
+        with self._lock:
+            self._projects = {os.path.normpath(path) for path in local_paths}
+            for key in set(self._state) - self._projects:
+                del self._state[key]
+
+    def due_tasks(self, local_path, now=None):
+        """Tareas a las que les toca ejecutarse en el repositorio, en orden de ejecución."""
+        now = time.time() if now is None else now
+        with self._lock:
+            last_runs = dict(self._state.get(os.path.normpath(local_path), {}).get('tasks', {}))
+        return [task for task, interval in self.tasks.items() if now - last_runs.get(task, 0) >= interval]
+
+    def timings(self, local_path):
+        """Mediciones guardadas: [{'at', 'tasks', 'before', 'after'}], de la más antigua a la más reciente."""
+        with self._lock:
+            return [dict(t) for t in self._state.get(os.path.normpath(local_path), {}).get('timings', [])]
+
+    def maintain(self, local_path, tasks, deadline=None):
+        """
+        Ejecuta 'tasks' sobre el repositorio (midiendo 'git status' antes y después si measure_status).
+        Si se agota el presupuesto no empieza la siguiente tarea (la que está en marcha termina).
+        Devuelve {tarea: True/False}.
+        """
+        key = os.path.normpath(local_path)
+        results = {}
+        if self._stop.is_set() or (deadline is not None and time.monotonic() >= deadline):
+            return results
+        before = time_status(key) if self.measure_status else None
+        for task in tasks:
+            if self._stop.is_set() or (deadline is not None and time.monotonic() >= deadline):
+                logger.info(f"Maintenance budget exhausted before '{task}' in {key}.")
+                break
+            try:
+                self.runner.run_task(task, key)
+                results[task] = True
+            except GitCancelledError:
+                break
+            except GitOperationError as e:
+                logger.warning(f"Maintenance task '{task}' failed in {key}: {e}")
+                results[task] = False
+            with self._lock:
+                self._state.setdefault(key, {}).setdefault('tasks', {})[task] = time.time()
+        if before is not None and any(results.values()):
+            after = time_status(key)
+            with self._lock:
+                timings = self._state.setdefault(key, {}).setdefault('timings', [])
+                timings.append({'at': time.time(), 'tasks': [t for t, ok in results.items() if ok], 'before': before, 'after': after})
+                del timings[:-MAX_TIMINGS_PER_REPO]
+            logger.info(f"Maintenance of {key}: status took {before * 1000:.0f} ms before and {after * 1000:.0f} ms after ({', '.join(results)}).")
+        return results
+
+    def run_once(self, run_exclusive=None):
+        """
+        Una pasada sobre todos los proyectos con tareas pendientes, dentro del presupuesto de tiempo.
+        run_exclusive(local_path, func) permite ejecutar el mantenimiento de cada repositorio con el
+        turno de escritura de la aplicación (ver operation_queue); por defecto se llama directamente.
+        Devuelve {ruta: {tarea: True/False}}.
+        """
+        deadline = time.monotonic() + self.budget_seconds if self.budget_seconds else None
+        with self._lock:
+            projects = sorted(self._projects)
+        results = {}
+        for local_path in projects:
+            if self._stop.is_set() or (deadline is not None and time.monotonic() >= deadline):
+                break
+            tasks = self.due_tasks(local_path)
+            if not tasks or not is_git_repository(local_path):
+                continue
+            job = lambda path=local_path, tasks=tasks: self.maintain(path, tasks, deadline)
+            results[local_path] = run_exclusive(local_path, job) if run_exclusive else job()
+        if results:
+            self._save_state()
+        return results
+
+    def start(self, poll_seconds=DEFAULT_POLL_SECONDS, run_exclusive=None):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._cancel_token = self.runner.cancel_token = CancellationToken()
+
+        def loop():
+            # La primera pasada espera un intervalo para no competir con el arranque de la aplicación.
+            while not self._stop.wait(poll_seconds):
+                try:
+                    self.run_once(run_exclusive)
+                except Exception as e:
+                    logger.error(f"Maintenance cycle failed: {e}", exc_info=True)
+
+        self._thread = threading.Thread(target=loop, name="git-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._cancel_token.cancel()
@@ -0,0 +1,184 @@
+# installerpro/utils/mirror_cache.py
+"""
+Caché local de objetos compartida entre clones.
+Mantiene un repositorio bare por URL remota, con solo ramas y etiquetas (no refs/pull/* ni
+otras refs del servidor); los clones nuevos usan '--reference-if-able' (alternates) para tomar
+de él los objetos en lugar de descargarlos de nuevo.
+En los mirrors corre el gc automático de git, pero sin podar nunca (gc.pruneExpire=never): un clon
+con alternates depende de que los objetos sigan existiendo en el mirror. Con dissociate=True (lo que
+usa la aplicación por defecto) el clon copia los objetos y deja de depender de la caché.
+Los clones superficiales o parciales (clone_options con depth o filter) no usan la caché: crear un
+mirror completo costaría más que el propio clon.
+"""
+import os
+import re
+import time
+import shutil
+import hashlib
+import logging
+import threading
+
+from installerpro.utils import git_metadata
+from installerpro.utils.git_operations import GitOperationError, NETWORK_RETRY_POLICY, _run_cmd_stdin, run_git_operation
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIRROR_TTL = 600          # segundos antes de refrescar un mirror al clonar desde él
+DEFAULT_REFRESH_INTERVAL = 3600   # refresco periódico en segundo plano
+MIRROR_REFSPECS = ("+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*")
+
+def uses_mirror(clone_options):
+    """False para clones superficiales o parciales, que no deben descargar la historia completa."""
+    clone_options = clone_options or {}
+    return not (clone_options.get('depth') or clone_options.get('filter'))
+
+def normalize_url(repo_url):
+    """Clave estable para una URL: sin espacios, barras finales ni sufijo '.git'."""
+    url = repo_url.strip().rstrip("/")
+    return url[:-4] if url.endswith(".git") else url
+
+class MirrorCache:
+    def __init__(self, cache_dir, ttl_seconds=DEFAULT_MIRROR_TTL):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._refresh_thread = None
+        self._stop = threading.Event()
+
+    def mirror_path(self, repo_url):
+        url = normalize_url(repo_url)
+        slug = re.sub(r"[^A-Za-z0-9._-]", "_", url.rsplit("/", 1)[-1].rsplit(":", 1)[-1]) or "repo"
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.cache_dir, f"{slug}-{digest}.git")
+
+    def _lock_for(self, repo_url):
+        with self._locks_guard:
+            return self._locks.setdefault(normalize_url(repo_url), threading.Lock())
+
+    def has_mirror(self, repo_url):
+        return os.path.isfile(os.path.join(self.mirror_path(repo_url), "HEAD"))
+
+    def last_refresh(self, repo_url):
+        path = self.mirror_path(repo_url)
+        for name in ("FETCH_HEAD", "HEAD"):
+            try:
+                return os.stat(os.path.join(path, name)).st_mtime
+            except OSError:
+                continue
+        return None
+
+    def _create(self, repo_url, mirror, cancel_token, on_progress):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{mirror}.tmp-{os.getpid()}-{threading.get_ident()}"
+        progress_args = ["--progress"] if on_progress else []
+        try:
+            # --bare trae solo refs/heads/* y refs/tags/*, a diferencia de --mirror.
+            run_git_operation(temp_path, "clone", "clone", "--bare", *progress_args, repo_url, temp_path,
+                              cancel_token=cancel_token, retry_policy=NETWORK_RETRY_POLICY, on_progress=on_progress)
+            self._configure(temp_path)
+            os.replace(temp_path, mirror)
+        finally:
+            if os.path.exists(temp_path):
+                shutil.rmtree(temp_path, ignore_errors=True)
+        logger.info(f"Created mirror for {repo_url} at {mirror}")
+
+    def _configure(self, mirror):
+        """Refspecs de solo ramas y etiquetas y gc sin poda; también migra mirrors creados con --mirror."""
+        config = git_metadata.read_config_file(os.path.join(mirror, "config"))
+        origin = config.get(("remote", "origin"), {})
+        if origin.get("mirror"):
+            run_git_operation(mirror, "config", "config", "--unset-all", "remote.origin.mirror")
+        if tuple(origin.get("fetch", ())) != MIRROR_REFSPECS:
+            run_git_operation(mirror, "config", "config", "--replace-all", "remote.origin.fetch", MIRROR_REFSPECS[0])
+            for refspec in MIRROR_REFSPECS[1:]:
+                run_git_operation(mirror, "config", "config", "--add", "remote.origin.fetch", refspec)
+            # Las refs que traía --mirror (refs/pull/*...) ya no se podan al refrescar: se borran ahora.
+            all_refs = run_git_operation(mirror, "for-each-ref", "for-each-ref", "--format=%(refname)").splitlines()
+            extra_refs = [ref for ref in all_refs if ref and not ref.startswith(("refs/heads/", "refs/tags/"))]
+            if extra_refs:
+                commands = "".join(f"delete {ref}\n" for ref in extra_refs).encode("utf-8")
+                return_code, _stdout, stderr = _run_cmd_stdin(["git", "update-ref", "--stdin"], mirror, commands)
+                if return_code != 0:
+                    raise GitOperationError(f"Could not drop extra refs from mirror {mirror}: {stderr}")
+        if git_metadata.get_config_value(config, "gc", None, "pruneexpire") != "never":
+            run_git_operation(mirror, "config", "config", "gc.pruneExpire", "never")
+        if git_metadata.get_config_value(config, "gc", None, "auto") is not None:
+            run_git_operation(mirror, "config", "config", "--unset-all", "gc.auto")
+
+    def _refresh(self, repo_url, mirror, cancel_token, on_progress):
+        self._configure(mirror)
+        progress_args = ["--progress"] if on_progress else ["--quiet"]
+        run_git_operation(mirror, "fetch", "fetch", "--prune", *progress_args, "origin",
+                          cancel_token=cancel_token, retry_policy=NETWORK_RETRY_POLICY, on_progress=on_progress)
+        logger.debug(f"Refreshed mirror for {repo_url}")
+
+    def ensure_mirror(self, repo_url, cancel_token=None, on_progress=None, max_age=None):
+        """
+        Devuelve la ruta del mirror de repo_url, creándolo si no existe o refrescándolo
+        si es más antiguo que max_age (por defecto el TTL de la caché).
+        """
+        mirror = self.mirror_path(repo_url)
+        max_age = self.ttl_seconds if max_age is None else max_age
+        with self._lock_for(repo_url):
+            if not self.has_mirror(repo_url):
+                self._create(repo_url, mirror, cancel_token, on_progress)
+            elif time.time() - (self.last_refresh(repo_url) or 0) >= max_age:
+                self._refresh(repo_url, mirror, cancel_token, on_progress)
+        return mirror
+
+    def reference_for(self, repo_url, cancel_token=None, on_progress=None, clone_options=None):
+        """
+        Como ensure_mirror, pero devuelve None (y lo registra) si no se pudo preparar el mirror.
+        También None, sin tocar la caché, si clone_options pide un clon superficial o parcial.
+        """
+        if not uses_mirror(clone_options):
+            logger.debug(f"Shallow or partial clone of {repo_url}: not using the mirror cache.")
+            return None
+        try:
+            return self.ensure_mirror(repo_url, cancel_token=cancel_token, on_progress=on_progress)
+        except GitOperationError as e:
+            logger.warning(f"Mirror cache unavailable for {repo_url}, cloning without reference: {e}")
+            return None
+
+    def list_mirrors(self):
+        """Devuelve {ruta del mirror: URL de origen} de los mirrors existentes."""
+        mirrors = {}
+        if not os.path.isdir(self.cache_dir):
+            return mirrors
+        for entry in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, entry)
+            if entry.endswith(".git") and os.path.isfile(os.path.join(path, "HEAD")):
+                config = git_metadata.read_config_file(os.path.join(path, "config"))
+                mirrors[path] = git_metadata.get_config_value(config, "remote", "origin", "url")
+        return mirrors
+
+    def refresh_all(self, cancel_token=None):
+        """Refresca todos los mirrors existentes. Devuelve {url: True/False}."""
+        results = {}
+        for _path, url in self.list_mirrors().items():
+            if self._stop.is_set() or not url:
+                continue
+            try:
+                self.ensure_mirror(url, cancel_token=cancel_token, max_age=0)
+                results[url] = True
+            except GitOperationError as e:
+                logger.warning(f"Background refresh of mirror {url} failed: {e}")
+                results[url] = False
+        return results
+
+    def start_background_refresh(self, interval=DEFAULT_REFRESH_INTERVAL):
+        """Arranca un hilo que refresca todos los mirrors cada 'interval' segundos."""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval):
+                self.refresh_all()
+
+        self._refresh_thread = threading.Thread(target=loop, name="mirror-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,158 @@
+# installerpro/utils/operation_queue.py
+"""
+Planificador central de operaciones por repositorio.
+Las operaciones de escritura (pull, commit, push...) sobre un mismo repositorio se ejecutan de una
+en una y en el orden en que se pidieron; las de lectura (refrescos de estado) pueden solaparse entre
+sí pero no con una escritura. Repositorios distintos avanzan en paralelo.
+Una operación con coalesce_key igual a otra que aún espera turno no se encola: comparte su resultado.
+Quien recorre muchos repositorios (refrescos de estado) no debe reservarlos todos de golpe: slot()
+reserva uno solo mientras se trabaja en él, sin ocupar un hilo del pool mientras espera.
+"""
+import os
+import logging
+import threading
+import contextlib
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+READ = "read"
+WRITE = "write"
+DEFAULT_MAX_WORKERS = 8
+
+class _Operation:
+    def __init__(self, keys, kind, coalesce_key, func, args, kwargs):
+        self.keys = keys
+        self.kind = kind
+        self.coalesce_key = coalesce_key
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+
+class OperationScheduler:
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="repo-ops")
+        self._lock = threading.Lock()
+        self._waiting = []          # operaciones pendientes, en orden de llegada
+        self._readers = {}          # repositorio -> lecturas en curso
+        self._writers = set()       # repositorios con una escritura en curso
+        self._running_coalesced = set()
+        self._pending_coalesced = {}
+
+    def submit(self, keys, func, *args, kind=WRITE, coalesce_key=None, **kwargs):
+        """
+        Encola func(*args, **kwargs) sobre los repositorios 'keys' (rutas) y devuelve un Future.
+        kind es READ o WRITE. Con keys vacío la operación no bloquea ningún repositorio.
+        """
+        keys = frozenset(os.path.normpath(key) for key in keys or ())
+        coalesce_key = (coalesce_key, kind, keys) if coalesce_key is not None else None
+        with self._lock:
+            if coalesce_key in self._pending_coalesced:
+                logger.debug(f"Coalescing read request {coalesce_key[0]!r} with a pending one.")
+                return self._pending_coalesced[coalesce_key].future
+            operation = _Operation(keys, kind, coalesce_key, func, args, kwargs)
+            self._waiting.append(operation)
+            if coalesce_key is not None:
+                self._pending_coalesced[coalesce_key] = operation
+            self._dispatch()
+        return operation.future
+
+    @contextlib.contextmanager
+    def slot(self, keys, kind=READ):
+        """
+        Reserva 'keys' para el hilo actual, respetando el orden de llegada igual que submit(), y
+        las libera al salir del bloque. Para trabajo que ya corre en otro hilo (p. ej. un pool de refresco).
+        """
+        operation = _Operation(frozenset(os.path.normpath(key) for key in keys or ()), kind, None, None, (), {})
+        with self._lock:
+            self._waiting.append(operation)
+            self._dispatch()
+        operation.future.result()
+        try:
+            yield
+        finally:
+            self._release(operation)
+
+    def _can_start(self, operation, blocked_readers, blocked_writers):
+        # Una lectura idéntica en curso: esta espera a que termine (como mucho una en marcha y otra pendiente).
+        if operation.coalesce_key is not None and operation.coalesce_key in self._running_coalesced:
+            return False
+        for key in operation.keys:
+            if key in self._writers or key in blocked_readers:
+                return False
+            if operation.kind == WRITE and (self._readers.get(key) or key in blocked_writers):
+                return False
+        return True
+
+    def _dispatch(self):
+        """Arranca, en orden de llegada, todo lo que no choque con lo que está en marcha o esperando antes."""
+        blocked_readers, blocked_writers = set(), set()
+        still_waiting = []
+        for operation in self._waiting:
+            if self._can_start(operation, blocked_readers, blocked_writers):
+                self._start(operation)
+                continue
+            still_waiting.append(operation)
+            # Lo que llega después no adelanta a esta operación en sus repositorios.
+            blocked_writers.update(operation.keys)
+            if operation.kind == WRITE:
+                blocked_readers.update(operation.keys)
+        self._waiting = still_waiting
+
+    def _start(self, operation):
+        for key in operation.keys:
+            if operation.kind == WRITE:
+                self._writers.add(key)
+            else:
+                self._readers[key] = self._readers.get(key, 0) + 1
+        if operation.coalesce_key is not None:
+            self._pending_coalesced.pop(operation.coalesce_key, None)
+            self._running_coalesced.add(operation.coalesce_key)
+        if operation.func is None:
+            operation.future.set_result(None)  # reserva de slot(): el hilo que espera continúa
+        else:
+            self._executor.submit(self._run, operation)
+
+    def _release(self, operation):
+        with self._lock:
+            for key in operation.keys:
+                if operation.kind == WRITE:
+                    self._writers.discard(key)
+                elif self._readers.get(key, 0) > 1:
+                    self._readers[key] -= 1
+                else:
+                    self._readers.pop(key, None)
+            self._running_coalesced.discard(operation.coalesce_key)
+            self._dispatch()
+
+    def _run(self, operation):
+        if not operation.future.set_running_or_notify_cancel():
+            result, error = None, None
+        else:
+            try:
+                result, error = operation.func(*operation.args, **operation.kwargs), None
+            except BaseException as e:
+                result, error = None, e
+        # Se liberan los repositorios antes de avisar, para que quien espere el Future los encuentre libres.
+        self._release(operation)
+        if operation.future.cancelled():
+            return
+        if error is not None:
+            operation.future.set_exception(error)
+        else:
+            operation.future.set_result(result)
+
+    def busy_keys(self):
+        """Repositorios con alguna operación en curso."""
+        with self._lock:
+            return set(self._writers) | set(self._readers)
+
+    def shutdown(self, wait=False):
+        """Cancela lo que aún no ha empezado y cierra el pool."""
+        with self._lock:
+            for operation in self._waiting:
+                operation.future.cancel()
+            self._waiting = []
+            self._pending_coalesced.clear()
+        self._executor.shutdown(wait=wait)
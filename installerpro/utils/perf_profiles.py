@@ -0,0 +1,282 @@
+# installerpro/utils/perf_profiles.py
+"""
+Perfiles de rendimiento por proyecto para que 'git status' no recorra todo el árbol de trabajo:
+core.fsmonitor (demonio integrado de git, solo donde la compilación lo incluye), core.untrackedCache,
+index.version 4, split-index y sparse-checkout en modo cone.
+Un perfil es un diccionario con cualquiera de las claves de PROFILE_SETTINGS; se guarda con el
+proyecto en projects.json ('perf_profile') y se aplica al clonar.
+"""
+import os
+import sys
+import glob
+import time
+import struct
+import logging
+import subprocess
+import functools
+import statistics
+
+from installerpro.utils import git_metadata
+from installerpro.utils.git_operations import GitOperationError, _run_cmd_with_output
+
+logger = logging.getLogger(__name__)
+
+# Orden en que se aplican (y se miden en benchmark_profile)
+PROFILE_SETTINGS = ("index_version", "split_index", "untracked_cache", "fsmonitor", "sparse_paths")
+
+BUILTIN_PROFILES = {
+    "default": {},
+    "large": {"index_version": 4, "split_index": True, "untracked_cache": True, "fsmonitor": True},
+}
+
+# Claves de configuración (locales) que toca cada ajuste; benchmark_profile las guarda y restaura tal cual.
+SETTING_CONFIG_KEYS = {
+    "index_version": ("index.version",),
+    "split_index": ("core.splitIndex",),
+    "untracked_cache": ("core.untrackedCache",),
+    "fsmonitor": ("core.fsmonitor",),
+    "sparse_paths": ("core.sparseCheckout", "core.sparseCheckoutCone"),
+}
+
+# El coste que queremos medir: el recorrido completo de ficheros sin seguimiento
+BENCHMARK_STATUS_COMMAND = ["git", "status", "--porcelain=v2", "-z", "--untracked-files=all"]
+
+def resolve_profile(profile):
+    """Acepta el nombre de un perfil integrado o un diccionario; devuelve el diccionario de ajustes."""
+    if isinstance(profile, str):
+        if profile not in BUILTIN_PROFILES:
+            raise GitOperationError(f"Unknown performance profile: {profile!r} (expected one of {', '.join(BUILTIN_PROFILES)})")
+        return dict(BUILTIN_PROFILES[profile])
+    unknown = set(profile or {}) - set(PROFILE_SETTINGS)
+    if unknown:
+        raise GitOperationError(f"Unknown performance profile settings: {', '.join(sorted(unknown))}")
+    return dict(profile or {})
+
+@functools.lru_cache(maxsize=1)
+def fsmonitor_supported():
+    """True si este git incluye el demonio fsmonitor integrado (Windows y macOS desde git 2.36)."""
+    return_code, stdout, _stderr = _run_cmd_with_output(["git", "version", "--build-options"])
+    return return_code == 0 and "fsmonitor--daemon" in stdout
+
+def _git(local_path, *args):
+    return_code, stdout, stderr = _run_cmd_with_output(["git", *args], cwd=local_path)
+    if return_code != 0:
+        raise GitOperationError(f"'git {' '.join(args)}' failed in {local_path}: {stderr}")
+    return stdout
+
+def read_index_version(local_path):
+    """Versión del fichero index (2, 3 o 4), o None si no existe."""
+    dirs = git_metadata.find_git_dirs(local_path)
+    if not dirs:
+        return None
+    try:
+        with open(os.path.join(dirs[0], "index"), "rb") as f:
+            signature, version = struct.unpack(">4sI", f.read(8))
+    except (OSError, struct.error):
+        return None
+    return version if signature == b"DIRC" else None
+
+def _sparse_patterns(local_path):
+    return_code, stdout, _stderr = _run_cmd_with_output(["git", "sparse-checkout", "list"], cwd=local_path)
+    return sorted(line.strip() for line in stdout.splitlines() if line.strip()) if return_code == 0 else []
+
+def apply_setting(local_path, setting, value):
+    """Aplica un ajuste. Devuelve False si este sistema no lo admite (p. ej. fsmonitor en Linux)."""
+    if setting == "index_version":
+        _git(local_path, "config", "index.version", str(int(value)))
+        _git(local_path, "update-index", "--index-version", str(int(value)))
+    elif setting == "split_index":
+        _git(local_path, "config", "core.splitIndex", "true" if value else "false")
+        _git(local_path, "update-index", "--split-index" if value else "--no-split-index")
+    elif setting == "untracked_cache":
+        _git(local_path, "config", "core.untrackedCache", "true" if value else "false")
+        _git(local_path, "update-index", "--untracked-cache" if value else "--no-untracked-cache")
+    elif setting == "fsmonitor":
+        if value and not fsmonitor_supported():
+            logger.info(f"Built-in fsmonitor is not available in this git build; skipping it for {local_path}.")
+            return False
+        _git(local_path, "config", "core.fsmonitor", "true" if value else "false")
+    elif setting == "sparse_paths":
+        if value:
+            _git(local_path, "sparse-checkout", "set", "--cone", *value)
+        else:
+            _git(local_path, "sparse-checkout", "disable")
+    return True
+
+def apply_profile(local_path, profile):
+    """Aplica el perfil al repositorio. Devuelve {ajuste: True/False (no admitido)}."""
+    profile = resolve_profile(profile)
+    applied = {}
+    for setting in PROFILE_SETTINGS:
+        if setting in profile:
+            applied[setting] = apply_setting(local_path, setting, profile[setting])
+    logger.info(f"Applied performance profile to {local_path}: {applied}")
+    return applied
+
+def verify_profile(local_path, profile):
+    """Comprueba sobre el repositorio (config, cabecera del index, sparse-checkout) cada ajuste del perfil. Devuelve {ajuste: bool}."""
+    profile = resolve_profile(profile)
+    config = git_metadata.read_config(local_path)
+    enabled = lambda key: git_metadata.get_config_value(config, "core", None, key, "false").lower() in ("true", "yes", "on", "1")
+    dirs = git_metadata.find_git_dirs(local_path)
+    checks = {}
+    for setting, value in profile.items():
+        if setting == "index_version":
+            checks[setting] = read_index_version(local_path) == int(value)
+        elif setting == "split_index":
+            has_shared_index = bool(dirs and glob.glob(os.path.join(dirs[0], "sharedindex.*")))
+            checks[setting] = enabled("splitindex") == bool(value) and has_shared_index == bool(value)
+        elif setting == "untracked_cache":
+            checks[setting] = enabled("untrackedcache") == bool(value)
+        elif setting == "fsmonitor":
+            checks[setting] = enabled("fsmonitor") == bool(value)
+        elif setting == "sparse_paths":
+            expected = sorted(p.strip("/") for p in value or [])
+            is_sparse = enabled("sparsecheckout") and enabled("sparsecheckoutcone")
+            checks[setting] = (is_sparse and _sparse_patterns(local_path) == expected) if expected else not enabled("sparsecheckout")
+    return checks
+
+def _config_scope(key):
+    # git sparse-checkout guarda su configuración en config.worktree si extensions.worktreeConfig está activo;
+    # '--worktree' equivale a '--local' cuando no lo está.
+    return "--worktree" if key.lower().startswith("core.sparsecheckout") else "--local"
+
+def _get_local_config(local_path, key):
+    return_code, stdout, _stderr = _run_cmd_with_output(["git", "config", _config_scope(key), "--get", key], cwd=local_path)
+    return stdout.strip() if return_code == 0 else None
+
+def _unset_local_config(local_path, key):
+    # Código 5: la clave no existía, que es justo lo que se quería.
+    return_code, _stdout, stderr = _run_cmd_with_output(["git", "config", _config_scope(key), "--unset-all", key], cwd=local_path)
+    if return_code not in (0, 5):
+        raise GitOperationError(f"'git config --unset-all {key}' failed in {local_path}: {stderr}")
+
+def clear_profile(local_path, settings=None):
+    """
+    Quita los ajustes indicados (por defecto todos salvo sparse_paths) borrando su configuración en vez
+    de escribir "false": index v2, sin split-index ni untracked cache. El sparse-checkout solo se
+    desactiva si 'sparse_paths' está en settings.
+    """
+    settings = [s for s in PROFILE_SETTINGS if s != "sparse_paths"] if settings is None else settings
+    for setting in settings:
+        if setting == "sparse_paths":
+            _git(local_path, "sparse-checkout", "disable")
+        for key in SETTING_CONFIG_KEYS[setting]:
+            _unset_local_config(local_path, key)
+        if setting == "index_version":
+            _git(local_path, "update-index", "--index-version", "2")
+        elif setting == "split_index":
+            _git(local_path, "update-index", "--no-split-index")
+        elif setting == "untracked_cache":
+            _git(local_path, "update-index", "--no-untracked-cache")
+
+def _snapshot(local_path, settings):
+    """Configuración local, index (y sus sharedindex) y patrones de sparse-checkout, para dejarlos como estaban."""
+    git_dir = git_metadata.find_git_dirs(local_path)[0]
+    files = {}
+    paths = [os.path.join(git_dir, "index")] + glob.glob(os.path.join(git_dir, "sharedindex.*"))
+    if "sparse_paths" in settings:
+        paths.append(os.path.join(git_dir, "info", "sparse-checkout"))
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                files[path] = f.read()
+        except FileNotFoundError:
+            files[path] = None
+    config = {key: _get_local_config(local_path, key) for setting in settings for key in SETTING_CONFIG_KEYS[setting]}
+    return {"config": config, "files": files, "sparse": "sparse_paths" in settings}
+
+def _is_true(value):
+    return (value or "").lower() in ("true", "yes", "on", "1")
+
+def _restore_config(local_path, config):
+    for key, value in config.items():
+        if value is None:
+            _unset_local_config(local_path, key)
+        else:
+            _git(local_path, "config", _config_scope(key), key, value)
+
+def _restore(local_path, snapshot):
+    config = snapshot["config"]
+    _restore_config(local_path, config)
+    if "core.fsmonitor" in config and not _is_true(config["core.fsmonitor"]) and fsmonitor_supported():
+        _run_cmd_with_output(["git", "fsmonitor--daemon", "stop"], cwd=local_path)
+    index_files = {}
+    for path, content in snapshot["files"].items():
+        if os.path.basename(path) != "sparse-checkout":
+            index_files[path] = content
+        elif content is None:
+            if os.path.exists(path):
+                os.remove(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(content)
+    if snapshot["sparse"]:
+        # Con los patrones originales de vuelta, el árbol de trabajo se ajusta a ellos.
+        if _is_true(config.get("core.sparseCheckout")):
+            _git(local_path, "sparse-checkout", "reapply")
+        else:
+            _git(local_path, "sparse-checkout", "disable")
+            _restore_config(local_path, config)
+    # El index va al final: conserva lo que hubiera en el área de preparación y los bits skip-worktree originales.
+    for path, content in index_files.items():
+        if content is not None:
+            with open(path, "wb") as f:
+                f.write(content)
+
+def _timed_status(local_path):
+    """
+    Segundos de un BENCHMARK_STATUS_COMMAND. La salida se descarta sin pasar por Python: no cuenta
+    en la medida ni acaba en el log (con -z sería un único registro con todo el estado del repositorio).
+    """
+    started = time.perf_counter()
+    process = subprocess.run(BENCHMARK_STATUS_COMMAND, cwd=local_path, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    elapsed = time.perf_counter() - started
+    if process.returncode != 0:
+        raise GitOperationError(f"git status failed in {local_path}: {process.stderr.decode('utf-8', errors='replace').strip()}")
+    return elapsed
+
+def time_status(local_path, runs=5):
+    """Mediana de segundos de BENCHMARK_STATUS_COMMAND, tras una ejecución de calentamiento."""
+    _timed_status(local_path)
+    median = statistics.median(_timed_status(local_path) for _ in range(max(1, runs)))
+    logger.debug(f"git status in {local_path}: {median * 1000:.1f} ms (median of {max(1, runs)} runs)")
+    return median
+
+def benchmark_profile(local_path, profile, runs=5, restore=True):
+    """
+    Mide la latencia de status sin los ajustes del perfil y tras añadirlos uno a uno.
+    Devuelve [(etapa, segundos)], empezando por ("baseline", s). Solo se tocan los ajustes del perfil
+    (el sparse-checkout, solo si incluye sparse_paths). Con restore=True el repositorio vuelve
+    exactamente a su configuración, index y patrones previos; con False se queda con el perfil aplicado.
+    """
+    profile = resolve_profile(profile)
+    settings = [setting for setting in PROFILE_SETTINGS if setting in profile]
+    snapshot = _snapshot(local_path, settings)
+    try:
+        clear_profile(local_path, settings)
+        results = [("baseline", time_status(local_path, runs))]
+        for setting in settings:
+            if apply_setting(local_path, setting, profile[setting]):
+                results.append((setting, time_status(local_path, runs)))
+    finally:
+        if restore:
+            _restore(local_path, snapshot)
+    return results
+
+def _main(argv):
+    """python -m installerpro.utils.perf_profiles <repositorio> [perfil] [repeticiones]"""
+    if not argv:
+        print(_main.__doc__)
+        return 2
+    local_path, profile = argv[0], argv[1] if len(argv) > 1 else "large"
+    runs = int(argv[2]) if len(argv) > 2 else 5
+    results = benchmark_profile(local_path, profile, runs)
+    baseline = results[0][1]
+    for stage, seconds in results:
+        print(f"{stage:<18} {seconds * 1000:9.1f} ms  ({baseline / seconds if seconds else 0:4.1f}x)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,155 @@
+# installerpro/utils/persistence.py
+"""
+Escritura de ficheros de estado (config.json, projects.json) sin riesgo de dejarlos a medias y sin
+reescribirlos en cada cambio: atomic_write_json escribe en un temporal, hace fsync y lo renombra
+sobre el original; WriteBehind agrupa los cambios de una ventana corta en una única escritura
+y vuelca lo pendiente al salir.
+"""
+import os
+import json
+import atexit
+import logging
+import tempfile
+import threading
+import weakref
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WRITE_DELAY = 1.0  # segundos que se esperan para agrupar cambios antes de escribir
+MAX_RETRY_DELAY = 300.0  # tope de la espera entre reintentos de una escritura que sigue fallando
+
+def _fsync_directory(directory):
+    """Hace persistente el renombrado (solo POSIX; en Windows no se pueden abrir directorios)."""
+    if os.name == "nt":
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def atomic_write_json(path, data, indent=4):
+    """Escribe data como JSON en path: o queda el fichero anterior completo o el nuevo completo."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # Temporal con nombre único: dos escritores del mismo fichero no se pisan el temporal.
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(temp_path, os.stat(path).st_mode & 0o777)  # mkstemp crea 0600: se conservan los permisos
+        except FileNotFoundError:
+            pass
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+def load_json_state(path, description="state"):
+    """Diccionario guardado con save_json_state; {} si el fichero no existe o está dañado."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read {description} from {path}, starting fresh: {e}")
+        return {}
+
+def save_json_state(path, state, description="state"):
+    """Escribe el estado de forma atómica; un fallo solo se registra (se reintentará en el siguiente guardado)."""
+    try:
+        atomic_write_json(path, state)
+    except OSError as e:
+        logger.warning(f"Could not save {description} to {path}: {e}")
+
+# Escritores vivos; un único manejador atexit vuelca lo pendiente de todos al salir.
+_live_writers = weakref.WeakSet()
+
+@atexit.register
+def _flush_all_at_exit():
+    for writer in list(_live_writers):
+        writer.flush(reschedule=False)
+
+class WriteBehind:
+    """
+    Aplaza write() hasta 'delay' segundos después del primer cambio pendiente; los cambios que lleguen
+    mientras tanto se escriben en esa misma llamada. write() debe leer el estado actual al ejecutarse.
+    Si falla, el cambio sigue pendiente y se reintenta con una espera que se duplica en cada fallo
+    (hasta MAX_RETRY_DELAY). Lo pendiente se escribe al salir del programa o al llamar a close().
+    """
+
+    def __init__(self, write, delay=DEFAULT_WRITE_DELAY, name="write-behind"):
+        self._write = write
+        self.delay = delay
+        self.name = name
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._timer = None
+        self._dirty = False
+        self._failures = 0
+        _live_writers.add(self)
+
+    @property
+    def pending(self):
+        with self._lock:
+            return self._dirty
+
+    def schedule(self):
+        """Marca el estado como modificado; la escritura ocurrirá al cerrarse la ventana actual."""
+        with self._lock:
+            self._dirty = True
+            if self._timer is None:
+                delay = min(self.delay * 2 ** self._failures, max(self.delay, MAX_RETRY_DELAY))
+                self._timer = threading.Timer(delay, self.flush)
+                self._timer.name = self.name
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self, reschedule=True):
+        """Escribe ya lo pendiente. Devuelve True si se escribió algo."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return False
+                self._dirty = False
+            try:
+                self._write()
+            except Exception as e:
+                with self._lock:
+                    self._failures += 1
+                    failures = self._failures
+                if failures == 1:
+                    logger.error(f"Deferred write '{self.name}' failed, it will be retried: {e}", exc_info=True)
+                else:
+                    logger.warning(f"Deferred write '{self.name}' failed again ({failures} attempts): {e}")
+                if reschedule:
+                    self.schedule()
+                else:
+                    with self._lock:
+                        self._dirty = True
+                return False
+            with self._lock:
+                self._failures = 0
+            return True
+
+    def close(self):
+        """Escribe lo pendiente y deja de vigilar este escritor al salir del programa."""
+        self.flush(reschedule=False)
+        _live_writers.discard(self)
@@ -0,0 +1,174 @@
+# installerpro/utils/prefetch.py
+"""
+Prefetch en segundo plano de los proyectos registrados, como la tarea 'prefetch' de git maintenance.
+Descarga los objetos de cada remoto en refs/prefetch/ sin mover refs/remotes ni escribir FETCH_HEAD:
+el estado visible no cambia, pero el fetch o pull interactivo posterior encuentra los objetos ya en
+local y solo tiene que actualizar referencias.
+El ritmo está limitado (intervalo mínimo por repositorio y número de fetch por minuto) y el estado
+se guarda en disco, de modo que tras reiniciar se retoma donde se dejó.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+
+from installerpro.utils import fetch_scheduler, git_metadata, persistence
+from installerpro.utils.git_operations import (
+    CancellationToken, DEFAULT_FETCH_TIMEOUT, GitCancelledError, GitOperationError, is_git_repository, run_git_operation,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREFETCH_INTERVAL = 3600   # segundos entre prefetch de un mismo repositorio
+DEFAULT_MAX_PER_MINUTE = 6         # fetch lanzados como mucho en cualquier ventana de 60 s
+DEFAULT_POLL_SECONDS = 60
+MAX_BACKOFF_FACTOR = 8             # tras fallos seguidos el intervalo se duplica hasta 8 veces
+
+def prefetch_repository(local_path, cancel_token=None, timeout=DEFAULT_FETCH_TIMEOUT):
+    """
+    'git fetch <remoto> --prefetch' de cada remoto: respeta el refspec configurado (y el filtro de un
+    clon parcial) pero guarda las ramas en refs/prefetch/remotes/<remoto>/. Devuelve los remotos tratados.
+    """
+    remotes = git_metadata.list_remotes(local_path)
+    for remote in remotes:
+        run_git_operation(local_path, "prefetch", "fetch", remote, "--prefetch", "--prune", "--no-tags",
+                          "--no-write-fetch-head", "--recurse-submodules=no", "--quiet",
+                          timeout=timeout, cancel_token=cancel_token)
+    return remotes
+
+class PrefetchDaemon:
+    """
+    Planifica y ejecuta prefetch de un conjunto de proyectos en un hilo de baja prioridad.
+    El estado por proyecto ({'last_attempt', 'last_success', 'failures'}) se guarda en state_path.
+    """
+
+    def __init__(self, state_path, interval_seconds=DEFAULT_PREFETCH_INTERVAL, max_per_minute=DEFAULT_MAX_PER_MINUTE,
+                 prefetch_func=prefetch_repository, scheduler=None):
+        self.state_path = state_path
+        self.interval_seconds = interval_seconds
+        self.max_per_minute = max_per_minute
+        self._prefetch_func = prefetch_func
+        self._scheduler = scheduler or fetch_scheduler.get_scheduler()
+        self._lock = threading.Lock()
+        self._projects = set()
+        self._recent_starts = deque()
+        self._state = self._load_state()
+        self._thread = None
+        self._stop = threading.Event()
+        self._cancel_token = CancellationToken()
+
+    def _load_state(self):
+        return persistence.load_json_state(self.state_path, "prefetch state")
+
+    def _save_state(self):
+        with self._lock:
+            state = json.loads(json.dumps(self._state))
+        persistence.save_json_state(self.state_path, state, "prefetch state")
+
+    def set_projects(self, local_paths):
+        """Fija los proyectos a vigilar; se olvida el estado de los que ya no están."""
+        with self._lock:
+            self._projects = {os.path.normpath(path) for path in local_paths}
+            for key in set(self._state) - self._projects:
+                del self._state[key]
+
+    def project_state(self, local_path):
+        with self._lock:
+            return dict(self._state.get(os.path.normpath(local_path), {}))
+
+    def next_due(self, local_path):
+        """Momento (epoch) en que toca el próximo prefetch; 0 si nunca se hizo."""
+        state = self.project_state(local_path)
+        due = 0
+        if state.get('last_attempt'):
+            due = state['last_attempt'] + self.interval_seconds * min(2 ** state.get('failures', 0), MAX_BACKOFF_FACTOR)
+        # Un fetch interactivo reciente ya trajo los objetos: no hace falta otro prefetch hasta pasado el intervalo.
+        last_fetch = self._scheduler.last_fetch(local_path)
+        if last_fetch:
+            due = max(due, last_fetch + self.interval_seconds)
+        return due
+
+    def due_projects(self, now=None):
+        """Proyectos a los que les toca prefetch, del más atrasado al menos."""
+        now = time.time() if now is None else now
+        with self._lock:
+            projects = list(self._projects)
+        due = [(self.next_due(path), path) for path in projects]
+        return [path for when, path in sorted(due) if when <= now]
+
+    def _take_slot(self):
+        """Reserva un hueco en la ventana de 60 s; False si ya se alcanzó max_per_minute."""
+        if not self.max_per_minute:
+            return True
+        now = time.monotonic()
+        while self._recent_starts and now - self._recent_starts[0] >= 60:
+            self._recent_starts.popleft()
+        if len(self._recent_starts) >= self.max_per_minute:
+            return False
+        self._recent_starts.append(now)
+        return True
+
+    def run_once(self, now=None, run_exclusive=None):
+        """
+        Hace prefetch de los proyectos pendientes hasta agotar el cupo por minuto; los demás
+        quedan para la siguiente pasada. Devuelve {ruta: True/False}.
+        run_exclusive(local_path, func) permite ejecutar cada prefetch con el turno de escritura de la
+        aplicación (ver operation_queue), como el mantenimiento; por defecto se llama directamente.
+        """
+        results = {}
+        for local_path in self.due_projects(now):
+            if self._stop.is_set():
+                break
+            # Un proyecto que ya no existe no gasta cupo.
+            if not is_git_repository(local_path):
+                continue
+            if not self._take_slot():
+                break
+            started = time.time()
+            job = lambda path=local_path: self._prefetch_func(path, cancel_token=self._cancel_token)
+            try:
+                run_exclusive(local_path, job) if run_exclusive else job()
+                ok = True
+            except GitCancelledError:
+                break
+            except GitOperationError as e:
+                logger.info(f"Prefetch failed for {local_path}: {e}")
+                ok = False
+            with self._lock:
+                state = self._state.setdefault(local_path, {})
+                state['last_attempt'] = started
+                if ok:
+                    state['last_success'] = started
+                    state['failures'] = 0
+                else:
+                    state['failures'] = state.get('failures', 0) + 1
+            results[local_path] = ok
+        if results:
+            self._save_state()
+            logger.debug(f"Prefetched {sum(results.values())}/{len(results)} projects.")
+        return results
+
+    def start(self, poll_seconds=DEFAULT_POLL_SECONDS, run_exclusive=None):
+        """Arranca el hilo de prefetch, que revisa los proyectos pendientes cada poll_seconds (ver run_once)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._cancel_token = CancellationToken()
+
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    self.run_once(run_exclusive=run_exclusive)
+                except Exception as e:
+                    logger.error(f"Prefetch cycle failed: {e}", exc_info=True)
+                self._stop.wait(poll_seconds)
+
+        self._thread = threading.Thread(target=loop, name="git-prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Detiene el hilo y mata el fetch en curso, si lo hay."""
+        self._stop.set()
+        self._cancel_token.cancel()
@@ -0,0 +1,224 @@
+# installerpro/utils/project_store.py
+"""
+Almacenamiento del registro de proyectos.
+JsonProjectStore es el formato de siempre (projects.json, reescrito entero y de forma atómica).
+SqliteProjectStore, opcional (ajuste 'project_registry': "sqlite"), guarda una fila por proyecto en
+una base de datos en modo WAL con índices por ruta normalizada, nombre, estado y etiquetas: cada
+guardado escribe solo las filas que cambiaron, dentro de una transacción.
+"""
+import os
+import json
+import sqlite3
+import logging
+import threading
+
+from installerpro.utils import persistence
+
+logger = logging.getLogger(__name__)
+
+JSON_BACKEND = "json"
+SQLITE_BACKEND = "sqlite"
+SQLITE_FILENAME = "projects.sqlite3"
+
+def path_key(local_path):
+    """Clave con la que se indexa un proyecto: su ruta normalizada."""
+    return os.path.normpath(local_path)
+
+class JsonProjectStore:
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                projects = json.load(f)
+            return projects if isinstance(projects, list) else []
+        except json.JSONDecodeError:
+            return []
+
+    def save(self, projects):
+        persistence.atomic_write_json(self.path, projects)
+
+    def migrate_from_sqlite(self, db_path):
+        """
+        Exporta a projects.json el registro de SQLite si se vuelve al formato JSON y projects.json no
+        existe (se retiró al migrar a SQLite). La base de datos se renombra a '.migrated', de modo que
+        volver a SQLite importe de nuevo este fichero. Devuelve el número de proyectos exportados.
+        """
+        if os.path.exists(self.path) or not os.path.exists(db_path):
+            return 0
+        source = SqliteProjectStore(db_path)
+        try:
+            projects = source.load()
+        finally:
+            source.close()  # al cerrar la última conexión SQLite vuelca el WAL a la base de datos
+        self.save(projects)
+        os.replace(db_path, f"{db_path}.migrated")
+        for suffix in ("-wal", "-shm"):
+            try:
+                os.remove(db_path + suffix)
+            except FileNotFoundError:
+                pass
+        logger.info(f"Migrated {len(projects)} projects from {db_path} back to {self.path}.")
+        return len(projects)
+
+    def close(self):
+        pass
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    path TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT,
+    status TEXT,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_projects_name ON projects(name);
+CREATE INDEX IF NOT EXISTS idx_projects_status ON projects(status);
+CREATE TABLE IF NOT EXISTS project_tags (
+    path TEXT NOT NULL REFERENCES projects(path) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (path, tag)
+);
+CREATE INDEX IF NOT EXISTS idx_project_tags_tag ON project_tags(tag);
+"""
+
+class SqliteProjectStore:
+    """
+    Registro en SQLite. El proyecto completo se guarda como JSON en 'data'; nombre, estado,
+    borrado y etiquetas se copian a columnas indexadas para las consultas de find().
+    Una conexión compartida entre hilos, protegida por un candado.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._saved = {}  # clave -> (posición, JSON) de lo último escrito
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+
+    def load(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT path, position, data FROM projects ORDER BY position").fetchall()
+            self._saved = {path: (position, data) for path, position, data in rows}
+        return [json.loads(data) for _path, _position, data in rows]
+
+    def is_empty(self):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM projects LIMIT 1").fetchone() is None
+
+    def _write_row(self, key, position, data, project):
+        self._conn.execute(
+            "INSERT INTO projects (path, position, name, status, deleted, data) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET position=excluded.position, name=excluded.name, "
+            "status=excluded.status, deleted=excluded.deleted, data=excluded.data",
+            (key, position, project.get('name'), str(project.get('status', '')).lower(), int(bool(project.get('deleted'))), data))
+        self._conn.execute("DELETE FROM project_tags WHERE path = ?", (key,))
+        self._conn.executemany("INSERT OR IGNORE INTO project_tags (path, tag) VALUES (?, ?)",
+                               [(key, str(tag)) for tag in project.get('tags') or []])
+
+    def save(self, projects):
+        """Escribe, en una sola transacción, solo los proyectos nuevos, modificados o eliminados. Devuelve cuántas filas tocó."""
+        rows = {}
+        for position, project in enumerate(projects):
+            rows[path_key(project['local_path'])] = (position, json.dumps(project, sort_keys=True), project)
+        with self._lock:
+            changed = [(key, row) for key, row in rows.items() if self._saved.get(key) != row[:2]]
+            removed = [key for key in self._saved if key not in rows]
+            if not changed and not removed:
+                return 0
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for key, (position, data, project) in changed:
+                    self._write_row(key, position, data, project)
+                self._conn.executemany("DELETE FROM projects WHERE path = ?", [(key,) for key in removed])
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+            for key, (position, data, _project) in changed:
+                self._saved[key] = (position, data)
+            for key in removed:
+                del self._saved[key]
+        return len(changed) + len(removed)
+
+    def save_project(self, project):
+        """Actualiza (o inserta al final) un único proyecto en su propia transacción."""
+        key = path_key(project['local_path'])
+        data = json.dumps(project, sort_keys=True)
+        with self._lock:
+            position = self._saved[key][0] if key in self._saved else len(self._saved)
+            if self._saved.get(key) == (position, data):
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._write_row(key, position, data, project)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._saved[key] = (position, data)
+
+    def get(self, local_path):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM projects WHERE path = ?", (path_key(local_path),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(self, name=None, status=None, tag=None, include_deleted=False):
+        """Proyectos que cumplen todos los filtros indicados (estado sin distinguir mayúsculas), en orden de registro."""
+        query = "SELECT p.data FROM projects p"
+        clauses, params = [], []
+        if tag is not None:
+            query += " JOIN project_tags t ON t.path = p.path"
+            clauses.append("t.tag = ?"); params.append(tag)
+        if name is not None:
+            clauses.append("p.name = ?"); params.append(name)
+        if status is not None:
+            clauses.append("p.status = ?"); params.append(status.lower())
+        if not include_deleted:
+            clauses.append("p.deleted = 0")
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY p.position", params).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def migrate_from_json(self, json_path):
+        """
+        Importa projects.json si la base de datos está vacía y lo renombra a '.migrated' para que no
+        se vuelva a leer. Devuelve el número de proyectos importados.
+        """
+        if not os.path.exists(json_path) or not self.is_empty():
+            return 0
+        projects = JsonProjectStore(json_path).load()
+        self.save(projects)
+        os.replace(json_path, f"{json_path}.migrated")
+        logger.info(f"Migrated {len(projects)} projects from {json_path} to {self.db_path}.")
+        return len(projects)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def open_store(backend, data_dir, json_path):
+    """
+    Abre el almacén configurado. Al cambiar de formato se migra el registro del otro: el de SQLite
+    importa projects.json y el de JSON exporta la base de datos, así no se pierde nada en ningún sentido.
+    """
+    db_path = os.path.join(data_dir, SQLITE_FILENAME)
+    if backend == SQLITE_BACKEND:
+        store = SqliteProjectStore(db_path)
+        store.migrate_from_json(json_path)
+        return store
+    if backend != JSON_BACKEND:
+        logger.warning(f"Unknown project registry backend {backend!r}, using {JSON_BACKEND}.")
+    store = JsonProjectStore(json_path)
+    store.migrate_from_sqlite(db_path)
+    return store
@@ -0,0 +1,313 @@
+# installerpro/utils/repo_watcher.py
+"""
+Vigilancia de cambios en repositorios para invalidar estados de forma incremental.
+Sigue .git/HEAD, .git/index, .git/refs, packed-refs, FETCH_HEAD y, del árbol de trabajo, solo los
+ficheros con seguimiento y los directorios que los contienen (los ignorados, como node_modules/,
+build/ o .venv/, no se recorren ni se vigilan). Solo los proyectos que cambiaron se marcan como
+sucios y se vuelven a consultar.
+En Linux usa inotify (vía ctypes); en el resto de plataformas compara stat por sondeo.
+"""
+import os
+import sys
+import errno
+import struct
+import logging
+import threading
+
+from installerpro.utils import git_metadata, git_operations
+
+logger = logging.getLogger(__name__)
+
+# Ficheros de git_dir / common_dir cuyo cambio afecta al estado
+_GIT_STATE_FILES = ("HEAD", "index", "packed-refs", "FETCH_HEAD")
+
+# index -> (firma del index, ficheros con seguimiento, directorios que los contienen)
+_tracked_cache = {}
+_tracked_lock = threading.Lock()
+
+def _iter_dirs(top):
+    """Recorre top y sus subdirectorios (sin seguir enlaces)."""
+    for root, _dirs, _files in os.walk(top):
+        yield root
+
+def _iter_ref_dirs(common_dir):
+    return _iter_dirs(os.path.join(common_dir, "refs"))
+
+def _stat_signature(path):
+    try:
+        st = os.lstat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+def tracked_paths(local_path, git_dir):
+    """
+    (ficheros, directorios) del árbol de trabajo con seguimiento, como rutas absolutas; los directorios
+    incluyen la raíz y todos los que contienen algún fichero con seguimiento, nunca los solo ignorados.
+    Se calcula con un 'git ls-files' y se reutiliza mientras el index no cambie.
+    """
+    index_path = os.path.join(git_dir, "index")
+    try:
+        st = os.stat(index_path)
+        index_signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+    except OSError:
+        index_signature = None
+    with _tracked_lock:
+        cached = _tracked_cache.get(index_path)
+    if cached and cached[0] == index_signature:
+        return cached[1], cached[2]
+    files, parents = [], set()
+    return_code, stdout, stderr = git_operations._run_cmd_bytes(["git", "ls-files", "-z"], cwd=local_path)
+    if return_code != 0:
+        logger.debug(f"git ls-files failed in {local_path}: {stderr}")
+    else:
+        for raw in stdout.split(b"\0"):
+            if not raw:
+                continue
+            relative = os.fsdecode(raw)
+            files.append(os.path.join(local_path, relative))
+            parent = os.path.dirname(relative)
+            while parent and parent not in parents:
+                parents.add(parent)
+                parent = os.path.dirname(parent)
+    files = tuple(files)
+    dirs = [local_path] + sorted(os.path.join(local_path, parent) for parent in parents)
+    with _tracked_lock:
+        _tracked_cache[index_path] = (index_signature, files, dirs)
+    return files, dirs
+
+def snapshot(local_path):
+    """
+    Firma barata del estado de un repositorio: stat de HEAD, index, packed-refs, FETCH_HEAD, de
+    los directorios de refs, de los directorios con ficheros con seguimiento (crear, borrar o
+    renombrar ficheros cambia su mtime) y de cada fichero con seguimiento (las ediciones en sitio
+    cambian su mtime o tamaño). Es el mismo recorrido de stat que hace 'git status', sin lanzar procesos.
+    """
+    dirs = git_metadata.find_git_dirs(local_path)
+    if not dirs:
+        return None
+    git_dir, common_dir = dirs
+    signature = []
+    for base in {git_dir, common_dir}:
+        for name in _GIT_STATE_FILES:
+            signature.append((os.path.join(base, name), _stat_signature(os.path.join(base, name))))
+    for directory in _iter_ref_dirs(common_dir):
+        signature.append((directory, _stat_signature(directory)))
+    files, worktree_dirs = tracked_paths(local_path, git_dir)
+    signature.append(tuple(_stat_signature(directory) for directory in worktree_dirs))
+    signature.append(tuple(_stat_signature(path) for path in files))
+    return tuple(signature)
+
+class _Inotify:
+    """Envoltorio mínimo de inotify sobre ctypes. Lanza OSError si no está disponible."""
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    _EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        import ctypes
+        import ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._ctypes = ctypes
+        self.fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            err = self._ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def remove_watch(self, wd):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self):
+        """Devuelve una lista de (wd, mask, nombre) sin bloquear."""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            if not data:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = self._EVENT_HEADER.unpack_from(data, offset)
+                offset += self._EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", errors="replace")
+                offset += length
+                events.append((wd, mask, name))
+
+    def close(self):
+        os.close(self.fd)
+
+class RepoWatcher:
+    """
+    Registro de proyectos vigilados. collect_changed() devuelve los proyectos que cambiaron
+    desde la última llamada. Los proyectos recién registrados se consideran cambiados.
+    """
+
+    def __init__(self, use_inotify=True):
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._snapshots = {}        # proyectos en modo sondeo -> última firma
+        self._watches = {}          # proyectos en modo inotify -> {wd: directorio}
+        self._git_dirs = {}         # proyectos en modo inotify -> (git_dir, common_dir)
+        self._wd_to_project = {}
+        self._inotify = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError) as e:
+                logger.info(f"inotify not available ({e}); falling back to polling.")
+
+    @property
+    def backend(self):
+        return "inotify" if self._inotify else "polling"
+
+    def _watch_dir(self, key, directory):
+        wd = self._inotify.add_watch(directory)
+        self._watches[key][wd] = directory
+        self._wd_to_project[wd] = key
+
+    def _register_inotify(self, key):
+        dirs = git_metadata.find_git_dirs(key)
+        if not dirs:
+            raise OSError(errno.ENOENT, "not a git repository", key)
+        git_dir, common_dir = dirs
+        self._watches[key] = {}
+        self._git_dirs[key] = dirs
+        watched = set()
+        try:
+            for directory in [git_dir, common_dir, *_iter_ref_dirs(common_dir), *tracked_paths(key, git_dir)[1]]:
+                if directory not in watched:
+                    self._watch_dir(key, directory)
+                    watched.add(directory)
+        except OSError:
+            self._unregister_inotify(key)
+            raise
+
+    def _watch_tracked_dirs(self, key):
+        """Tras un cambio del index, vigila también los directorios que acaban de recibir ficheros con seguimiento."""
+        watched = set(self._watches[key].values())
+        for directory in tracked_paths(key, self._git_dirs[key][0])[1]:
+            if directory in watched:
+                continue
+            try:
+                self._watch_dir(key, directory)
+            except OSError as e:
+                logger.debug(f"Could not watch directory {directory}: {e}")
+
+    def _unregister_inotify(self, key):
+        self._git_dirs.pop(key, None)
+        for wd in self._watches.pop(key, {}):
+            self._wd_to_project.pop(wd, None)
+            try:
+                self._inotify.remove_watch(wd)
+            except OSError:
+                pass
+
+    def register(self, local_path):
+        key = os.path.normpath(local_path)
+        with self._lock:
+            if key in self._watches or key in self._snapshots:
+                return
+            self._dirty.add(key)
+            if self._inotify:
+                try:
+                    self._register_inotify(key)
+                    return
+                except OSError as e:
+                    # p. ej. se alcanzó fs.inotify.max_user_watches: este proyecto pasa a sondeo
+                    logger.warning(f"Could not watch {key} with inotify ({e}); using polling for it.")
+            self._snapshots[key] = snapshot(key)
+
+    def unregister(self, local_path):
+        key = os.path.normpath(local_path)
+        with self._lock:
+            self._dirty.discard(key)
+            self._snapshots.pop(key, None)
+            if self._inotify:
+                self._unregister_inotify(key)
+
+    def mark_dirty(self, local_path):
+        with self._lock:
+            self._dirty.add(os.path.normpath(local_path))
+
+    def registered(self):
+        with self._lock:
+            return set(self._watches) | set(self._snapshots)
+
+    def _drain_inotify(self):
+        overflow = False
+        for wd, mask, name in self._inotify.read_events():
+            if mask & _Inotify.IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            key = self._wd_to_project.get(wd)
+            if key is None:
+                continue
+            if mask & _Inotify.IN_IGNORED:
+                self._watches.get(key, {}).pop(wd, None)
+                self._wd_to_project.pop(wd, None)
+                continue
+            # Los ficheros .lock que git crea y borra alrededor de cada escritura no indican cambio por sí solos.
+            if name.endswith(".lock"):
+                continue
+            self._dirty.add(key)
+            directory = self._watches[key].get(wd, key)
+            git_dir, common_dir = self._git_dirs[key]
+            if name == "index" and directory == git_dir:
+                self._watch_tracked_dirs(key)
+            # Los directorios nuevos del árbol no se vigilan hasta que tengan ficheros con seguimiento
+            # (así no se entra en node_modules/ y similares); los de refs/ sí, para ver las ramas nuevas.
+            elif mask & _Inotify.IN_ISDIR and mask & (_Inotify.IN_CREATE | _Inotify.IN_MOVED_TO) \
+                    and directory.startswith(os.path.join(common_dir, "refs")):
+                new_dir = os.path.join(directory, name)
+                try:
+                    for new_ref_dir in _iter_dirs(new_dir):
+                        self._watch_dir(key, new_ref_dir)
+                except OSError as e:
+                    logger.debug(f"Could not watch new directory {new_dir}: {e}")
+        if overflow:
+            # Se perdieron eventos: por seguridad, todo cambió.
+            self._dirty.update(self._watches)
+
+    def collect_changed(self):
+        """Devuelve el conjunto de proyectos (rutas normalizadas) con cambios y reinicia el estado."""
+        with self._lock:
+            if self._inotify:
+                self._drain_inotify()
+            for key, previous in list(self._snapshots.items()):
+                current = snapshot(key)
+                if current != previous:
+                    self._snapshots[key] = current
+                    self._dirty.add(key)
+            changed, self._dirty = self._dirty, set()
+            return changed
+
+    def close(self):
+        with self._lock:
+            if self._inotify:
+                for key in list(self._watches):
+                    self._unregister_inotify(key)
+                self._inotify.close()
+                self._inotify = None
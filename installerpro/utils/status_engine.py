@@ -0,0 +1,77 @@
+# installerpro/utils/status_engine.py
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from installerpro.utils import git_operations
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def collect_project_status(local_path, cancel_token=None, fetch=True):
+    """
+    Obtiene estado, rama y URL remota de un único repositorio.
+    Devuelve el registro de git_operations.collect_repo_status, que incluye las claves
+    que ProjectManager guarda por proyecto ('status', 'branch', 'repo_url', 'fetched_at').
+    Con fetch=False el refresco es solo local y no toca la red.
+    """
+    return git_operations.collect_repo_status(local_path, fetch=fetch, cancel_token=cancel_token)
+
+
+def iter_project_statuses(local_paths, max_workers=DEFAULT_MAX_WORKERS, collector=collect_project_status, cancel_token=None):
+    """
+    Refresca varios repositorios en paralelo con un pool de hilos acotado.
+    Es un generador: entrega (local_path, resultado) en cuanto termina cada repositorio,
+    de modo que el tiempo total lo marca el repositorio más lento y no la suma de todos.
+    Si el collector lanza una excepción, el resultado lleva status "unknown" y la clave 'error'.
+    Con cancel_token, al cancelar se descartan los repositorios pendientes y se matan los fetch en curso
+    (el collector por defecto recibe el token; uno personalizado debe aceptar cancel_token=...).
+    """
+    local_paths = list(local_paths)
+    if not local_paths:
+        return
+    workers = max(1, min(int(max_workers or 1), len(local_paths)))
+    logger.info(f"Refreshing {len(local_paths)} repositories with {workers} workers.")
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="status-engine")
+    futures = {}
+    try:
+        if cancel_token:
+            futures = {executor.submit(collector, path, cancel_token=cancel_token): path for path in local_paths}
+            cancel_pending = lambda: [f.cancel() for f in futures]
+            cancel_token.add_callback(cancel_pending)
+        else:
+            futures = {executor.submit(collector, path): path for path in local_paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            if future.cancelled():
+                continue
+            try:
+                result = future.result()
+            except git_operations.GitCancelledError:
+                continue
+            except Exception as e:
+                logger.error(f"Status refresh failed for {path}: {e}", exc_info=True)
+                result = {'status': 'unknown', 'error': str(e)}
+            yield path, result
+    finally:
+        if cancel_token and futures:
+            cancel_token.remove_callback(cancel_pending)
+        # Si el consumidor abandona el generador, no seguimos lanzando trabajos pendientes.
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def refresh_statuses(local_paths, max_workers=DEFAULT_MAX_WORKERS, on_result=None, collector=collect_project_status, cancel_token=None):
+    """
+    Versión bloqueante de iter_project_statuses.
+    Llama a on_result(local_path, resultado) por cada repositorio terminado y
+    devuelve un diccionario {ruta normalizada: resultado}.
+    """
+    results = {}
+    for path, result in iter_project_statuses(local_paths, max_workers, collector, cancel_token):
+        results[os.path.normpath(path)] = result
+        if on_result:
+            on_result(path, result)
+    return results
@@ -1,14 +1,16 @@
 # installerpro/your_main_app.py (Versión Final, Completa y Verificada)
 import os
+import re
 import sys
 import logging
 import json
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import ttk, messagebox, filedialog, simpledialog
 import platform
 from queue import Queue, Empty
-import threading
 import shutil
+import functools
+import threading
 try:
     import git
 except ImportError:
@@ -25,8 +27,14 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from installerpro import i18n
-from installerpro.utils import git_operations
-from installerpro.ui_dialogs import AddProjectDialog, Tooltip
+from installerpro.utils import batch_commit, bulk_update, fetch_scheduler, git_async, git_metadata, git_operations, git_progress, maintenance, mirror_cache, operation_queue, perf_profiles, persistence, prefetch, project_store, repo_watcher, status_engine
+from installerpro.ui_dialogs import AddProjectDialog, BatchResultDialog, Tooltip
+
+# Ficheros cambiados que se cargan de una vez en el panel de commit
+DEFAULT_CHANGED_FILES_PAGE_SIZE = 500
+# iids especiales del árbol de ficheros: fila "Cargar más" y marcador de directorio sin desplegar
+_LOAD_MORE_PREFIX = "__load_more__"
+_PLACEHOLDER_PREFIX = "__placeholder__"
 
 # ==============================================================================
 # CLASE ConfigManager
@@ -49,11 +57,13 @@ class ConfigManager:
         self.config_file_path = os.path.join(self.user_config_dir, "config.json")
         self.projects_file_path = os.path.join(self.user_data_dir, "projects.json")
         self._config_data = {}
+        self._lock = threading.Lock()  # set_setting frente al hilo que escribe config.json
+        self._writer = persistence.WriteBehind(self._write_config, name="config-writer")
         self._load_config()
 
     def _get_default_config(self):
         default_base_folder = os.path.join(os.path.expanduser("~"), 'Workspace')
-        return {'base_folder': os.path.abspath(os.path.normpath(default_base_folder)), 'language': 'system'}
+        return {'base_folder': os.path.abspath(os.path.normpath(default_base_folder)), 'language': 'system', 'refresh_workers': status_engine.DEFAULT_MAX_WORKERS, 'fetch_ttl_seconds': fetch_scheduler.DEFAULT_FETCH_TTL, 'bulk_update_workers': bulk_update.DEFAULT_MAX_WORKERS, 'bulk_update_per_host': bulk_update.DEFAULT_PER_HOST_LIMIT, 'mirror_cache_enabled': True, 'mirror_cache_dissociate': True, 'mirror_refresh_seconds': mirror_cache.DEFAULT_REFRESH_INTERVAL, 'prefetch_enabled': True, 'prefetch_interval_seconds': prefetch.DEFAULT_PREFETCH_INTERVAL, 'prefetch_max_per_minute': prefetch.DEFAULT_MAX_PER_MINUTE, 'maintenance_enabled': False, 'maintenance_measure_status': False, 'maintenance_budget_seconds': maintenance.DEFAULT_BUDGET_SECONDS, 'maintenance_pack_threads': maintenance.DEFAULT_PACK_THREADS, 'project_registry': project_store.JSON_BACKEND, 'save_delay_seconds': persistence.DEFAULT_WRITE_DELAY}
 
     def _load_config(self):
         if os.path.exists(self.config_file_path):
@@ -71,20 +81,27 @@ class ConfigManager:
             self._save_config()
 
     def _save_config(self):
-        try:
-            with open(self.config_file_path, 'w', encoding='utf-8') as f:
-                json.dump(self._config_data, f, indent=4)
-            logger.info(f"Configuration saved to: {self.config_file_path}")
-        except IOError as e:
-            logger.error(f"Error saving config: {e}")
+        # Los cambios seguidos (p. ej. varios ajustes desde un diálogo) se escriben juntos.
+        self._writer.schedule()
+
+    def _write_config(self):
+        # Los errores se propagan: WriteBehind los registra y deja el cambio pendiente para reintentarlo.
+        with self._lock:
+            snapshot = json.loads(json.dumps(self._config_data))
+        persistence.atomic_write_json(self.config_file_path, snapshot)
+        logger.info(f"Configuration saved to: {self.config_file_path}")
+
+    def flush(self):
+        self._writer.flush()
 
     def get_setting(self, key, default=None):
         return self._config_data.get(key, default)
 
     def set_setting(self, key, value):
-        if self.get_setting(key) != value:
+        with self._lock:
+            if self._config_data.get(key) == value: return
             self._config_data[key] = value
-            self._save_config()
+        self._save_config()
 
     def get_base_folder(self):
         return self.get_setting('base_folder', self._get_default_config()['base_folder'])
@@ -105,55 +122,154 @@ class ProjectManager:
         self.config_manager = config_manager
         self.projects_file_path = self.config_manager.projects_file_path
         self.base_folder = self.config_manager.get_base_folder()
+        fetch_scheduler.get_scheduler().ttl_seconds = self.config_manager.get_setting('fetch_ttl_seconds', fetch_scheduler.DEFAULT_FETCH_TTL)
+        fetch_scheduler.get_scheduler().set_state_path(os.path.join(self.config_manager.user_data_dir, "fetch_state.json"))
         self.projects = []
+        self._path_index = {}
+        self._worktree_index = {}
+        # Protege self.projects y sus registros frente al hilo que los escribe a disco.
+        self._lock = threading.RLock()
+        self.store = project_store.open_store(self.config_manager.get_setting('project_registry', project_store.JSON_BACKEND),
+                                              self.config_manager.user_data_dir, self.projects_file_path)
+        self._writer = persistence.WriteBehind(self._write_projects, delay=self.config_manager.get_setting('save_delay_seconds', persistence.DEFAULT_WRITE_DELAY), name="projects-writer")
+        self.watcher = repo_watcher.RepoWatcher(use_inotify=self.config_manager.get_setting('use_inotify', True))
+        self.mirror_cache = None
+        if self.config_manager.get_setting('mirror_cache_enabled', True):
+            cache_dir = self.config_manager.get_setting('mirror_cache_dir') or os.path.join(self.config_manager.user_data_dir, "mirrors")
+            self.mirror_cache = mirror_cache.MirrorCache(cache_dir)
+        self.prefetcher = None
+        if self.config_manager.get_setting('prefetch_enabled', True):
+            self.prefetcher = prefetch.PrefetchDaemon(
+                os.path.join(self.config_manager.user_data_dir, "prefetch_state.json"),
+                interval_seconds=self.config_manager.get_setting('prefetch_interval_seconds', prefetch.DEFAULT_PREFETCH_INTERVAL),
+                max_per_minute=self.config_manager.get_setting('prefetch_max_per_minute', prefetch.DEFAULT_MAX_PER_MINUTE),
+            )
+        self.maintenance = None
+        # Opcional: reempaqueta y escribe commit-graph/midx en los repositorios del usuario.
+        if self.config_manager.get_setting('maintenance_enabled', False):
+            self.maintenance = maintenance.MaintenanceScheduler(
+                os.path.join(self.config_manager.user_data_dir, "maintenance_state.json"),
+                budget_seconds=self.config_manager.get_setting('maintenance_budget_seconds', maintenance.DEFAULT_BUDGET_SECONDS),
+                pack_threads=self.config_manager.get_setting('maintenance_pack_threads', maintenance.DEFAULT_PACK_THREADS),
+                measure_status=self.config_manager.get_setting('maintenance_measure_status', False),
+            )
         self._load_projects()
         logger.info(f"ProjectManager initialized with base folder: {self.base_folder}")
 
     def _load_projects(self):
-        if os.path.exists(self.projects_file_path):
-            try:
-                with open(self.projects_file_path, 'r', encoding='utf-8') as f: self.projects = json.load(f)
-            except json.JSONDecodeError: self.projects = []
-        else: self.projects = []
-        self.refresh_project_statuses()
+        self.projects = self.store.load()
+        self._reindex()
+        # Antes del primer git sobre los repositorios (este refresco, prefetch, mantenimiento), en este mismo hilo.
+        self.preflight_safe_directories()
+        # Al arrancar basta con el estado local; la red se consulta al pulsar "Refrescar".
+        self.refresh_project_statuses(fetch=False)
+
+    def _reindex(self):
+        """Índices ruta normalizada -> proyecto y ruta de worktree -> proyecto dueño, para búsquedas O(1)."""
+        self._path_index = {project_store.path_key(p['local_path']): p for p in self.projects}
+        self._worktree_index = {project_store.path_key(w['local_path']): p for p in self.projects for w in p.get('worktrees', [])}
 
     def _save_projects(self):
-        with open(self.projects_file_path, 'w', encoding='utf-8') as f: json.dump(self.projects, f, indent=4)
+        """Los índices se actualizan al momento; el disco se escribe poco después, una vez por ráfaga de cambios."""
+        self._reindex()
+        self._writer.schedule()
+
+    def _write_projects(self):
+        # Copia bajo el candado: los refrescos siguen modificando los proyectos mientras se escribe.
+        with self._lock:
+            snapshot = json.loads(json.dumps(self.projects))
+        self.store.save(snapshot)
+
+    def flush(self):
+        """Escribe ya los cambios pendientes del registro de proyectos."""
+        self._writer.flush()
+
+    def _save_project(self, project):
+        """
+        Guarda un único proyecto ya registrado: con SQLite es una transacción de una fila.
+        Los worktrees no tienen fila propia; se guarda el proyecto dueño, que los contiene.
+        """
+        save_project = getattr(self.store, 'save_project', None)
+        if save_project is None: return self._save_projects()
+        key = project_store.path_key(project['local_path'])
+        with self._lock:
+            if key not in self._path_index and key in self._worktree_index:
+                project = self._worktree_index[key]
+            save_project(project)
+            self._reindex()
 
     def get_projects(self):
         return [p for p in self.projects if not p.get('deleted', False)]
 
     def get_project_by_path(self, local_path):
+        """Proyecto (o worktree de un proyecto, ver get_worktree_owner) con esa ruta, o None."""
         if not local_path: return None
-        for p in self.projects:
-            if os.path.normpath(p['local_path']) == os.path.normpath(local_path): return p
+        key = project_store.path_key(local_path)
+        if key in self._path_index: return self._path_index[key]
+        owner = self.get_worktree_owner(local_path)
+        if owner:
+            return next(w for w in owner['worktrees'] if project_store.path_key(w['local_path']) == key)
         return None
 
-    def add_project(self, name, repo_url, local_path_full, branch):
-        git_operations.clone_repository(repo_url, local_path_full, branch)
+    def get_worktree_owner(self, worktree_path):
+        """Proyecto del que worktree_path es un worktree enlazado, o None."""
+        owner = self._worktree_index.get(project_store.path_key(worktree_path))
+        return owner if owner and not owner.get('deleted', False) else None
+
+    def find_projects(self, name=None, status=None, tag=None):
+        """Proyectos activos que cumplen los filtros (con SQLite, consulta indexada)."""
+        find = getattr(self.store, 'find', None)
+        if find is not None:
+            self._writer.flush()  # la consulta va a disco: primero lo que aún no se ha escrito
+            return [self._path_index.get(project_store.path_key(p['local_path']), p) for p in find(name=name, status=status, tag=tag)]
+        return [p for p in self.get_projects()
+                if (name is None or p.get('name') == name)
+                and (status is None or str(p.get('status', '')).lower() == status.lower())
+                and (tag is None or tag in (p.get('tags') or []))]
+
+    def add_project(self, name, repo_url, local_path_full, branch, on_progress=None, clone_options=None, perf_profile=None):
+        """
+        clone_options: {'depth', 'filter', 'single_branch'} (ver git_operations.clone_options_to_args).
+        perf_profile: nombre o diccionario de perf_profiles, aplicado nada más clonar. Ambos se guardan con el proyecto.
+        """
+        profile = perf_profiles.resolve_profile(perf_profile)
+        reference = None
+        if self.mirror_cache:
+            reference = self.mirror_cache.reference_for(repo_url, on_progress=git_progress.bind_progress(on_progress, os.path.normpath(local_path_full), "mirror"), clone_options=clone_options)
+        git_operations.clone_repository(repo_url, local_path_full, branch, on_progress=on_progress, clone_options=clone_options,
+                                        reference=reference, dissociate=self.config_manager.get_setting('mirror_cache_dissociate', True),
+                                        sparse=bool(profile.get('sparse_paths')))
+        if profile: perf_profiles.apply_profile(local_path_full, profile)
         new_project = {"name": name, "local_path": local_path_full, "repo_url": repo_url, "branch": branch, "status": "Clean", "deleted": False}
-        self.projects.append(new_project)
-        self._save_projects()
+        if clone_options: new_project['clone_options'] = clone_options
+        if profile: new_project['perf_profile'] = profile
+        with self._lock: self.projects.append(new_project)
+        self._save_project(new_project)
         self.refresh_project_statuses()
         return new_project
 
     def remove_project(self, local_path, permanent=False):
+        """Borrado lógico (o definitivo, con sus worktrees). Si local_path es un worktree, se elimina el worktree."""
+        if self.get_worktree_owner(local_path): return self.remove_worktree(local_path, force=permanent)
         project = self.get_project_by_path(local_path)
         if not project: raise ProjectNotFoundError(f"Project not found: {local_path}")
         if permanent:
+            for worktree in project.get('worktrees', []): git_operations.remove_worktree(local_path, worktree['local_path'], force=True)
             if os.path.exists(local_path): shutil.rmtree(local_path)
-            self.projects = [p for p in self.projects if os.path.normpath(p['local_path']) != os.path.normpath(local_path)]
-        else: project['deleted'] = True
-        self._save_projects()
+            with self._lock: self.projects = [p for p in self.projects if os.path.normpath(p['local_path']) != os.path.normpath(local_path)]
+            self._save_projects()
+        else:
+            with self._lock: project['deleted'] = True
+            self._save_project(project)
 
     def set_base_folder(self, folder_path):
         self.base_folder = os.path.abspath(folder_path)
         logger.info(f"ProjectManager base folder updated to: {self.base_folder}")
 
-    def scan_base_folder(self):
+    def scan_base_folder(self, read_slot=None):
         logger.info(f"Scanning base folder for new Git repositories: {self.base_folder}")
         found_count = 0
-        existing_paths = {os.path.normpath(p['local_path']) for p in self.projects}
+        existing_paths = set(self._path_index)
         for item in os.listdir(self.base_folder):
             repo_path = os.path.join(self.base_folder, item)
             if os.path.isdir(repo_path) and git_operations.is_git_repository(repo_path):
@@ -161,24 +277,138 @@ class ProjectManager:
                     try:
                         name = os.path.basename(repo_path)
                         new_project = {"name": name, "local_path": repo_path, "repo_url": "N/A", "branch": "N/A", "status": "Unknown", "deleted": False}
-                        self.projects.append(new_project)
+                        with self._lock: self.projects.append(new_project)
                         found_count += 1
                     except Exception as e:
                         logger.warning(f"Could not process {repo_path} during scan: {e}", exc_info=True)
         if found_count > 0: self._save_projects()
-        self.refresh_project_statuses()
+        self.preflight_safe_directories()
+        self.refresh_project_statuses(read_slot=read_slot)
         return found_count
 
-    def refresh_project_statuses(self):
-        logger.info("Refreshing all project data...")
-        something_changed = False
+    def preflight_safe_directories(self):
+        """
+        Registra en safe.directory, de una vez, los proyectos (y worktrees) de otro propietario, para que
+        las operaciones en bloque no tengan que fallar por 'dubious ownership' y reintentar. Devuelve las rutas añadidas.
+        """
+        paths = [p['local_path'] for p in self.get_projects()]
+        paths += [w['local_path'] for p in self.get_projects() for w in p.get('worktrees', [])]
+        try:
+            return git_operations.ensure_safe_directories(paths)
+        except git_operations.GitOperationError as e:
+            logger.warning(f"safe.directory preflight failed: {e}")
+            return []
+
+    def default_worktree_path(self, local_path, branch):
+        """<proyecto>.worktrees/<rama>, junto a la carpeta del proyecto (fuera de ella, para que git no la vea)."""
+        return os.path.join(f"{os.path.normpath(local_path)}.worktrees", re.sub(r"[^A-Za-z0-9._-]", "-", branch))
+
+    def refresh_worktrees(self, local_paths=None):
+        """
+        Sincroniza project['worktrees'] con los worktrees registrados en git (también los creados fuera
+        de InstallerPro). Solo lee .git, sin lanzar procesos. Devuelve True si algo cambió.
+        """
+        targets = None if local_paths is None else {os.path.normpath(path) for path in local_paths}
+        changed = False
         for project in self.get_projects():
+            if targets is not None and os.path.normpath(project['local_path']) not in targets: continue
+            existing = {os.path.normpath(w['local_path']): w for w in project.get('worktrees', [])}
+            records = []
+            for info in git_metadata.list_worktrees(project['local_path']):
+                if info['prunable']: continue
+                record = existing.get(info['path'])
+                if record is None:
+                    record = {"name": "", "local_path": info['path'], "repo_url": project.get('repo_url'), "branch": None, "status": "Unknown", "deleted": False}
+                    changed = True
+                if record['branch'] != info['branch']:
+                    record['branch'], record['name'] = info['branch'], f"{project['name']} [{info['branch']}]"
+                    changed = True
+                records.append(record)
+            changed = changed or len(records) != len(existing)
+            with self._lock:
+                if records: project['worktrees'] = records
+                else: project.pop('worktrees', None)
+        if changed: self._save_projects()
+        return changed
+
+    def add_worktree(self, local_path, branch, worktree_path=None, new_branch=None):
+        """
+        Crea un worktree del proyecto para 'branch' (por defecto en default_worktree_path) y lo refresca.
+        new_branch=None crea la rama solo si no existe ni en local ni en un remoto. Devuelve el registro del worktree.
+        """
+        project = self.get_project_by_path(local_path)
+        if not project or self.get_worktree_owner(local_path): raise ProjectNotFoundError(f"Project not found: {local_path}")
+        worktree_path = os.path.normpath(worktree_path or self.default_worktree_path(local_path, branch))
+        if new_branch is None:
+            known = set(git_metadata.list_refs(local_path, "refs/heads/")) | {ref.split("/", 3)[-1] for ref in git_metadata.list_refs(local_path, "refs/remotes/")}
+            new_branch = f"refs/heads/{branch}" not in known and branch not in known
+        git_operations.add_worktree(local_path, worktree_path, branch, new_branch=new_branch)
+        self.refresh_worktrees([local_path])
+        self.refresh_project_statuses(fetch=False, local_paths=[worktree_path])
+        return self.get_project_by_path(worktree_path)
+
+    def remove_worktree(self, worktree_path, force=False):
+        owner = self.get_worktree_owner(worktree_path)
+        if not owner: raise ProjectNotFoundError(f"Worktree not found: {worktree_path}")
+        git_operations.remove_worktree(owner['local_path'], worktree_path, force=force)
+        self.refresh_worktrees([owner['local_path']])
+
+    def _sync_watcher(self, projects_by_path):
+        registered = self.watcher.registered()
+        for local_path in projects_by_path.keys() - registered: self.watcher.register(local_path)
+        for local_path in registered - projects_by_path.keys(): self.watcher.unregister(local_path)
+
+    def refresh_project_statuses(self, on_project_refreshed=None, cancel_token=None, fetch=True, only_changed=False, local_paths=None, read_slot=None):
+        """
+        Refresca estado, rama y URL de todos los proyectos en paralelo.
+        on_project_refreshed(project) se llama en cuanto termina cada proyecto.
+        cancel_token (git_operations.CancellationToken) permite abortar el refresco.
+        fetch=False hace un refresco solo local; con fetch=True los fetch respetan el TTL configurado.
+        only_changed=True consulta solo los proyectos que el RepoWatcher vio cambiar (útil con fetch=False).
+        local_paths limita el refresco a esos proyectos; los cambios vistos en los demás quedan pendientes.
+        read_slot(local_path) devuelve un context manager que reserva el repositorio mientras se consulta
+        (ver operation_queue.OperationScheduler.slot), para no esperar a las escrituras de otros repositorios.
+        """
+        logger.info("Refreshing all project data..." if local_paths is None else f"Refreshing {len(local_paths)} project(s)...")
+        something_changed = self.refresh_worktrees()
+        projects_by_path = {os.path.normpath(p['local_path']): p for p in self.get_projects()}
+        # Los worktrees comparten objetos y refs con su proyecto: prefetch y mantenimiento solo en el principal.
+        if self.prefetcher: self.prefetcher.set_projects(projects_by_path)
+        if self.maintenance: self.maintenance.set_projects(projects_by_path)
+        for project in list(projects_by_path.values()):
+            projects_by_path.update((os.path.normpath(w['local_path']), w) for w in project.get('worktrees', []))
+        self._sync_watcher(projects_by_path)
+        changed_paths = self.watcher.collect_changed()
+        if local_paths is not None:
+            targets = {os.path.normpath(path) for path in local_paths}
+            for local_path in changed_paths - targets: self.watcher.mark_dirty(local_path)
+            projects_by_path = {path: p for path, p in projects_by_path.items() if path in targets}
+        if only_changed:
+            projects_by_path = {path: p for path, p in projects_by_path.items() if path in changed_paths}
+            if not projects_by_path:
+                logger.debug("No project changed since the last refresh.")
+                return
+        pending_paths = set(projects_by_path)
+        max_workers = self.config_manager.get_setting('refresh_workers', status_engine.DEFAULT_MAX_WORKERS)
+        collector = functools.partial(status_engine.collect_project_status, fetch=fetch)
+        if read_slot is not None:
+            collect_unlocked = collector
+            def collector(local_path, **kwargs):
+                with read_slot(local_path): return collect_unlocked(local_path, **kwargs)
+        for local_path, result in status_engine.iter_project_statuses(projects_by_path.keys(), max_workers, collector, cancel_token):
+            project = projects_by_path[local_path]
+            pending_paths.discard(local_path)
             old_status, old_branch, old_url = project.get('status'), project.get('branch'), project.get('repo_url')
-            project['status'] = git_operations.get_repo_status(project['local_path'])
-            project['branch'] = git_operations.get_repo_current_branch(project['local_path'])
-            project['repo_url'] = git_operations.get_repo_remote_url(project['local_path'])
+            with self._lock:
+                project['status'] = result.get('status', 'unknown')
+                project['branch'] = result.get('branch', old_branch)
+                project['repo_url'] = result.get('repo_url', old_url)
+                if result.get('fetched_at'): project['fetched_at'] = result['fetched_at']
             if (project['status'] != old_status or project['branch'] != old_branch or project['repo_url'] != old_url):
                 something_changed = True
+            if on_project_refreshed: on_project_refreshed(project)
+        # Si el refresco se canceló, lo que no se llegó a consultar sigue pendiente para la próxima vez.
+        for local_path in pending_paths: self.watcher.mark_dirty(local_path)
         if something_changed:
             logger.info("Project data has changed, saving updates.")
             self._save_projects()
@@ -187,22 +417,135 @@ class ProjectManager:
 
     def get_changed_files_for_project(self, local_path):
         return git_operations.get_changed_files(local_path)
+
+    def open_changed_files_pager(self, local_path, pathspecs=None, untracked="normal"):
+        """Paginador de ficheros cambiados (git_operations.ChangedFilesPager) con el tamaño de página configurado."""
+        if not self.get_project_by_path(local_path): raise ProjectNotFoundError(f"Project not found: {local_path}")
+        page_size = self.config_manager.get_setting('changed_files_page_size', DEFAULT_CHANGED_FILES_PAGE_SIZE)
+        return git_operations.ChangedFilesPager(local_path, page_size=page_size, pathspecs=pathspecs, untracked=untracked)
     
-    def commit_project_changes(self, local_path, files_to_stage, commit_message):
-        git_operations.stage_files(local_path, files_to_stage)
+    def commit_project_changes(self, local_path, files_to_stage, commit_message, files_to_unstage=None, on_progress=None):
+        """
+        Hace commit exactamente de files_to_stage (rutas o directorios 'dir/' marcados).
+        files_to_unstage: ficheros que estaban en el índice pero el usuario desmarcó; se sacan antes del commit.
+        Cualquier otro fichero preparado que no esté marcado (p. ej. de páginas del panel que no se
+        llegaron a cargar) también se saca del índice, para que el commit no incluya nada no elegido.
+        """
+        if files_to_unstage: git_operations.unstage_files(local_path, files_to_unstage, on_progress=on_progress)
+        git_operations.stage_files(local_path, files_to_stage, on_progress=on_progress)
+        git_operations.unstage_unselected(local_path, files_to_stage, on_progress=on_progress)
         commit_result = git_operations.commit_changes(local_path, commit_message)
-        self.refresh_project_statuses()
+        self.refresh_project_statuses(fetch=False, local_paths=[local_path])
         return commit_result
+
+    def commit_and_push_projects(self, local_paths, commit_message, push=True, on_result=None, cancel_token=None):
+        """
+        Hace commit con el mismo mensaje de lo preparado en varios proyectos y los publica en paralelo.
+        Después refresca (sin red) solo los proyectos tocados. Devuelve el informe de
+        batch_commit.run_commit_and_push; results_table(report) lo convierte en filas para mostrar.
+        """
+        jobs = []
+        for local_path in local_paths:
+            project = self.get_project_by_path(local_path)
+            if project is None: raise ProjectNotFoundError(f"Project not found: {local_path}")
+            jobs.append(project)
+        report = batch_commit.run_commit_and_push(
+            jobs, commit_message, push=push,
+            max_workers=self.config_manager.get_setting('bulk_update_workers', bulk_update.DEFAULT_MAX_WORKERS),
+            per_host_limit=self.config_manager.get_setting('bulk_update_per_host', bulk_update.DEFAULT_PER_HOST_LIMIT),
+            on_result=on_result, cancel_token=cancel_token,
+        )
+        touched = [path for path, result in report['results'].items() if result['action'] != batch_commit.NOTHING_TO_DO]
+        if touched: self.refresh_project_statuses(fetch=False, local_paths=touched)
+        return report
+
+    def scan_staged_for_secrets(self, local_paths):
+        """Busca secretos en el contenido preparado (índice) de cada proyecto. Devuelve {ruta: hallazgos} solo de los que tienen alguno."""
+        from installerpro.core import security_analyzer
+        findings_by_path = {}
+        for local_path in local_paths:
+            staged = [f['path'] for f in git_operations.iter_changed_files(local_path, untracked="no") if f['staged'] and f['status'] != 'deleted']
+            findings = security_analyzer.scan_files_for_secrets(staged, local_path, revision="") if staged else []
+            if findings: findings_by_path[os.path.normpath(local_path)] = findings
+        return findings_by_path
+
+    def results_table(self, report):
+        """Filas (nombre, ruta, acción, commit corto, estado, error) de un informe de commit y push, en orden de nombre."""
+        rows = []
+        for local_path, result in report['results'].items():
+            project = self.get_project_by_path(local_path) or {}
+            commit = (result.get('commit') or '')[:7]
+            rows.append((project.get('name', os.path.basename(local_path)), local_path, result['action'] or '', commit, project.get('status', ''), result['error'] or ''))
+        return sorted(rows, key=lambda row: row[0].lower())
     
-    def update_project(self, local_path, branch):
-        return git_operations.pull_repository(local_path, branch)
+    def update_project(self, local_path, branch, on_progress=None):
+        return git_operations.pull_repository(local_path, branch, on_progress=on_progress)
+
+    def hydrate_project(self, local_path, on_progress=None):
+        """Completa un clon superficial/parcial/de una rama y quita sus clone_options para futuros clones."""
+        project = self.get_project_by_path(local_path)
+        if not project: raise ProjectNotFoundError(f"Project not found: {local_path}")
+        steps = git_operations.hydrate_repository(local_path, on_progress=on_progress)
+        with self._lock: had_options = project.pop('clone_options', None) is not None
+        if had_options: self._save_project(project)
+        return steps
+
+    def set_project_profile(self, local_path, perf_profile, runs=5):
+        """
+        Aplica (y guarda) un perfil de rendimiento en un proyecto existente, midiendo 'git status' antes y después.
+        Devuelve {'applied': {ajuste: bool}, 'verified': {ajuste: bool}, 'before': s, 'after': s}.
+        """
+        project = self.get_project_by_path(local_path)
+        if not project: raise ProjectNotFoundError(f"Project not found: {local_path}")
+        profile = perf_profiles.resolve_profile(perf_profile)
+        before = perf_profiles.time_status(local_path, runs)
+        applied = perf_profiles.apply_profile(local_path, profile)
+        after = perf_profiles.time_status(local_path, runs)
+        # Se suma al perfil guardado (p. ej. sparse_paths elegidos al clonar); lo que este sistema
+        # no admite (fsmonitor en Linux) no se guarda.
+        stored = dict(project.get('perf_profile') or {})
+        stored.update((setting, value) for setting, value in profile.items() if applied.get(setting))
+        for setting in profile:
+            if not applied.get(setting): stored.pop(setting, None)
+        with self._lock: project['perf_profile'] = stored
+        self._save_project(project)
+        verified = perf_profiles.verify_profile(local_path, project['perf_profile'])
+        return {'applied': applied, 'verified': verified, 'before': before, 'after': after}
+
+    def update_projects(self, local_paths, on_result=None, on_progress=None, cancel_token=None):
+        """
+        Clona (si falta la carpeta) o actualiza varios proyectos en paralelo, con límites global y por host.
+        on_result(project, result) se llama al terminar cada uno. Devuelve el informe de bulk_update.run_bulk_update.
+        """
+        jobs = []
+        for local_path in local_paths:
+            project = self.get_project_by_path(local_path)
+            if project is None: raise ProjectNotFoundError(f"Project not found: {local_path}")
+            jobs.append(project)
+        report = bulk_update.run_bulk_update(
+            jobs,
+            max_workers=self.config_manager.get_setting('bulk_update_workers', bulk_update.DEFAULT_MAX_WORKERS),
+            per_host_limit=self.config_manager.get_setting('bulk_update_per_host', bulk_update.DEFAULT_PER_HOST_LIMIT),
+            on_result=on_result, cancel_token=cancel_token, on_progress=on_progress,
+            mirror_cache=self.mirror_cache, dissociate=self.config_manager.get_setting('mirror_cache_dissociate', True),
+        )
+        for local_path in report['results']: self.watcher.mark_dirty(local_path)
+        self.refresh_project_statuses(fetch=False, only_changed=True)
+        return report
         
     def push_project(self, local_path):
         return git_operations.push_repository(local_path)
 
+    async def push_project_async(self, local_path):
+        return await git_async.run_git_operation_async(local_path, "push", "push")
+
 # ==============================================================================
 # CLASE PRINCIPAL DE LA APLICACIÓN
 # ==============================================================================
+# Clave del planificador para lo que modifica el registro de proyectos en bloque (refrescos, escaneo):
+# esas operaciones no se solapan entre sí, y cada repositorio se reserva solo mientras se consulta.
+PROJECT_REGISTRY_KEY = "<project-registry>"
+
 class InstallerProApp:
     def __init__(self, master):
         self.master = master
@@ -220,10 +563,25 @@ class InstallerProApp:
         self.t = i18n.t
         
         self.staged_files = {}
+        self._index_staged_files = set()  # ficheros que ya estaban en el índice al cargar el panel
+        self._file_pagers = {}
         self.task_queue = Queue()
+        self.async_loop = git_async.BackgroundEventLoop()
+        self.operation_scheduler = operation_queue.OperationScheduler(self.config_manager.get_setting('operation_workers', operation_queue.DEFAULT_MAX_WORKERS))
+        self.refresh_cancel_token = git_operations.CancellationToken()
         self._setup_ui() # <- Llamada que fallaba antes
         self.update_ui_texts()
         self.master.after(100, self._process_task_queue)
+        self.progress_tracker = git_progress.ProgressTracker()
+        self.master.after(250, self._render_git_progress)
+        self._schedule_auto_refresh()
+        if self.project_manager.mirror_cache:
+            self.project_manager.mirror_cache.start_background_refresh(self.config_manager.get_setting('mirror_refresh_seconds', mirror_cache.DEFAULT_REFRESH_INTERVAL))
+        # Prefetch y mantenimiento usan el turno de escritura de cada repositorio: nunca a la vez que un pull o un commit.
+        run_exclusive = lambda path, job: self.operation_scheduler.submit([path], job).result()
+        if self.project_manager.prefetcher: self.project_manager.prefetcher.start(run_exclusive=run_exclusive)
+        if self.project_manager.maintenance:
+            self.project_manager.maintenance.start(run_exclusive=run_exclusive)
         
         self.logger.info("InstallerPro - Git Project Manager started.")
         self.master.deiconify()
@@ -295,7 +653,9 @@ class InstallerProApp:
         
         self.files_tree.column("#0", width=50, anchor="center", stretch=False); self.files_tree.column("status", width=100, anchor="w", stretch=False); self.files_tree.column("path", width=450, anchor="w")
         self.files_tree.tag_configure('unchecked', foreground='gray', font=('Segoe UI Symbol', 11)); self.files_tree.tag_configure('checked', foreground='#007ACC', font=('Segoe UI Symbol', 11))
+        self.files_tree.tag_configure('load_more', foreground='gray')
         self.files_tree.bind('<Button-1>', self._toggle_file_stage_status)
+        self.files_tree.bind('<<TreeviewOpen>>', self._on_files_tree_open)
         
         self.commit_action_frame = ttk.Frame(self.commit_pane); self.commit_action_frame.grid(row=2, column=0, sticky='ew', pady=(5, 0)); self.commit_action_frame.columnconfigure(0, weight=1)
         commit_message_container = ttk.LabelFrame(self.commit_action_frame); commit_message_container.grid(row=0, column=0, sticky='nsew', padx=(0, 5)); commit_message_container.columnconfigure(0, weight=1)
@@ -305,11 +665,14 @@ class InstallerProApp:
         self.commit_button = ttk.Button(commit_buttons_frame, command=self._perform_commit); self.commit_button.pack(fill=tk.X, padx=5, pady=2)
 
         self.buttons_frame = ttk.Frame(self.main_frame); self.buttons_frame.grid(row=1, column=0, sticky="ew", pady=(5,0))
-        button_map = {"add": self._add_project, "remove": self._remove_project, "update": self._update_project, "scan_base_folder": self._scan_base_folder, "push": self._push_project, "refresh_status": self._refresh_all_statuses}
+        button_map = {"add": self._add_project, "remove": self._remove_project, "update": self._update_project, "scan_base_folder": self._scan_base_folder, "push": self._push_project, "commit_push": self._commit_and_push_selected, "hydrate": self._hydrate_project, "optimize": self._optimize_project, "worktree": self._add_worktree, "refresh_status": self._refresh_all_statuses}
         for key, command in button_map.items():
             button = ttk.Button(self.buttons_frame, command=command); button.pack(side=tk.LEFT, padx=5, pady=5); setattr(self, f"{key}_button", button)
         self.help_button = ttk.Button(self.buttons_frame, command=self._show_help); self.help_button.pack(side=tk.RIGHT, padx=5, pady=5)
         self.base_folder_label = ttk.Label(self.main_frame, text=""); self.base_folder_label.grid(row=2, column=0, sticky="ew", padx=5, pady=(5,0))
+        progress_frame = ttk.Frame(self.main_frame); progress_frame.grid(row=3, column=0, sticky="ew", padx=5, pady=(2,0)); progress_frame.columnconfigure(1, weight=1)
+        self.git_progress_bar = ttk.Progressbar(progress_frame, length=200, mode="determinate", maximum=100); self.git_progress_bar.grid(row=0, column=0, sticky="w")
+        self.git_progress_label = ttk.Label(progress_frame, text=""); self.git_progress_label.grid(row=0, column=1, sticky="ew", padx=(5,0))
 
     def _populate_language_menu(self):
         self.lang_menu.delete(0, tk.END)
@@ -325,7 +688,7 @@ class InstallerProApp:
         column_map = {"name": ("Project Name Column", 150), "path": ("Local Path Column", 250), "url": ("Repository URL Column", 250), "branch": ("Branch Column", 100), "status": ("Status Column", 100)}
         for col, (key, width) in column_map.items():
             self.tree.heading(col, text=self.t(key)); self.tree.column(col, width=width, minwidth=int(width*0.5))
-        button_keys = ["add", "remove", "update", "scan_base_folder", "push", "refresh_status", "help"]
+        button_keys = ["add", "remove", "update", "scan_base_folder", "push", "commit_push", "hydrate", "optimize", "worktree", "refresh_status", "help"]
         for key in button_keys:
             button = getattr(self, f"{key}_button", None)
             if button: button.config(text=self.t(f"button.{key}"))
@@ -351,6 +714,23 @@ class InstallerProApp:
         except Empty: pass
         finally: self.master.after(100, self._process_task_queue)
 
+    def _render_git_progress(self):
+        """Pinta el progreso de clone/pull en curso leyendo el ProgressTracker (no un evento por línea de git)."""
+        try:
+            latest = self.progress_tracker.snapshot()
+            if not latest:
+                self.git_progress_bar["value"] = 0
+                self.git_progress_label.config(text="")
+            elif len(latest) == 1:
+                local_path, event = next(iter(latest.items()))
+                self.git_progress_bar["value"] = event.percent or 0
+                self.git_progress_label.config(text=self.t("git_progress.single", name=os.path.basename(local_path), details=git_progress.format_event(event)))
+            else:
+                percents = [e.percent or 0 for e in latest.values()]
+                self.git_progress_bar["value"] = sum(percents) / len(percents)
+                self.git_progress_label.config(text=self.t("git_progress.multiple", count=len(latest), throughput=git_progress.format_bytes(self.progress_tracker.aggregate_throughput())))
+        finally: self.master.after(250, self._render_git_progress)
+
     def update_base_folder_label(self):
         self.base_folder_label.config(text=self.t("base_folder_status_label", path=self.config_manager.get_base_folder()))
 
@@ -367,9 +747,21 @@ class InstallerProApp:
         for item in self.tree.get_children(): self.tree.delete(item)
         projects = self.project_manager.get_projects()
         for p in projects:
-            status_key = f"status.{p.get('status', 'unknown').lower().replace(' ', '_')}"
-            status_display = self.t(status_key, fallback=p.get('status', "Unknown"))
-            self.tree.insert("", tk.END, values=(p['name'], p['local_path'], p['repo_url'], p['branch'], status_display))
+            if self.tree.exists(p['local_path']): continue
+            self.tree.insert("", tk.END, iid=p['local_path'], values=self._project_row_values(p), open=True)
+            # Cada worktree cuelga de su proyecto como fila hija con su propio estado.
+            for wt in p.get('worktrees', []):
+                if not self.tree.exists(wt['local_path']):
+                    self.tree.insert(p['local_path'], tk.END, iid=wt['local_path'], values=self._project_row_values(wt))
+
+    def _project_row_values(self, p):
+        status_key = f"status.{p.get('status', 'unknown').lower().replace(' ', '_')}"
+        status_display = self.t(status_key, fallback=p.get('status', "Unknown"))
+        return (p['name'], p['local_path'], p['repo_url'], p['branch'], status_display)
+
+    def _on_project_status_refreshed(self, project):
+        if self.tree.exists(project['local_path']):
+            self.tree.item(project['local_path'], values=self._project_row_values(project))
 
     def _get_selected_project_path(self):
         selected_item = self.tree.focus()
@@ -379,6 +771,8 @@ class InstallerProApp:
     def _on_project_select(self, event=None):
         for item in self.files_tree.get_children(): self.files_tree.delete(item)
         self.staged_files.clear()
+        self._index_staged_files.clear()
+        self._close_file_pagers()
         selected_path = self._get_selected_project_path()
         if not selected_path:
             self.files_tree_label.config(text="")
@@ -387,19 +781,56 @@ class InstallerProApp:
         if project and project.get('status') == 'modified':
             self.files_tree_label.config(text=self.t("Changed files title"))
             try:
-                changed_files = self.project_manager.get_changed_files_for_project(selected_path)
-                for file_info in changed_files:
-                    status_key = f"status.file.{file_info['status']}"
-                    status_display = self.t(status_key, fallback=file_info['status'].capitalize())
-                    self.files_tree.insert("", tk.END, text='☐', values=(status_display, file_info['path']), tags=('unchecked',))
+                self._file_pagers[""] = self.project_manager.open_changed_files_pager(selected_path)
+                self._load_files_page("")
             except ProjectNotFoundError:
                 logger.error(f"Project not found during file scan for {selected_path}")
+            except git_operations.GitOperationError as e:
+                logger.error(f"Error getting changed files for {selected_path}: {e}")
         else:
             self.files_tree_label.config(text=self.t("Commit panel placeholder clean"))
 
+    def _close_file_pagers(self):
+        for pager in self._file_pagers.values(): pager.close()
+        self._file_pagers.clear()
+
+    def _load_files_page(self, parent):
+        """Añade la siguiente página de ficheros bajo 'parent' ("" = raíz) y, si quedan más, una fila 'Cargar más'."""
+        load_more_iid = f"{_LOAD_MORE_PREFIX}{parent}"
+        if self.files_tree.exists(load_more_iid): self.files_tree.delete(load_more_iid)
+        pager = self._file_pagers.get(parent)
+        if not pager: return
+        for file_info in pager.next_page():
+            status_key = f"status.file.{file_info['status']}"
+            status_display = self.t(status_key, fallback=file_info['status'].capitalize())
+            if file_info['staged'] and file_info['path'] not in self.staged_files:
+                self._index_staged_files.add(file_info['path']); self.staged_files[file_info['path']] = True
+            is_staged = self.staged_files.get(file_info['path'], False)
+            iid = self.files_tree.insert(parent, tk.END, text='☑' if is_staged else '☐', values=(status_display, file_info['path']), tags=('checked' if is_staged else 'unchecked',))
+            # Directorio sin seguimiento agrupado: su contenido se carga al desplegarlo.
+            if file_info['is_dir']: self.files_tree.insert(iid, tk.END, iid=f"{_PLACEHOLDER_PREFIX}{iid}", text="", values=("", "…"))
+        if pager.has_more:
+            self.files_tree.insert(parent, tk.END, iid=load_more_iid, text="", values=("", self.t("Load more files", count=pager.loaded)), tags=('load_more',))
+        else:
+            pager.close(); del self._file_pagers[parent]
+
+    def _on_files_tree_open(self, event=None):
+        item = self.files_tree.focus()
+        placeholder = f"{_PLACEHOLDER_PREFIX}{item}"
+        if not item or not self.files_tree.exists(placeholder): return
+        self.files_tree.delete(placeholder)
+        directory = self.files_tree.item(item, 'values')[1]
+        try:
+            self._file_pagers[item] = self.project_manager.open_changed_files_pager(self._get_selected_project_path(), pathspecs=[directory], untracked="all")
+            self._load_files_page(item)
+        except (ProjectNotFoundError, git_operations.GitOperationError) as e:
+            logger.error(f"Error expanding directory {directory}: {e}")
+
     def _toggle_file_stage_status(self, event):
         row_id = self.files_tree.identify_row(event.y)
-        if not row_id or self.files_tree.identify_column(event.x) != '#0': return
+        if row_id.startswith(_LOAD_MORE_PREFIX):
+            self._load_files_page(self.files_tree.parent(row_id)); return
+        if not row_id or row_id.startswith(_PLACEHOLDER_PREFIX) or self.files_tree.identify_column(event.x) != '#0': return
         try:
             file_path = self.files_tree.item(row_id, 'values')[1]
             is_staged = not self.staged_files.get(file_path, False)
@@ -416,6 +847,7 @@ class InstallerProApp:
         new_text = '☑' if new_stage_status else '☐'
         next_action_key = "Unstage All Button" if new_stage_status else "Stage All Button"
         for item_id in item_ids:
+            if item_id.startswith(_LOAD_MORE_PREFIX): continue
             try:
                 values = self.files_tree.item(item_id, 'values')
                 if values:
@@ -426,21 +858,43 @@ class InstallerProApp:
                 logger.warning(f"Could not process item {item_id} during toggle all.")
         self.stage_all_button.config(text=self.t(next_action_key))
 
-    def _run_async_task(self, target, *args, on_success=None, on_failure=None):
-        def task_wrapper():
+    def _run_async_task(self, target, *args, on_success=None, on_failure=None, repo_paths=(), read_only=False, coalesce_key=None):
+        """
+        Ejecuta target(*args) en el planificador de operaciones: las escrituras sobre un mismo repositorio
+        (repo_paths) van de una en una; read_only=True permite solaparla con otras lecturas y, con
+        coalesce_key, fundirla con una petición idéntica que aún no ha empezado.
+        """
+        def on_done(future):
+            if future.cancelled(): return
             try:
-                result = target(*args)
-                if on_success: self.task_queue.put((on_success, (result,), {}))
+                result = future.result()
             except Exception as e:
-                logger.error(f"Task exception for {target.__name__}: {e}", exc_info=True)
+                logger.error(f"Task exception for {getattr(target, '__name__', target)}: {e}", exc_info=True)
                 if on_failure: self.task_queue.put((on_failure, (e,), {}))
-        threading.Thread(target=task_wrapper, daemon=True).start()
+                return
+            if on_success: self.task_queue.put((on_success, (result,), {}))
+        kind = operation_queue.READ if read_only else operation_queue.WRITE
+        self.operation_scheduler.submit(repo_paths, target, *args, kind=kind, coalesce_key=coalesce_key).add_done_callback(on_done)
+
+    def _run_coroutine_task(self, coroutine_factory, on_success=None, on_failure=None, repo_paths=(), read_only=False):
+        """
+        Como _run_async_task, pero la operación es una corrutina del bucle asyncio compartido.
+        La corrutina se crea cuando al repositorio le toca el turno, no al pedirla.
+        """
+        run_coroutine = lambda: self.async_loop.submit(coroutine_factory()).result()
+        self._run_async_task(run_coroutine, on_success=on_success, on_failure=on_failure, repo_paths=repo_paths, read_only=read_only)
+
+    def _read_slot(self, local_path):
+        return self.operation_scheduler.slot([local_path], kind=operation_queue.READ)
 
     def _add_project(self):
         dialog = AddProjectDialog(self.master, self.t, self.config_manager.get_base_folder())
         result = dialog.result
         if result:
-            self._run_async_task(self.project_manager.add_project, result['name'], result['repo_url'], result['local_path_full'], result['branch'], on_success=self._on_project_added_success, on_failure=lambda e: self._on_project_op_failure(e, self.t("Adding Project Operation Name")))
+            local_path = os.path.normpath(result['local_path_full'])
+            def on_success(new_project): self.progress_tracker.finish(local_path); self._on_project_added_success(new_project)
+            def on_failure(e): self.progress_tracker.finish(local_path); self._on_project_op_failure(e, self.t("Adding Project Operation Name"))
+            self._run_async_task(self.project_manager.add_project, result['name'], result['repo_url'], result['local_path_full'], result['branch'], self.progress_tracker, result.get('clone_options'), result.get('perf_profile'), on_success=on_success, on_failure=on_failure, repo_paths=[local_path])
 
     def _remove_project(self):
         path = self._get_selected_project_path()
@@ -448,14 +902,60 @@ class InstallerProApp:
         project = self.project_manager.get_project_by_path(path)
         if not project: return
         name = project.get('name', 'Unnamed')
-        if messagebox.askyesno(parent=self.master, title=self.t("Confirm Remove Title"), message=self.t("Confirm soft delete message")):
-            self._run_async_task(self.project_manager.remove_project, path, permanent=False, on_success=lambda r: self._on_project_removed_success(name), on_failure=lambda e: self._on_project_op_failure(e, self.t("Removing Project Operation Name")))
+        owner = self.project_manager.get_worktree_owner(path)
+        message = self.t("Confirm remove worktree message", path=path) if owner else self.t("Confirm soft delete message")
+        if messagebox.askyesno(parent=self.master, title=self.t("Confirm Remove Title"), message=message):
+            # Quitar un worktree escribe en el repositorio principal (.git/worktrees), así que se reservan ambos.
+            repo_paths = [path, owner['local_path']] if owner else [path]
+            self._run_async_task(self.project_manager.remove_project, path, False, on_success=lambda r: self._on_project_removed_success(name), on_failure=lambda e: self._on_project_op_failure(e, self.t("Removing Project Operation Name")), repo_paths=repo_paths)
+
+    def _add_worktree(self):
+        """Crea un worktree del proyecto seleccionado para la rama que indique el usuario."""
+        path = self._get_selected_project_path()
+        if not path: return
+        owner = self.project_manager.get_worktree_owner(path)
+        if owner: path = owner['local_path']
+        branch = simpledialog.askstring(self.t("Worktree Operation Name"), self.t("Worktree Branch Prompt"), parent=self.master)
+        if not branch or not branch.strip(): return
+        def on_success(worktree):
+            self._load_projects_into_treeview()
+            messagebox.showinfo(parent=self.master, title=self.t("Worktree Operation Name"), message=self.t("Worktree Created message", path=worktree['local_path']))
+        self._run_async_task(self.project_manager.add_worktree, path, branch.strip(), on_success=on_success, on_failure=lambda e: self._on_project_op_failure(e, self.t("Worktree Operation Name")), repo_paths=[path])
 
     def _update_project(self):
+        paths = [path for path in self.tree.selection() if self.project_manager.get_project_by_path(path)]
+        if not paths: return
+        if len(paths) == 1:
+            local_path = os.path.normpath(paths[0])
+            branch = self.project_manager.get_project_by_path(local_path)['branch']
+            def on_success(result): self.progress_tracker.finish(local_path); self._on_project_updated_success(result)
+            def on_failure(e): self.progress_tracker.finish(local_path); self._on_project_op_failure(e, self.t("Updating Project Operation Name"))
+            self._run_async_task(self.project_manager.update_project, local_path, branch, self.progress_tracker, on_success=on_success, on_failure=on_failure, repo_paths=[local_path])
+            return
+        # Varios proyectos: se actualizan en paralelo; cada uno sale de la barra de progreso al terminar.
+        on_result = lambda project, result: self.progress_tracker.finish(os.path.normpath(project['local_path']))
+        self._run_async_task(self.project_manager.update_projects, paths, on_result, self.progress_tracker, on_success=self._on_bulk_update_complete, on_failure=lambda e: self._on_project_op_failure(e, self.t("Updating Project Operation Name")), repo_paths=paths)
+
+    def _hydrate_project(self):
         path = self._get_selected_project_path()
         if not path: return
-        project = self.project_manager.get_project_by_path(path)
-        if project: self._run_async_task(self.project_manager.update_project, path, project['branch'], on_success=self._on_project_updated_success, on_failure=lambda e: self._on_project_op_failure(e, self.t("Updating Project Operation Name")))
+        local_path = os.path.normpath(path)
+        def on_success(steps):
+            self.progress_tracker.finish(local_path)
+            messagebox.showinfo(parent=self.master, title=self.t("Hydrate Complete Title"), message=self.t("Project Hydrated Success message" if steps else "Project Already Complete message"))
+        def on_failure(e): self.progress_tracker.finish(local_path); self._on_project_op_failure(e, self.t("Hydrating Project Operation Name"))
+        self._run_async_task(self.project_manager.hydrate_project, local_path, self.progress_tracker, on_success=on_success, on_failure=on_failure, repo_paths=[local_path])
+
+    def _optimize_project(self):
+        """Aplica el perfil de rendimiento 'large' al proyecto seleccionado y muestra la latencia de status antes y después."""
+        path = self._get_selected_project_path()
+        if not path: return
+        def on_success(report):
+            skipped = [self.t(f"perf_setting.{setting}", fallback=setting) for setting, ok in report['applied'].items() if not ok]
+            message = self.t("Profile applied message", before=f"{report['before'] * 1000:.0f}", after=f"{report['after'] * 1000:.0f}")
+            if skipped: message += "\n" + self.t("Profile settings unsupported message", settings=", ".join(skipped))
+            messagebox.showinfo(parent=self.master, title=self.t("Optimize Complete Title"), message=message)
+        self._run_async_task(self.project_manager.set_project_profile, path, "large", on_success=on_success, on_failure=lambda e: self._on_project_op_failure(e, self.t("Optimize Operation Name")), repo_paths=[path])
 
     def _scan_base_folder(self):
         folder = filedialog.askdirectory(parent=self.master, initialdir=self.config_manager.get_base_folder())
@@ -463,14 +963,29 @@ class InstallerProApp:
             self.config_manager.set_base_folder(folder)
             self.project_manager.set_base_folder(folder)
             self.update_base_folder_label()
-            self._run_async_task(self.project_manager.scan_base_folder, on_success=self._on_scan_complete_success, on_failure=lambda e: self._on_project_op_failure(e, self.t("Scanning Folder")))
+            self._run_async_task(self.project_manager.scan_base_folder, self._read_slot, on_success=self._on_scan_complete_success, on_failure=lambda e: self._on_project_op_failure(e, self.t("Scanning Folder")), repo_paths=[PROJECT_REGISTRY_KEY], coalesce_key="scan")
 
     def _push_project(self):
         path = self._get_selected_project_path()
-        if path: self._run_async_task(self.project_manager.push_project, path, on_success=self._on_project_pushed_success, on_failure=lambda e: self._on_project_op_failure(e, self.t("Pushing Project")))
+        if path: self._run_coroutine_task(lambda: self.project_manager.push_project_async(path), on_success=self._on_project_pushed_success, on_failure=lambda e: self._on_project_op_failure(e, self.t("Pushing Project")), repo_paths=[path])
 
     def _refresh_all_statuses(self):
-        self._run_async_task(self.project_manager.refresh_project_statuses, on_success=self._on_refresh_status_complete_success, on_failure=lambda e: self._on_project_op_failure(e, self.t("Refreshing Statuses")))
+        on_project_refreshed = lambda project: self.task_queue.put((self._on_project_status_refreshed, (project,), {}))
+        # Varios clics seguidos se funden en un único refresco pendiente.
+        refresh = functools.partial(self.project_manager.refresh_project_statuses, read_slot=self._read_slot)
+        self._run_async_task(refresh, on_project_refreshed, self.refresh_cancel_token, on_success=self._on_refresh_status_complete_success, on_failure=lambda e: self._on_project_op_failure(e, self.t("Refreshing Statuses")),
+                             repo_paths=[PROJECT_REGISTRY_KEY], coalesce_key="refresh")
+
+    def _schedule_auto_refresh(self):
+        interval = self.config_manager.get_setting('auto_refresh_seconds', 10)
+        if interval: self.master.after(int(interval * 1000), self._auto_refresh_changed)
+
+    def _auto_refresh_changed(self):
+        """Refresco local e incremental: solo los proyectos cuyos ficheros cambiaron desde la última vez."""
+        on_project_refreshed = lambda project: self.task_queue.put((self._on_project_status_refreshed, (project,), {}))
+        refresh = functools.partial(self.project_manager.refresh_project_statuses, read_slot=self._read_slot)
+        self._run_async_task(refresh, on_project_refreshed, None, False, True, repo_paths=[PROJECT_REGISTRY_KEY], coalesce_key="auto_refresh")
+        self._schedule_auto_refresh()
 
     def _show_help(self):
         messagebox.showinfo(parent=self.master, title=self.t("help.title"), message=self.t("help.content"))
@@ -499,14 +1014,51 @@ class InstallerProApp:
             if not messagebox.askyesno(title, message, parent=self.master):
                 return
         
+        files_to_unstage = [path for path in self._index_staged_files if not self.staged_files.get(path, False)]
+        local_path = os.path.normpath(selected_path)
+        def on_success(result): self.progress_tracker.finish(local_path); self._on_commit_success(result)
+        def on_failure(e): self.progress_tracker.finish(local_path); self._on_project_op_failure(e, self.t("Commit Operation Name"))
         self._run_async_task(
             self.project_manager.commit_project_changes,
             selected_path,
             files_to_commit,
             commit_message,
-            on_success=self._on_commit_success,
-            on_failure=lambda e: self._on_project_op_failure(e, self.t("Commit Operation Name"))
+            files_to_unstage,
+            self.progress_tracker,
+            on_success=on_success,
+            on_failure=on_failure,
+            repo_paths=[local_path]
         )
+
+    def _commit_and_push_selected(self):
+        """Commit con el mensaje del panel de lo ya preparado en cada proyecto seleccionado, y push en paralelo."""
+        paths = [path for path in self.tree.selection() if self.project_manager.get_project_by_path(path)]
+        if not paths:
+            messagebox.showwarning(parent=self.master, title=self.t("Commit Warning Title"), message=self.t("Select projects for batch commit message"))
+            return
+        commit_message = self.commit_message_text.get("1.0", tk.END).strip()
+        if not commit_message:
+            messagebox.showwarning(parent=self.master, title=self.t("Commit Warning Title"), message=self.t("Commit message cannot be empty message"))
+            return
+        on_failure = lambda e: self._on_project_op_failure(e, self.t("Batch Commit Operation Name"))
+
+        def start(findings_by_path):
+            if findings_by_path:
+                details = "\n".join(f"- {os.path.basename(path)}/{f['file']}:{f['line']} ({f['type']})" for path, findings in findings_by_path.items() for f in findings)
+                if not messagebox.askyesno(self.t("Security Warning Title"), self.t("Security warning message", details=details), parent=self.master):
+                    return
+            self._run_async_task(self.project_manager.commit_and_push_projects, paths, commit_message, on_success=self._on_batch_commit_complete, on_failure=on_failure, repo_paths=paths)
+        # El análisis de secretos del índice de cada proyecto también va en segundo plano.
+        self._run_async_task(self.project_manager.scan_staged_for_secrets, paths, on_success=start, on_failure=on_failure, repo_paths=paths, read_only=True)
+
+    def _on_batch_commit_complete(self, report):
+        self._load_projects_into_treeview()
+        selected_path = self._get_selected_project_path()
+        if selected_path and os.path.normpath(selected_path) in report['results']:
+            self.commit_message_text.delete("1.0", tk.END); self._on_project_select()
+        summary = self.t("Batch commit summary message", succeeded=report['succeeded'], failed=report['failed'], seconds=f"{report['elapsed']:.0f}")
+        BatchResultDialog(self.master, self.t, self.t("Batch Commit Title"), summary, self.project_manager.results_table(report))
+
     def _on_commit_success(self, result):
         messagebox.showinfo(parent=self.master, title=self.t("Commit Success Title"), message=self.t("Commit success message"))
         self.commit_message_text.delete("1.0", tk.END); self._on_project_select()
@@ -521,6 +1073,15 @@ class InstallerProApp:
     def _on_project_updated_success(self, result):
         self._load_projects_into_treeview(); messagebox.showinfo(parent=self.master, title=self.t("Update Complete Title"), message=self.t("Project Updated Success message"))
     
+    def _on_bulk_update_complete(self, report):
+        self._load_projects_into_treeview()
+        failures = [f"- {os.path.basename(path)}: {result['error']}" for path, result in report['results'].items() if not result['ok']]
+        message = self.t("Bulk update summary message", succeeded=report['succeeded'], failed=report['failed'], seconds=f"{report['elapsed']:.0f}")
+        if failures:
+            messagebox.showwarning(parent=self.master, title=self.t("Update Complete Title"), message=message + "\n\n" + "\n".join(failures))
+        else:
+            messagebox.showinfo(parent=self.master, title=self.t("Update Complete Title"), message=message)
+
     def _on_project_pushed_success(self, result):
         self._load_projects_into_treeview(); messagebox.showinfo(parent=self.master, title=self.t("Push Complete Title"), message=self.t("Project Pushed Success message"))
         
@@ -532,6 +1093,15 @@ class InstallerProApp:
 
     def run(self):
         self.master.mainloop()
+        # Al cerrar la ventana no dejamos fetch colgados en segundo plano.
+        if getattr(self, 'refresh_cancel_token', None): self.refresh_cancel_token.cancel()
+        self.operation_scheduler.shutdown()
+        self.async_loop.stop()
+        if self.project_manager.mirror_cache: self.project_manager.mirror_cache.stop()
+        if self.project_manager.prefetcher: self.project_manager.prefetcher.stop()
+        if self.project_manager.maintenance: self.project_manager.maintenance.stop()
+        self.project_manager.flush()
+        self.config_manager.flush()
 
 # Punto de entrada de la aplicación
 if __name__ == "__main__":
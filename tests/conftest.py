@@ -0,0 +1,36 @@
+import os
+import subprocess
+
+import pytest
+
+
+def git(cwd, *args):
+    """Ejecuta git en cwd y devuelve stdout; falla el test si git falla."""
+    result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+
+@pytest.fixture(autouse=True)
+def git_identity(monkeypatch, tmp_path):
+    """Identidad y configuración global aisladas para que los tests no toquen ~/.gitconfig."""
+    monkeypatch.setenv("GIT_AUTHOR_NAME", "InstallerPro Tests")
+    monkeypatch.setenv("GIT_AUTHOR_EMAIL", "tests@example.com")
+    monkeypatch.setenv("GIT_COMMITTER_NAME", "InstallerPro Tests")
+    monkeypatch.setenv("GIT_COMMITTER_EMAIL", "tests@example.com")
+    monkeypatch.setenv("GIT_CONFIG_GLOBAL", str(tmp_path / "gitconfig"))
+    monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+
+
+@pytest.fixture
+def cloned_repo(tmp_path):
+    """Crea un repositorio 'upstream' con un commit y devuelve (upstream, clon)."""
+    upstream = tmp_path / "upstream"
+    upstream.mkdir()
+    git(upstream, "init", "-q", "-b", "main")
+    (upstream / "README.md").write_text("hello\n")
+    git(upstream, "add", "README.md")
+    git(upstream, "commit", "-q", "-m", "initial")
+    clone = tmp_path / "clone"
+    git(tmp_path, "clone", "-q", str(upstream), str(clone))
+    return upstream, clone
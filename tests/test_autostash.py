@@ -0,0 +1,84 @@
+from installerpro.utils import git_operations
+
+from .conftest import git
+
+
+def _record_commands(monkeypatch):
+    commands = []
+    real_run = git_operations._run_cmd_with_output
+
+    def recording_run(command, *args, **kwargs):
+        commands.append(command)
+        return real_run(command, *args, **kwargs)
+
+    monkeypatch.setattr(git_operations, "_run_cmd_with_output", recording_run)
+    return commands
+
+
+def test_clean_pull_is_a_single_process(cloned_repo, monkeypatch):
+    upstream, clone = cloned_repo
+    git(upstream, "commit", "-q", "--allow-empty", "-m", "remote change")
+    commands = _record_commands(monkeypatch)
+    git_operations.run_git_operation(str(clone), "pull", "pull", "origin", "main")
+    assert commands == [["git", "pull", "--autostash", "origin", "main"]]
+
+
+def test_dirty_pull_keeps_local_changes(cloned_repo):
+    upstream, clone = cloned_repo
+    (upstream / "other.txt").write_text("remote\n")
+    git(upstream, "add", "other.txt")
+    git(upstream, "commit", "-q", "-m", "remote change")
+    (clone / "README.md").write_text("local edit\n")
+
+    git_operations.run_git_operation(str(clone), "pull", "pull", "origin", "main")
+    assert (clone / "other.txt").exists()
+    assert (clone / "README.md").read_text() == "local edit\n"
+    assert git(clone, "stash", "list") == ""
+
+
+def test_checkout_skips_stash_on_known_clean_tree(cloned_repo, monkeypatch):
+    _, clone = cloned_repo
+    git(clone, "branch", "topic")
+    assert git_operations.collect_repo_status(str(clone))["status"] == "clean"
+    monkeypatch.setattr(git_operations, "_run_cmd_bytes", lambda *a, **k: (_ for _ in ()).throw(AssertionError("status should be cached")))
+    commands = _record_commands(monkeypatch)
+    git_operations.run_git_operation(str(clone), "checkout", "checkout", "topic")
+    assert commands == [["git", "checkout", "topic"]]
+
+
+def test_checkout_stashes_dirty_tree(cloned_repo):
+    _, clone = cloned_repo
+    git(clone, "branch", "topic")
+    (clone / "untracked.txt").write_text("keep me\n")
+    assert git_operations.is_worktree_dirty(str(clone))
+    git_operations.run_git_operation(str(clone), "checkout", "checkout", "topic")
+    assert (clone / "untracked.txt").read_text() == "keep me\n"
+    assert git(clone, "stash", "list") == ""
+
+
+def test_pull_stashes_untracked_file_in_the_way(cloned_repo):
+    upstream, clone = cloned_repo
+    (upstream / "new.txt").write_text("remote\n")
+    git(upstream, "add", "new.txt")
+    git(upstream, "commit", "-q", "-m", "add new.txt")
+    (clone / "untracked.txt").write_text("keep me\n")
+    (clone / "new.txt").write_text("remote\n")  # mismo contenido: el stash se puede volver a aplicar
+
+    git_operations.pull_repository(str(clone), "main")
+    assert git(clone, "log", "-1", "--format=%s") == "add new.txt"
+    assert (clone / "untracked.txt").read_text() == "keep me\n"
+
+
+def test_checkout_with_cached_clean_tree_stashes_colliding_untracked_file(cloned_repo):
+    _, clone = cloned_repo
+    git(clone, "checkout", "-q", "-b", "topic")
+    (clone / "tool.cfg").write_text("tracked on topic\n")
+    git(clone, "add", "tool.cfg")
+    git(clone, "commit", "-q", "-m", "add tool.cfg")
+    git(clone, "checkout", "-q", "main")
+    assert git_operations.collect_repo_status(str(clone))["status"] == "clean"
+    (clone / "tool.cfg").write_text("tracked on topic\n")  # sin seguimiento: la caché sigue diciendo 'limpio'
+
+    git_operations.run_git_operation(str(clone), "checkout", "checkout", "topic")
+    assert git(clone, "rev-parse", "--abbrev-ref", "HEAD") == "topic"
+    assert (clone / "tool.cfg").read_text() == "tracked on topic\n"
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from installerpro.utils import batch_commit, git_operations
+
+from .conftest import git
+
+
+@pytest.fixture
+def bare_clones(cloned_repo, tmp_path):
+    """Un remoto bare y dos clones suyos; el push a un repositorio no bare con la rama activa fallaría."""
+    upstream, _clone = cloned_repo
+    bare = tmp_path / "remote.git"
+    git(tmp_path, "clone", "-q", "--bare", str(upstream), str(bare))
+    clones = []
+    for name in ("one", "two"):
+        git(tmp_path, "clone", "-q", str(bare), name)
+        clones.append(tmp_path / name)
+    return bare, clones
+
+
+def test_commits_staged_changes_and_pushes_each_repo(bare_clones):
+    bare, (one, two) = bare_clones
+    git(two, "checkout", "-q", "-b", "feature")
+    git(two, "push", "-q", "-u", "origin", "feature")
+    for repo in (one, two):
+        (repo / "VERSION").write_text("1.2.0\n")
+        git(repo, "add", "VERSION")
+    (one / "unstaged.txt").write_text("not part of the commit\n")
+
+    jobs = [{"local_path": str(repo), "repo_url": str(bare)} for repo in (one, two)]
+    report = batch_commit.run_commit_and_push(jobs, "Bump version to 1.2.0")
+
+    assert report["succeeded"] == 2
+    for repo, branch in ((one, "main"), (two, "feature")):
+        result = report["results"][os.path.normpath(str(repo))]
+        assert result["action"] == batch_commit.COMMITTED_AND_PUSHED
+        assert result["commit"] == git(repo, "rev-parse", "HEAD")
+        assert git(bare, "rev-parse", branch) == result["commit"]
+        assert git(repo, "log", "-1", "--format=%s") == "Bump version to 1.2.0"
+    assert "unstaged.txt" not in git(one, "show", "--name-only", "--format=", "HEAD")
+
+
+def test_repo_without_staged_changes_is_not_an_error(bare_clones):
+    bare, (one, two) = bare_clones
+    (two / "CHANGELOG").write_text("x\n")
+    git(two, "add", "CHANGELOG")
+    git(two, "commit", "-q", "-m", "local only")
+
+    jobs = [{"local_path": str(repo), "repo_url": str(bare)} for repo in (one, two)]
+    report = batch_commit.run_commit_and_push(jobs, "Nothing new")
+
+    assert report["results"][os.path.normpath(str(one))]["action"] == batch_commit.NOTHING_TO_DO
+    # Sin nada preparado, pero con un commit por delante: solo se publica.
+    assert report["results"][os.path.normpath(str(two))]["action"] == batch_commit.PUSHED
+    assert git(bare, "rev-parse", "main") == git(two, "rev-parse", "HEAD")
+
+
+def test_branch_without_upstream_is_not_pushed_when_nothing_was_committed(bare_clones):
+    bare, (one, _two) = bare_clones
+    git(one, "checkout", "-q", "-b", "local-only")
+
+    report = batch_commit.run_commit_and_push([{"local_path": str(one), "repo_url": str(bare)}], "Nothing new")
+    assert report["results"][os.path.normpath(str(one))]["action"] == batch_commit.NOTHING_TO_DO
+    assert "local-only" not in git(bare, "branch", "--list")
+
+
+def test_push_failure_is_reported_per_repo(bare_clones, tmp_path):
+    bare, (one, two) = bare_clones
+    git(one, "remote", "set-url", "origin", str(tmp_path / "missing.git"))
+    for repo in (one, two):
+        (repo / "VERSION").write_text("2.0.0\n")
+        git(repo, "add", "VERSION")
+
+    jobs = [{"local_path": str(repo), "repo_url": str(bare)} for repo in (one, two)]
+    report = batch_commit.run_commit_and_push(jobs, "Bump version to 2.0.0", push=True)
+
+    failed = report["results"][os.path.normpath(str(one))]
+    assert not failed["ok"] and failed["error"]
+    # El commit local se hizo aunque el push fallara.
+    assert git(one, "log", "-1", "--format=%s") == "Bump version to 2.0.0"
+    assert report["results"][os.path.normpath(str(two))]["ok"]
+    assert (report["succeeded"], report["failed"]) == (1, 1)
+
+
+def test_empty_message_is_rejected(bare_clones):
+    _bare, (one, _two) = bare_clones
+    with pytest.raises(git_operations.GitOperationError):
+        batch_commit.run_commit_and_push([{"local_path": str(one), "repo_url": ""}], "   ")
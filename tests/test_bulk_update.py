@@ -0,0 +1,62 @@
+import threading
+import time
+
+import pytest
+
+from installerpro.utils import bulk_update
+
+
+@pytest.mark.parametrize("url, host", [
+    ("https://GitHub.com/org/repo.git", "github.com"),
+    ("ssh://git@gitlab.example.com:2222/org/repo.git", "gitlab.example.com"),
+    ("git@github.com:org/repo.git", "github.com"),
+    ("file:///srv/repos/repo.git", "local"),
+    ("/srv/repos/repo.git", "local"),
+    ("C:\\repos\\repo", "local"),
+    ("", "local"),
+])
+def test_remote_host(url, host):
+    assert bulk_update.remote_host(url) == host
+
+
+def test_global_and_per_host_limits_are_respected():
+    lock = threading.Lock()
+    running = {"total": 0, "a": 0, "b": 0}
+    peaks = {"total": 0, "a": 0, "b": 0}
+
+    def worker(job):
+        host = bulk_update.remote_host(job["repo_url"])
+        with lock:
+            for key in ("total", host.split(".")[0]):
+                running[key] += 1
+                peaks[key] = max(peaks[key], running[key])
+        time.sleep(0.02)
+        with lock:
+            running["total"] -= 1
+            running[host.split(".")[0]] -= 1
+        if job["local_path"] == "b3":
+            raise RuntimeError("boom")
+        return "pull"
+
+    jobs = [{"local_path": f"a{i}", "repo_url": f"https://a.example/r{i}"} for i in range(8)]
+    jobs += [{"local_path": f"b{i}", "repo_url": f"git@b.example:r{i}"} for i in range(8)]
+    report = bulk_update.run_bulk_update(jobs, worker=worker, max_workers=5, per_host_limit=3)
+
+    assert peaks["total"] <= 5 and peaks["a"] <= 3 and peaks["b"] <= 3
+    assert peaks["b"] == 3  # los jobs de 'b' no esperan a que terminen los de 'a'
+    assert (report["succeeded"], report["failed"], report["cancelled"]) == (15, 1, 0)
+    assert report["results"]["b3"]["error"] == "boom"
+
+
+def test_clone_missing_and_pull_existing(cloned_repo, tmp_path):
+    upstream, clone = cloned_repo
+    missing = tmp_path / "fresh"
+    jobs = [
+        {"local_path": str(clone), "repo_url": str(upstream), "branch": "main"},
+        {"local_path": str(missing), "repo_url": str(upstream), "branch": "main"},
+    ]
+    report = bulk_update.run_bulk_update(jobs)
+    assert report["succeeded"] == 2
+    assert report["results"][str(clone)]["action"] == "pull"
+    assert report["results"][str(missing)]["action"] == "clone"
+    assert (missing / "README.md").read_text() == "hello\n"
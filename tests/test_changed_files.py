@@ -0,0 +1,52 @@
+import pytest
+
+from installerpro.utils import git_operations
+from installerpro.utils.git_operations import GitOperationError
+
+from .conftest import git
+
+
+@pytest.fixture
+def dirty_repo(cloned_repo):
+    _, clone = cloned_repo
+    (clone / ".gitignore").write_text("build/\n")
+    (clone / "build").mkdir()
+    (clone / "build" / "out.o").write_text("x")
+    (clone / "README.md").write_text("changed\n")
+    (clone / "staged.txt").write_text("s\n")
+    git(clone, "add", "staged.txt")
+    git(clone, "mv", "README.md", "README.rst")
+    (clone / "node_modules" / "pkg").mkdir(parents=True)
+    for i in range(30):
+        (clone / "node_modules" / "pkg" / f"f{i}.js").write_text("x")
+    return clone
+
+
+def test_untracked_directories_are_aggregated(dirty_repo):
+    entries = {e["path"]: e for e in git_operations.iter_changed_files(str(dirty_repo))}
+    assert entries["node_modules/"]["is_dir"] and entries["node_modules/"]["status"] == "untracked"
+    assert entries["staged.txt"]["status"] == "added" and entries["staged.txt"]["staged"]
+    assert entries["README.rst"]["status"] == "renamed" and entries["README.rst"]["orig_path"] == "README.md"
+    assert entries[".gitignore"]["status"] == "untracked"
+    assert not any(path.startswith("build") for path in entries)
+
+    expanded = list(git_operations.iter_changed_files(str(dirty_repo), pathspecs=["node_modules/"], untracked="all"))
+    assert len(expanded) == 30 and not any(e["is_dir"] for e in expanded)
+
+
+def test_pager_returns_pages_and_stops_early(dirty_repo):
+    with git_operations.ChangedFilesPager(str(dirty_repo), page_size=7, pathspecs=["node_modules/"], untracked="all") as pager:
+        first = pager.next_page()
+        assert len(first) == 7 and pager.has_more
+        second = pager.next_page()
+        assert not {e["path"] for e in first} & {e["path"] for e in second}
+    assert not pager.has_more
+
+    with git_operations.ChangedFilesPager(str(dirty_repo), page_size=100, pathspecs=["node_modules/"], untracked="all") as pager:
+        assert len(pager.next_page()) == 30 and not pager.has_more
+
+
+def test_errors(tmp_path):
+    with pytest.raises(GitOperationError):
+        list(git_operations.iter_changed_files(str(tmp_path)))
+    assert git_operations.get_changed_files(str(tmp_path)) == []
@@ -0,0 +1,55 @@
+import pytest
+
+from installerpro.utils import git_metadata, git_operations
+from installerpro.utils.git_operations import GitOperationError
+
+from .conftest import git
+
+
+def test_clone_options_to_args():
+    assert git_operations.clone_options_to_args(None) == []
+    assert git_operations.clone_options_to_args({"depth": 1, "single_branch": False}) == ["--depth", "1", "--no-single-branch"]
+    assert git_operations.clone_options_to_args({"filter": "blob:none", "single_branch": True}) == ["--filter=blob:none", "--single-branch"]
+    with pytest.raises(GitOperationError):
+        git_operations.clone_options_to_args({"filter": "sparse:oid=abc"})
+    with pytest.raises(GitOperationError):
+        git_operations.clone_options_to_args({"depth": "0"})
+
+
+@pytest.fixture
+def upstream_with_history(cloned_repo):
+    upstream, _ = cloned_repo
+    for i in range(3):
+        (upstream / "README.md").write_text(f"v{i}\n")
+        git(upstream, "commit", "-q", "-am", f"change {i}")
+    git(upstream, "branch", "other")
+    git(upstream, "config", "uploadpack.allowFilter", "true")
+    return upstream
+
+
+def test_shallow_single_branch_clone_and_hydrate(upstream_with_history, tmp_path):
+    target = tmp_path / "shallow"
+    git_operations.clone_repository(upstream_with_history.as_uri(), str(target), "main", clone_options={"depth": 1})
+    shape = git_metadata.get_clone_shape(str(target))
+    assert shape == {"shallow": True, "partial_filter": None, "single_branch": True}
+    assert git(target, "rev-list", "--count", "HEAD") == "1"
+
+    assert git_operations.hydrate_repository(str(target)) == ["all_branches", "unshallow"]
+    assert git(target, "rev-list", "--count", "HEAD") == "4"
+    assert "origin/other" in git(target, "branch", "-r")
+    assert git_operations.hydrate_repository(str(target)) == []
+
+
+def test_blobless_clone_and_hydrate(upstream_with_history, tmp_path):
+    target = tmp_path / "blobless"
+    git_operations.clone_repository(upstream_with_history.as_uri(), str(target), "main", clone_options={"filter": "blob:none"})
+    assert git_metadata.get_clone_shape(str(target))["partial_filter"] == "blob:none"
+
+    assert git_operations.hydrate_repository(str(target)) == ["refetch"]
+    assert git_metadata.get_clone_shape(str(target))["partial_filter"] is None
+    config = git_metadata.read_config(str(target))
+    assert git_metadata.get_config_value(config, "remote", "origin", "promisor") is None
+    assert git_metadata.get_config_value(config, "extensions", None, "partialClone") is None
+    # Sin filtro ni promisor los blobs antiguos ya están en local
+    old_blob = git(target, "rev-parse", "HEAD~3:README.md")
+    assert git(target, "cat-file", "-p", old_blob) == "hello"
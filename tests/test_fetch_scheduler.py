@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+
+from installerpro.utils import git_operations
+from installerpro.utils.fetch_scheduler import FetchScheduler
+
+
+def test_fetch_is_skipped_within_ttl(tmp_path):
+    calls = []
+    scheduler = FetchScheduler(ttl_seconds=60, fetch_func=lambda path, cancel_token=None: calls.append(path) or True)
+    assert scheduler.fetch(str(tmp_path))
+    assert scheduler.fetch(str(tmp_path))
+    assert len(calls) == 1
+    assert scheduler.status_as_of(str(tmp_path)) is not None
+
+    scheduler.fetch(str(tmp_path), force=True)
+    assert len(calls) == 2
+
+
+def test_failed_fetch_is_not_recorded(tmp_path):
+    scheduler = FetchScheduler(ttl_seconds=60, fetch_func=lambda path, cancel_token=None: False)
+    assert not scheduler.fetch(str(tmp_path))
+    assert scheduler.last_fetch(str(tmp_path)) is None
+
+
+def test_concurrent_fetches_are_coalesced(tmp_path):
+    calls = []
+
+    def slow_fetch(path, cancel_token=None):
+        calls.append(path)
+        time.sleep(0.2)
+        return True
+
+    scheduler = FetchScheduler(ttl_seconds=0, fetch_func=slow_fetch)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(scheduler.fetch(str(tmp_path)))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [True] * 5
+    assert len(calls) == 1
+
+
+def test_cancelled_joiner_stops_waiting_for_the_owner(tmp_path):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_fetch(path, cancel_token=None):
+        started.set()
+        release.wait(5)
+        return True
+
+    scheduler = FetchScheduler(ttl_seconds=0, fetch_func=slow_fetch)
+    owner = threading.Thread(target=scheduler.fetch, args=(str(tmp_path),))
+    owner.start()
+    assert started.wait(5)
+    token = git_operations.CancellationToken()
+    token.cancel()
+    begin = time.monotonic()
+    with pytest.raises(git_operations.GitCancelledError):
+        scheduler.fetch(str(tmp_path), cancel_token=token)
+    assert time.monotonic() - begin < 2
+    release.set()
+    owner.join()
+
+
+def test_fetch_head_does_not_count_as_last_fetch(cloned_repo):
+    _, clone = cloned_repo
+    (clone / ".git" / "FETCH_HEAD").write_text("")  # p. ej. de un fetch fallido o de un pull de una rama
+    scheduler = FetchScheduler(ttl_seconds=60, fetch_func=lambda path, cancel_token=None: False)
+    assert not scheduler.is_fresh(str(clone))
+    assert not scheduler.fetch(str(clone))
+
+
+def test_successful_fetches_survive_a_restart(tmp_path):
+    state_path = str(tmp_path / "fetch_state.json")
+    scheduler = FetchScheduler(ttl_seconds=60, fetch_func=lambda path, cancel_token=None: True)
+    scheduler.set_state_path(state_path)
+    assert scheduler.fetch(str(tmp_path / "repo"))
+    scheduler._writer.flush()
+
+    restarted = FetchScheduler(ttl_seconds=60, fetch_func=lambda path, cancel_token=None: False)
+    restarted.set_state_path(state_path)
+    assert restarted.last_fetch(str(tmp_path / "repo")) == scheduler.last_fetch(str(tmp_path / "repo"))
+    assert restarted.fetch(str(tmp_path / "repo"))
@@ -0,0 +1,41 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+from installerpro.utils import git_async
+from installerpro.utils.git_operations import GitOperationError
+
+from .conftest import git
+
+
+def test_run_git_operation_async_streams_lines(cloned_repo):
+    _, clone = cloned_repo
+    lines = []
+    stdout = asyncio.run(
+        git_async.run_git_operation_async(str(clone), "log", "log", "--format=%s", on_line=lambda s, l: lines.append((s, l)))
+    )
+    assert stdout == "initial"
+    assert ("stdout", "initial") in lines
+
+
+def test_timeout_kills_process():
+    command = [sys.executable, "-c", "import time; time.sleep(30)"]
+    started = time.monotonic()
+    with pytest.raises(GitOperationError):
+        asyncio.run(git_async.run_cmd_async(command, timeout=0.3))
+    assert time.monotonic() - started < 10
+
+
+def test_background_loop_runs_many_fetches(cloned_repo):
+    upstream, clone = cloned_repo
+    git(upstream, "commit", "-q", "--allow-empty", "-m", "remote")
+    loop = git_async.BackgroundEventLoop()
+    try:
+        results = loop.submit(git_async.fetch_all_async([str(clone), str(clone) + "-missing"], limit=2)).result(timeout=30)
+    finally:
+        loop.stop()
+    assert results[str(clone)] is True
+    assert isinstance(results[str(clone) + "-missing"], GitOperationError)
+    assert git(clone, "rev-parse", "origin/main") == git(upstream, "rev-parse", "HEAD")
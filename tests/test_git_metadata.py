@@ -0,0 +1,54 @@
+from installerpro.utils import git_metadata, git_operations
+
+from .conftest import git
+
+
+def test_branch_upstream_and_remote(cloned_repo):
+    upstream, clone = cloned_repo
+    metadata = git_metadata.read_repo_metadata(str(clone))
+    assert metadata["branch"] == "main"
+    assert metadata["upstream"] == "origin/main"
+    assert metadata["upstream_sha"] == git(clone, "rev-parse", "origin/main")
+    assert metadata["head_sha"] == git(clone, "rev-parse", "HEAD")
+    assert metadata["remote_url"] == str(upstream)
+
+
+def test_packed_refs_and_detached_head(cloned_repo):
+    _, clone = cloned_repo
+    git(clone, "pack-refs", "--all")
+    head = git(clone, "rev-parse", "HEAD")
+    assert git_metadata.read_repo_metadata(str(clone))["head_sha"] == head
+    assert git_metadata.list_refs(str(clone), "refs/heads/") == {"refs/heads/main": head}
+
+    git(clone, "checkout", "-q", "--detach")
+    assert git_operations.get_repo_current_branch(str(clone)) == "detached"
+
+
+def test_worktree_gitdir_file(cloned_repo, tmp_path):
+    _, clone = cloned_repo
+    worktree = tmp_path / "wt"
+    git(clone, "worktree", "add", "-q", "-b", "feature", str(worktree))
+    assert git_operations.is_git_repository(str(worktree))
+    assert git_metadata.get_current_branch(str(worktree)) == "feature"
+    assert git_metadata.get_remote_url(str(worktree)).endswith("upstream")
+
+
+def test_cache_follows_file_changes(cloned_repo):
+    _, clone = cloned_repo
+    assert git_metadata.get_current_branch(str(clone)) == "main"
+    git(clone, "checkout", "-q", "-b", "other-branch")
+    assert git_metadata.get_current_branch(str(clone)) == "other-branch"
+
+
+def test_config_parser_handles_quotes_and_comments():
+    config = git_metadata._parse_config(
+        '[remote "origin"]\n'
+        '\turl = "https://example.com/a b.git" ; comentario\n'
+        "[Core]\n"
+        "\tbare\n"
+        "[branch.Main]\n"
+        "\tremote = origin\n"
+    )
+    assert git_metadata.get_config_value(config, "remote", "origin", "url") == "https://example.com/a b.git"
+    assert git_metadata.get_config_value(config, "core", None, "bare") == "true"
+    assert git_metadata.get_config_value(config, "branch", "main", "remote") == "origin"
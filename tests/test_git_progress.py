@@ -0,0 +1,46 @@
+import io
+
+from installerpro.utils import git_operations, git_progress
+
+
+def test_parse_receiving_objects_line():
+    event = git_progress.parse_progress_line("Receiving objects:  45% (450/1000), 1.50 MiB | 512.00 KiB/s")
+    assert event.phase == "Receiving objects"
+    assert (event.percent, event.current, event.total) == (45, 450, 1000)
+    assert event.bytes_done == int(1.5 * 1024 ** 2)
+    assert event.throughput == 512 * 1024
+    assert not event.done
+
+
+def test_parse_remote_and_counter_lines():
+    event = git_progress.parse_progress_line("remote: Enumerating objects: 1234, done.")
+    assert (event.phase, event.current, event.percent, event.done) == ("Enumerating objects", 1234, None, True)
+    assert git_progress.parse_progress_line("Resolving deltas: 100% (3/3), done.").done
+    for line in ("fatal: repository not found", "From https://example.com/repo", "Cloning into 'repo'...", "remote: Total 3 (delta 0)"):
+        assert git_progress.parse_progress_line(line) is None
+
+
+def test_pipe_records_split_on_carriage_returns():
+    pipe = io.BytesIO(b"Receiving objects:  50% (1/2)\rReceiving objects: 100% (2/2), done.\nCloning into 'x'...\r\nlast")
+    assert list(git_progress.iter_pipe_records(pipe, chunk_size=7)) == [
+        "Receiving objects:  50% (1/2)", "Receiving objects: 100% (2/2), done.", "Cloning into 'x'...", "last",
+    ]
+
+
+def test_clone_reports_progress(cloned_repo, tmp_path):
+    upstream, _ = cloned_repo
+    target = tmp_path / "progress-clone"
+    events = list(git_progress.iter_progress(git_operations.clone_repository, upstream.as_uri(), str(target), "main"))
+    assert (target / "README.md").exists()
+    assert events and all(e.local_path == str(target) and e.operation == "clone" for e in events)
+    assert any(e.phase == "Receiving objects" and e.done for e in events)
+
+
+def test_tracker_aggregates_throughput():
+    tracker = git_progress.ProgressTracker()
+    base = git_progress.parse_progress_line("Receiving objects:  10% (1/10), 1.00 MiB | 1.00 MiB/s")
+    tracker(base._replace(local_path="a"))
+    tracker(base._replace(local_path="b"))
+    assert tracker.aggregate_throughput() == 2 * 1024 ** 2
+    tracker.finish("a")
+    assert list(tracker.snapshot()) == ["b"]
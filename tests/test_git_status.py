@@ -0,0 +1,59 @@
+from installerpro.utils import git_operations
+
+from .conftest import git
+
+
+def test_clean_clone(cloned_repo):
+    _, clone = cloned_repo
+    record = git_operations.collect_repo_status(str(clone))
+    assert record["status"] == "clean"
+    assert record["branch"] == "main"
+    assert record["upstream"] == "origin/main"
+    assert record["repo_url"].endswith("upstream")
+
+
+def test_dirty_counts(cloned_repo):
+    _, clone = cloned_repo
+    (clone / "README.md").write_text("changed\n")
+    (clone / "new file.txt").write_text("x\n")
+    (clone / "staged.txt").write_text("y\n")
+    git(clone, "add", "staged.txt")
+    record = git_operations.collect_repo_status(str(clone))
+    assert record["status"] == "modified"
+    assert (record["staged"], record["unstaged"], record["untracked"]) == (1, 1, 1)
+
+
+def test_ahead_and_behind_after_fetch(cloned_repo):
+    upstream, clone = cloned_repo
+    git(clone, "commit", "-q", "--allow-empty", "-m", "local")
+    assert git_operations.collect_repo_status(str(clone))["status"] == "local_commits"
+
+    git(clone, "reset", "-q", "--hard", "HEAD~1")
+    git(upstream, "commit", "-q", "--allow-empty", "-m", "remote")
+    record = git_operations.collect_repo_status(str(clone), fetch=True)
+    assert (record["ahead"], record["behind"]) == (0, 1)
+    assert record["status"] == "needs_pull"
+
+
+def test_not_a_repository(tmp_path):
+    assert git_operations.collect_repo_status(str(tmp_path))["status"] == "missing_not_a_repo"
+
+
+def test_ahead_behind_uses_configured_upstream_and_cache(cloned_repo, monkeypatch):
+    upstream, clone = cloned_repo
+    git(upstream, "checkout", "-q", "-b", "develop")
+    git(upstream, "commit", "-q", "--allow-empty", "-m", "remote develop")
+    git(clone, "fetch", "-q")
+    git(clone, "checkout", "-q", "-b", "topic", "--track", "origin/develop")
+    git(clone, "reset", "-q", "--hard", "origin/main")
+    git(clone, "commit", "-q", "--allow-empty", "-m", "local topic")
+
+    record = git_operations.collect_repo_status(str(clone))
+    assert record["upstream"] == "origin/develop"
+    assert (record["ahead"], record["behind"]) == (1, 1)
+
+    calls = []
+    original = git_operations._run_cmd_with_output
+    monkeypatch.setattr(git_operations, "_run_cmd_with_output", lambda *a, **k: calls.append(a) or original(*a, **k))
+    assert git_operations.get_ahead_behind(str(clone)) == (1, 1)
+    assert calls == []
@@ -0,0 +1,59 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from installerpro.utils import git_operations
+from installerpro.utils.git_operations import CancellationToken, GitCancelledError, GitOperationError, GitTimeoutError, RetryPolicy
+
+SLEEP_COMMAND = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+
+def test_timeout_kills_command():
+    started = time.monotonic()
+    with pytest.raises(GitTimeoutError):
+        git_operations._run_cmd_with_output(SLEEP_COMMAND, timeout=0.3)
+    assert time.monotonic() - started < 10
+
+
+def test_cancellation_token_kills_command():
+    token = CancellationToken()
+    threading.Timer(0.2, token.cancel).start()
+    started = time.monotonic()
+    with pytest.raises(GitCancelledError):
+        git_operations._run_cmd_with_output(SLEEP_COMMAND, cancel_token=token)
+    assert time.monotonic() - started < 10
+
+
+def test_transient_errors_are_retried(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_run(command, cwd=None, timeout=None, cancel_token=None, **kwargs):
+        calls.append(command)
+        if len(calls) < 3:
+            return 128, "", "fatal: unable to access: Could not resolve host: example.com"
+        return 0, "ok", ""
+
+    monkeypatch.setattr(git_operations, "_run_cmd_with_output", fake_run)
+    policy = RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.01)
+    assert git_operations.run_git_operation(str(tmp_path), "fetch", "fetch", retry_policy=policy) == "ok"
+    assert len(calls) == 3
+
+
+def test_permanent_errors_are_not_retried(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_run(command, cwd=None, timeout=None, cancel_token=None, **kwargs):
+        calls.append(command)
+        return 128, "", "fatal: repository not found"
+
+    monkeypatch.setattr(git_operations, "_run_cmd_with_output", fake_run)
+    with pytest.raises(GitOperationError):
+        git_operations.run_git_operation(str(tmp_path), "fetch", "fetch", retry_policy=RetryPolicy(base_delay=0.01))
+    assert len(calls) == 1
+
+
+def test_backoff_grows_and_is_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0, jitter=0.0)
+    assert [policy.delay_for(n) for n in (1, 2, 3, 4)] == [1.0, 2.0, 4.0, 4.0]
@@ -0,0 +1,100 @@
+import os
+import time
+
+from installerpro.utils import maintenance
+
+from .conftest import git
+
+
+def _loose_object_count(repo):
+    counts = dict(line.split(": ") for line in git(repo, "count-objects", "-v").splitlines())
+    return int(counts["count"])
+
+
+def test_all_tasks_run_and_timings_are_recorded(cloned_repo, tmp_path):
+    upstream, clone = cloned_repo
+    git(upstream, "branch", "feature")
+    git(clone, "fetch", "-q")
+    git(upstream, "branch", "-D", "feature")
+    for i in range(3):
+        (clone / f"file{i}.txt").write_text(f"{i}\n")
+        git(clone, "add", ".")
+        git(clone, "commit", "-q", "-m", f"commit {i}")
+    assert _loose_object_count(clone) > 0
+
+    scheduler = maintenance.MaintenanceScheduler(str(tmp_path / "maintenance.json"), low_priority=False, measure_status=True)
+    scheduler.set_projects([str(clone)])
+    results = scheduler.run_once()
+
+    key = os.path.normpath(str(clone))
+    assert results[key] == {task: True for task in maintenance.MAINTENANCE_TASKS}
+    assert "origin/feature" not in git(clone, "branch", "-r")
+    assert _loose_object_count(clone) == 0
+    assert os.path.isfile(clone / ".git" / "objects" / "info" / "commit-graphs" / "commit-graph-chain")
+    assert os.path.isfile(clone / ".git" / "objects" / "pack" / "multi-pack-index")
+    [timing] = scheduler.timings(str(clone))
+    assert timing["before"] > 0 and timing["after"] > 0
+    assert timing["tasks"] == list(maintenance.MAINTENANCE_TASKS)
+
+
+def test_intervals_survive_restart(cloned_repo, tmp_path):
+    _upstream, clone = cloned_repo
+    state_path = str(tmp_path / "maintenance.json")
+    scheduler = maintenance.MaintenanceScheduler(state_path, low_priority=False, tasks={"commit-graph": 3600}, measure_status=True)
+    scheduler.set_projects([str(clone)])
+    scheduler.run_once()
+
+    restarted = maintenance.MaintenanceScheduler(state_path, low_priority=False, tasks={"commit-graph": 3600})
+    restarted.set_projects([str(clone)])
+    assert restarted.due_tasks(str(clone)) == []
+    assert restarted.due_tasks(str(clone), now=time.time() + 3601) == ["commit-graph"]
+    assert restarted.run_once() == {}
+    assert len(restarted.timings(str(clone))) == 1
+
+
+def test_exhausted_budget_stops_the_pass(cloned_repo, tmp_path):
+    _upstream, clone = cloned_repo
+    scheduler = maintenance.MaintenanceScheduler(str(tmp_path / "maintenance.json"), low_priority=False)
+    scheduler.set_projects([str(clone)])
+    assert scheduler.maintain(str(clone), list(maintenance.MAINTENANCE_TASKS), deadline=time.monotonic() - 1) == {}
+    assert scheduler.timings(str(clone)) == []
+
+
+def test_run_exclusive_wraps_each_repository(cloned_repo, tmp_path):
+    _upstream, clone = cloned_repo
+    scheduler = maintenance.MaintenanceScheduler(str(tmp_path / "maintenance.json"), low_priority=False, tasks={"commit-graph": 3600})
+    scheduler.set_projects([str(clone)])
+    wrapped = []
+
+    def run_exclusive(path, job):
+        wrapped.append(path)
+        return job()
+
+    scheduler.run_once(run_exclusive)
+    assert wrapped == [os.path.normpath(str(clone))]
+
+
+def test_budget_is_checked_between_tasks_only(cloned_repo, tmp_path):
+    _upstream, clone = cloned_repo
+    scheduler = maintenance.MaintenanceScheduler(str(tmp_path / "maintenance.json"), low_priority=False)
+    run_task = scheduler.runner.run_task
+
+    def slow_run_task(task, local_path):
+        run_task(task, local_path)
+        time.sleep(0.6)
+
+    scheduler.runner.run_task = slow_run_task
+    results = scheduler.maintain(str(clone), ["commit-graph", "loose-objects"], deadline=time.monotonic() + 0.5)
+
+    assert results == {"commit-graph": True}
+    assert os.path.isfile(clone / ".git" / "objects" / "info" / "commit-graphs" / "commit-graph-chain")
+    assert not [name for name in os.listdir(clone / ".git" / "objects" / "info" / "commit-graphs") if name.endswith(".lock")]
+
+
+def test_status_is_not_measured_by_default(cloned_repo, tmp_path, monkeypatch):
+    _upstream, clone = cloned_repo
+    monkeypatch.setattr(maintenance, "time_status", lambda *a, **k: (_ for _ in ()).throw(AssertionError("status measured")))
+    scheduler = maintenance.MaintenanceScheduler(str(tmp_path / "maintenance.json"), low_priority=False, tasks={"commit-graph": 3600})
+    scheduler.set_projects([str(clone)])
+    assert scheduler.run_once() == {os.path.normpath(str(clone)): {"commit-graph": True}}
+    assert scheduler.timings(str(clone)) == []
@@ -0,0 +1,91 @@
+import os
+import subprocess
+
+from installerpro.utils import bulk_update, git_operations, mirror_cache
+
+from .conftest import git
+
+
+def _alternates(repo):
+    path = repo / ".git" / "objects" / "info" / "alternates"
+    return path.read_text().strip() if path.exists() else None
+
+
+def test_mirror_path_is_stable_per_url(tmp_path):
+    cache = mirror_cache.MirrorCache(str(tmp_path / "mirrors"))
+    assert cache.mirror_path("https://example.com/org/repo.git") == cache.mirror_path("https://example.com/org/repo/")
+    assert cache.mirror_path("https://example.com/org/repo") != cache.mirror_path("https://example.com/other/repo")
+    assert os.path.basename(cache.mirror_path("git@example.com:org/repo.git")).startswith("repo-")
+
+
+def test_clone_uses_mirror_as_reference(cloned_repo, tmp_path):
+    upstream, _ = cloned_repo
+    cache = mirror_cache.MirrorCache(str(tmp_path / "mirrors"))
+    url = upstream.as_uri()
+    mirror = cache.ensure_mirror(url)
+    assert cache.list_mirrors() == {mirror: url}
+
+    target = tmp_path / "workspace" / "repo"
+    bulk_update.clone_or_pull({"local_path": str(target), "repo_url": url, "branch": "main"}, mirror_cache=cache, dissociate=False)
+    assert _alternates(target) == os.path.join(mirror, "objects")
+    assert (target / "README.md").read_text() == "hello\n"
+
+    dissociated = tmp_path / "workspace" / "independent"
+    git_operations.clone_repository(url, str(dissociated), "main", reference=mirror, dissociate=True)
+    assert _alternates(dissociated) is None
+
+
+def test_clones_are_dissociated_from_the_mirror_by_default(cloned_repo, tmp_path):
+    upstream, _ = cloned_repo
+    cache = mirror_cache.MirrorCache(str(tmp_path / "mirrors"))
+    target = tmp_path / "workspace" / "repo"
+    bulk_update.clone_or_pull({"local_path": str(target), "repo_url": upstream.as_uri(), "branch": "main"}, mirror_cache=cache)
+    assert _alternates(target) is None
+    assert list(cache.list_mirrors().values()) == [upstream.as_uri()]
+    git(target, "fsck", "--no-progress")
+
+
+def test_refresh_picks_up_new_commits(cloned_repo, tmp_path):
+    upstream, _ = cloned_repo
+    cache = mirror_cache.MirrorCache(str(tmp_path / "mirrors"))
+    mirror = cache.ensure_mirror(upstream.as_uri())
+    git(upstream, "commit", "-q", "--allow-empty", "-m", "new")
+    assert cache.refresh_all() == {upstream.as_uri(): True}
+    assert git(mirror, "rev-parse", "main") == git(upstream, "rev-parse", "main")
+
+
+def test_mirror_keeps_only_branches_and_tags(cloned_repo, tmp_path):
+    upstream, _ = cloned_repo
+    git(upstream, "tag", "v1")
+    git(upstream, "update-ref", "refs/pull/1/head", "HEAD")
+    cache = mirror_cache.MirrorCache(str(tmp_path / "mirrors"))
+    mirror = cache.ensure_mirror(upstream.as_uri())
+
+    assert git(mirror, "for-each-ref", "--format=%(refname)").splitlines() == ["refs/heads/main", "refs/tags/v1"]
+    assert git(mirror, "config", "--get-all", "remote.origin.fetch").splitlines() == list(mirror_cache.MIRROR_REFSPECS)
+    assert git(mirror, "config", "gc.pruneExpire") == "never"
+
+
+def test_legacy_mirror_is_migrated_on_refresh(cloned_repo, tmp_path):
+    upstream, _ = cloned_repo
+    git(upstream, "update-ref", "refs/pull/1/head", "HEAD")
+    cache = mirror_cache.MirrorCache(str(tmp_path / "mirrors"))
+    mirror = cache.mirror_path(upstream.as_uri())
+    git(tmp_path, "clone", "-q", "--mirror", upstream.as_uri(), mirror)
+    git(mirror, "config", "gc.auto", "0")
+
+    assert cache.ensure_mirror(upstream.as_uri(), max_age=0) == mirror
+    assert git(mirror, "for-each-ref", "--format=%(refname)").splitlines() == ["refs/heads/main"]
+    assert git(mirror, "config", "--get-all", "remote.origin.fetch").splitlines() == list(mirror_cache.MIRROR_REFSPECS)
+    assert subprocess.run(["git", "config", "gc.auto"], cwd=mirror).returncode == 1
+
+
+def test_shallow_and_partial_clones_skip_the_mirror(cloned_repo, tmp_path):
+    upstream, _ = cloned_repo
+    cache = mirror_cache.MirrorCache(str(tmp_path / "mirrors"))
+    for name, options in (("shallow", {"depth": 1}), ("partial", {"filter": "blob:none"})):
+        target = tmp_path / "workspace" / name
+        job = {"local_path": str(target), "repo_url": upstream.as_uri(), "branch": "main", "clone_options": options}
+        assert bulk_update.clone_or_pull(job, mirror_cache=cache) == "clone"
+        assert _alternates(target) is None
+    assert cache.list_mirrors() == {}
@@ -0,0 +1,134 @@
+import threading
+import time
+
+from installerpro.utils import operation_queue
+from installerpro.utils.operation_queue import READ, WRITE
+
+
+def _tracking_op(log, lock, name, delay=0.05):
+    def op():
+        with lock:
+            log.append(("start", name))
+        time.sleep(delay)
+        with lock:
+            log.append(("end", name))
+        return name
+    return op
+
+
+def _overlaps(log, a, b):
+    """True si las ejecuciones de a y b se solaparon en el tiempo."""
+    start_a, end_a = log.index(("start", a)), log.index(("end", a))
+    start_b, end_b = log.index(("start", b)), log.index(("end", b))
+    return start_a < end_b and start_b < end_a
+
+
+def test_writes_on_same_repo_are_serialized_in_order():
+    scheduler = operation_queue.OperationScheduler()
+    log, lock = [], threading.Lock()
+    futures = [scheduler.submit(["/repo"], _tracking_op(log, lock, f"w{i}"), kind=WRITE) for i in range(3)]
+    assert [f.result(timeout=5) for f in futures] == ["w0", "w1", "w2"]
+    assert [name for event, name in log if event == "start"] == ["w0", "w1", "w2"]
+    assert not _overlaps(log, "w0", "w1") and not _overlaps(log, "w1", "w2")
+    scheduler.shutdown(wait=True)
+
+
+def test_different_repos_run_in_parallel():
+    scheduler = operation_queue.OperationScheduler()
+    log, lock = [], threading.Lock()
+    first = scheduler.submit(["/a"], _tracking_op(log, lock, "a", delay=0.2))
+    second = scheduler.submit(["/b"], _tracking_op(log, lock, "b", delay=0.2))
+    first.result(timeout=5), second.result(timeout=5)
+    assert _overlaps(log, "a", "b")
+    scheduler.shutdown(wait=True)
+
+
+def test_reads_share_but_never_overlap_a_write():
+    scheduler = operation_queue.OperationScheduler()
+    log, lock = [], threading.Lock()
+    futures = [
+        scheduler.submit(["/repo"], _tracking_op(log, lock, "r1", delay=0.2), kind=READ),
+        scheduler.submit(["/repo"], _tracking_op(log, lock, "r2", delay=0.2), kind=READ),
+        scheduler.submit(["/repo"], _tracking_op(log, lock, "w"), kind=WRITE),
+        # Esta lectura llega después de la escritura: no la adelanta.
+        scheduler.submit(["/repo", "/other"], _tracking_op(log, lock, "r3"), kind=READ),
+    ]
+    for future in futures:
+        future.result(timeout=5)
+    assert _overlaps(log, "r1", "r2")
+    assert not _overlaps(log, "r1", "w") and not _overlaps(log, "r2", "w") and not _overlaps(log, "w", "r3")
+    assert log.index(("start", "r3")) > log.index(("end", "w"))
+    scheduler.shutdown(wait=True)
+
+
+def test_pending_identical_reads_are_coalesced():
+    scheduler = operation_queue.OperationScheduler()
+    gate = threading.Event()
+    calls = []
+    blocker = scheduler.submit(["/repo"], gate.wait, 5)
+
+    def refresh():
+        calls.append(1)
+        return len(calls)
+
+    first = scheduler.submit(["/repo"], refresh, kind=READ, coalesce_key="refresh")
+    second = scheduler.submit(["/repo"], refresh, kind=READ, coalesce_key="refresh")
+    other = scheduler.submit(["/repo"], refresh, kind=READ, coalesce_key="other")
+    assert first is second and first is not other
+    gate.set()
+    blocker.result(timeout=5)
+    assert first.result(timeout=5) in (1, 2) and other.result(timeout=5) in (1, 2)
+    assert len(calls) == 2
+    scheduler.shutdown(wait=True)
+
+
+def test_failures_are_reported_and_release_the_repo():
+    scheduler = operation_queue.OperationScheduler()
+
+    def boom():
+        raise RuntimeError("index.lock exists")
+
+    failed = scheduler.submit(["/repo"], boom)
+    following = scheduler.submit(["/repo"], lambda: "ok")
+    assert isinstance(failed.exception(timeout=5), RuntimeError)
+    assert following.result(timeout=5) == "ok"
+    assert scheduler.busy_keys() == set()
+    scheduler.shutdown(wait=True)
+
+
+def test_slot_reserves_only_its_repo():
+    scheduler = operation_queue.OperationScheduler()
+    gate = threading.Event()
+    slow_write = scheduler.submit(["/a"], gate.wait, 5)
+    acquired = []
+
+    def refresh(paths):
+        for path in paths:
+            with scheduler.slot([path]):
+                acquired.append(path)
+
+    refresher = threading.Thread(target=refresh, args=(["/b", "/a"],))
+    refresher.start()
+    deadline = time.monotonic() + 5
+    while acquired != ["/b"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # El refresco espera su turno en /a, pero eso no retiene las escrituras en /b.
+    started = time.monotonic()
+    assert scheduler.submit(["/b"], lambda: "commit").result(timeout=5) == "commit"
+    assert time.monotonic() - started < 1
+    gate.set()
+    refresher.join(timeout=5)
+    assert acquired == ["/b", "/a"] and scheduler.busy_keys() == set()
+    scheduler.shutdown(wait=True)
+
+
+def test_coalesced_writes_do_not_overlap():
+    scheduler = operation_queue.OperationScheduler()
+    log, lock = [], threading.Lock()
+    first = scheduler.submit(["<registry>"], _tracking_op(log, lock, "refresh", delay=0.1), coalesce_key="refresh")
+    second = scheduler.submit(["<registry>"], _tracking_op(log, lock, "auto", delay=0.1), coalesce_key="auto_refresh")
+    third = scheduler.submit(["<registry>"], _tracking_op(log, lock, "auto2"), coalesce_key="auto_refresh")
+    assert second is third
+    first.result(timeout=5), second.result(timeout=5)
+    assert not _overlaps(log, "refresh", "auto")
+    scheduler.shutdown(wait=True)
@@ -0,0 +1,96 @@
+import os
+import subprocess
+
+import pytest
+
+from installerpro.utils import bulk_update, git_operations, perf_profiles
+
+from .conftest import git
+
+
+@pytest.fixture
+def upstream_with_dirs(tmp_path):
+    upstream = tmp_path / "upstream"
+    for directory in ("app", "docs", "tools"):
+        (upstream / directory).mkdir(parents=True)
+        (upstream / directory / "file.txt").write_text(f"{directory}\n")
+    (upstream / "README.md").write_text("root\n")
+    git(upstream, "init", "-q", "-b", "main")
+    git(upstream, "add", ".")
+    git(upstream, "commit", "-q", "-m", "initial")
+    return upstream
+
+
+def test_resolve_profile_validates_names_and_settings():
+    assert perf_profiles.resolve_profile("large")["index_version"] == 4
+    assert perf_profiles.resolve_profile(None) == {}
+    with pytest.raises(git_operations.GitOperationError):
+        perf_profiles.resolve_profile("turbo")
+    with pytest.raises(git_operations.GitOperationError):
+        perf_profiles.resolve_profile({"core.preloadIndex": True})
+
+
+def test_apply_and_verify_large_profile(cloned_repo):
+    _upstream, clone = cloned_repo
+    applied = perf_profiles.apply_profile(str(clone), "large")
+
+    assert applied["fsmonitor"] == perf_profiles.fsmonitor_supported()
+    assert perf_profiles.read_index_version(str(clone)) == 4
+    stored = {setting: value for setting, value in perf_profiles.resolve_profile("large").items() if applied[setting]}
+    assert all(perf_profiles.verify_profile(str(clone), stored).values())
+    assert git(clone, "config", "core.untrackedCache") == "true"
+
+    perf_profiles.clear_profile(str(clone))
+    assert perf_profiles.read_index_version(str(clone)) == 2
+    assert not any(perf_profiles.verify_profile(str(clone), {"split_index": True, "untracked_cache": True}).values())
+
+
+def test_sparse_profile_is_applied_at_clone_time(upstream_with_dirs, tmp_path):
+    target = tmp_path / "work" / "sparse"
+    job = {"local_path": str(target), "repo_url": str(upstream_with_dirs), "branch": "main",
+           "perf_profile": {"sparse_paths": ["app"], "untracked_cache": True}}
+    assert bulk_update.clone_or_pull(job) == "clone"
+
+    assert (target / "app" / "file.txt").exists() and (target / "README.md").exists()
+    assert not (target / "docs").exists() and not (target / "tools").exists()
+    assert perf_profiles.verify_profile(str(target), job["perf_profile"]) == {"sparse_paths": True, "untracked_cache": True}
+
+
+def test_benchmark_reports_each_stage_and_restores(cloned_repo):
+    _upstream, clone = cloned_repo
+    results = perf_profiles.benchmark_profile(str(clone), {"untracked_cache": True, "index_version": 4}, runs=1)
+
+    assert [stage for stage, _seconds in results] == ["baseline", "index_version", "untracked_cache"]
+    assert all(seconds > 0 for _stage, seconds in results)
+    assert perf_profiles.read_index_version(str(clone)) == 2
+    assert os.path.isfile(clone / "README.md")
+
+
+def test_benchmark_restores_sparse_checkout_config_and_index(upstream_with_dirs, tmp_path):
+    clone = tmp_path / "sparse"
+    git(tmp_path, "clone", "-q", "--sparse", str(upstream_with_dirs), str(clone))
+    git(clone, "sparse-checkout", "set", "--cone", "app")
+    git(clone, "config", "core.untrackedCache", "true")
+    (clone / "app" / "new.txt").write_text("staged\n")
+    git(clone, "add", "app/new.txt")
+    patterns = git(clone, "sparse-checkout", "list")
+    index_version = perf_profiles.read_index_version(str(clone))
+
+    perf_profiles.benchmark_profile(str(clone), "large", runs=1)
+
+    assert not (clone / "docs").exists() and not (clone / "tools").exists()
+    assert git(clone, "sparse-checkout", "list") == patterns
+    assert git(clone, "config", "core.sparseCheckout") == "true"
+    assert git(clone, "config", "core.untrackedCache") == "true"
+    for key in ("core.splitIndex", "core.fsmonitor", "index.version"):
+        assert subprocess.run(["git", "config", "--local", "--get", key], cwd=clone).returncode == 1
+    assert git(clone, "diff", "--cached", "--name-only") == "app/new.txt"
+    assert perf_profiles.read_index_version(str(clone)) == index_version
+
+
+def test_time_status_does_not_log_the_status_output(cloned_repo, caplog):
+    _, clone = cloned_repo
+    (clone / "untracked-secret-name.txt").write_text("x")
+    with caplog.at_level("DEBUG"):
+        assert perf_profiles.time_status(str(clone), runs=2) > 0
+    assert "untracked-secret-name" not in caplog.text
@@ -0,0 +1,94 @@
+import json
+import threading
+
+import pytest
+
+from installerpro.utils import persistence
+
+
+def test_atomic_write_replaces_file_and_leaves_no_temp(tmp_path):
+    path = tmp_path / "state" / "projects.json"
+    persistence.atomic_write_json(str(path), [{"name": "a"}])
+    persistence.atomic_write_json(str(path), [{"name": "b"}])
+    assert json.loads(path.read_text()) == [{"name": "b"}]
+    assert [p.name for p in path.parent.iterdir()] == ["projects.json"]
+
+
+def test_failed_write_keeps_previous_content(tmp_path):
+    path = tmp_path / "config.json"
+    persistence.atomic_write_json(str(path), {"language": "es"})
+    with pytest.raises(TypeError):
+        persistence.atomic_write_json(str(path), {"language": object()})
+    assert json.loads(path.read_text()) == {"language": "es"}
+    assert [p.name for p in tmp_path.iterdir()] == ["config.json"]
+
+
+def test_changes_in_one_window_are_written_once(tmp_path):
+    state = {"count": 0}
+    writes = []
+    written = threading.Event()
+
+    def write():
+        writes.append(dict(state))
+        written.set()
+
+    writer = persistence.WriteBehind(write, delay=0.05)
+    for _ in range(20):
+        state["count"] += 1
+        writer.schedule()
+    assert writer.pending
+    assert written.wait(2)
+    assert writes == [{"count": 20}]
+    assert not writer.pending
+
+
+def test_flush_writes_immediately_and_only_when_pending():
+    writes = []
+    writer = persistence.WriteBehind(lambda: writes.append(1), delay=60)
+    assert writer.flush() is False
+    writer.schedule()
+    assert writer.flush() is True
+    assert writer.flush() is False
+    assert writes == [1]
+
+
+def test_failed_write_stays_pending():
+    attempts = []
+
+    def write():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("disk full")
+
+    writer = persistence.WriteBehind(write, delay=60)
+    writer.schedule()
+    assert writer.flush() is False
+    assert writer.pending
+    assert writer.flush() is True
+    assert len(attempts) == 2
+
+
+def test_repeated_failures_back_off_and_log_the_traceback_once(caplog):
+    def write():
+        raise OSError("read-only file system")
+
+    writer = persistence.WriteBehind(write, delay=60)
+    with caplog.at_level("WARNING"):
+        for _ in range(4):
+            writer.schedule()
+            assert writer.flush() is False
+    assert [r.exc_info is not None for r in caplog.records] == [True, False, False, False]
+    with writer._lock:
+        retry_delay = writer._timer.interval
+    assert retry_delay == persistence.MAX_RETRY_DELAY  # 60 * 2**4, con tope
+    writer._timer.cancel()
+    persistence._live_writers.discard(writer)  # que no se reintente al salir de pytest
+
+
+def test_closed_writers_are_not_flushed_at_exit():
+    writes = []
+    writer = persistence.WriteBehind(lambda: writes.append(1), delay=60)
+    assert writer in persistence._live_writers
+    writer.schedule()
+    writer.close()
+    assert writes == [1] and writer not in persistence._live_writers
@@ -0,0 +1,100 @@
+import os
+import time
+
+from installerpro.utils import fetch_scheduler, git_operations, prefetch
+
+from .conftest import git
+
+
+def _scheduler():
+    return fetch_scheduler.FetchScheduler(fetch_func=lambda path, cancel_token=None: True)
+
+
+def test_prefetch_fills_prefetch_namespace_only(cloned_repo):
+    upstream, clone = cloned_repo
+    tracking_before = git(clone, "rev-parse", "refs/remotes/origin/main")
+    (upstream / "NEW").write_text("new\n")
+    git(upstream, "add", "NEW")
+    git(upstream, "commit", "-q", "-m", "new upstream commit")
+
+    assert prefetch.prefetch_repository(str(clone)) == ["origin"]
+
+    assert git(clone, "rev-parse", "refs/prefetch/remotes/origin/main") == git(upstream, "rev-parse", "HEAD")
+    # El estado visible no cambia: refs/remotes sigue igual y no se escribe FETCH_HEAD.
+    assert git(clone, "rev-parse", "refs/remotes/origin/main") == tracking_before
+    assert not os.path.exists(clone / ".git" / "FETCH_HEAD")
+    # Los objetos ya están en local.
+    git(clone, "cat-file", "-e", git(upstream, "rev-parse", "HEAD"))
+
+
+def test_state_persists_across_restarts(cloned_repo, tmp_path):
+    _upstream, clone = cloned_repo
+    state_path = str(tmp_path / "state" / "prefetch.json")
+    calls = []
+    daemon = prefetch.PrefetchDaemon(state_path, prefetch_func=lambda path, cancel_token=None: calls.append(path), scheduler=_scheduler())
+    daemon.set_projects([str(clone)])
+
+    assert daemon.run_once() == {os.path.normpath(str(clone)): True}
+    restarted = prefetch.PrefetchDaemon(state_path, prefetch_func=lambda path, cancel_token=None: calls.append(path), scheduler=_scheduler())
+    restarted.set_projects([str(clone)])
+
+    assert restarted.project_state(str(clone))["last_success"]
+    assert restarted.run_once() == {}
+    assert restarted.due_projects(now=time.time() + prefetch.DEFAULT_PREFETCH_INTERVAL + 1) == [os.path.normpath(str(clone))]
+    assert len(calls) == 1
+
+
+def test_failures_back_off(cloned_repo, tmp_path):
+    _upstream, clone = cloned_repo
+
+    def failing(path, cancel_token=None):
+        raise git_operations.GitOperationError("network down")
+
+    daemon = prefetch.PrefetchDaemon(str(tmp_path / "prefetch.json"), interval_seconds=100, prefetch_func=failing, scheduler=_scheduler())
+    daemon.set_projects([str(clone)])
+    daemon.run_once()
+    daemon.run_once(now=time.time() + 201)  # tras un fallo el intervalo ya es el doble
+
+    state = daemon.project_state(str(clone))
+    assert state["failures"] == 2 and "last_success" not in state
+    assert daemon.next_due(str(clone)) == state["last_attempt"] + 400
+
+
+def test_rate_limit_leaves_the_rest_for_the_next_pass(tmp_path):
+    repos = []
+    for i in range(3):
+        repo = tmp_path / f"repo{i}"
+        git(tmp_path, "init", "-q", str(repo))
+        repos.append(str(repo))
+    daemon = prefetch.PrefetchDaemon(str(tmp_path / "prefetch.json"), max_per_minute=2,
+                                     prefetch_func=lambda path, cancel_token=None: [], scheduler=_scheduler())
+    daemon.set_projects(repos)
+
+    assert len(daemon.run_once()) == 2
+    assert len(daemon.due_projects()) == 1
+    assert daemon.run_once() == {}
+
+
+def test_recent_interactive_fetch_postpones_prefetch(cloned_repo, tmp_path):
+    _upstream, clone = cloned_repo
+    scheduler = _scheduler()
+    assert scheduler.fetch(str(clone))  # fetch interactivo correcto, registrado por el planificador
+    daemon = prefetch.PrefetchDaemon(str(tmp_path / "prefetch.json"), scheduler=scheduler)
+    daemon.set_projects([str(clone)])
+    assert daemon.due_projects() == []
+
+
+def test_missing_projects_do_not_use_the_quota_and_jobs_run_exclusively(tmp_path):
+    repo = tmp_path / "repo"
+    git(tmp_path, "init", "-q", str(repo))
+    daemon = prefetch.PrefetchDaemon(str(tmp_path / "prefetch.json"), max_per_minute=1,
+                                     prefetch_func=lambda path, cancel_token=None: [], scheduler=_scheduler())
+    daemon.set_projects([str(tmp_path / "gone1"), str(tmp_path / "gone2"), str(repo)])
+    exclusive = []
+
+    def run_exclusive(path, job):
+        exclusive.append(path)
+        return job()
+
+    assert daemon.run_once(run_exclusive=run_exclusive) == {str(repo): True}
+    assert exclusive == [str(repo)]
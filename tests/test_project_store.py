@@ -0,0 +1,117 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from installerpro.utils import project_store
+
+
+def _project(name, status="clean", tags=None, **extra):
+    project = {"name": name, "local_path": os.path.join(os.sep, "work", name), "repo_url": f"https://example.com/{name}.git",
+               "branch": "main", "status": status, "deleted": False}
+    if tags is not None:
+        project["tags"] = tags
+    project.update(extra)
+    return project
+
+
+def test_sqlite_round_trip_and_wal(tmp_path):
+    store = project_store.SqliteProjectStore(str(tmp_path / "projects.sqlite3"))
+    projects = [_project("b"), _project("a", clone_options={"depth": 1})]
+    assert store.save(projects) == 2
+
+    reopened = project_store.SqliteProjectStore(str(tmp_path / "projects.sqlite3"))
+    assert reopened.load() == projects
+    assert reopened._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert reopened.get(projects[1]["local_path"] + os.sep) == projects[1]
+
+
+def test_only_changed_rows_are_written(tmp_path):
+    store = project_store.SqliteProjectStore(str(tmp_path / "projects.sqlite3"))
+    projects = [_project(name) for name in "abcde"]
+    store.save(projects)
+
+    assert store.save(projects) == 0
+    projects[2]["status"] = "modified"
+    assert store.save(projects) == 1
+    del projects[0]
+    assert store.save(projects) == 5  # la fila borrada y las posiciones desplazadas
+    assert [p["name"] for p in store.load()] == list("bcde")
+
+    projects[0]["branch"] = "dev"
+    store.save_project(projects[0])
+    assert store.get(projects[0]["local_path"])["branch"] == "dev"
+
+
+def test_find_uses_indexed_columns(tmp_path):
+    store = project_store.SqliteProjectStore(str(tmp_path / "projects.sqlite3"))
+    store.save([_project("api", "modified", tags=["backend", "prod"]), _project("web", "clean", tags=["frontend"]),
+                _project("old", "Modified", tags=["backend"], deleted=True)])
+
+    assert [p["name"] for p in store.find(status="MODIFIED")] == ["api"]
+    assert [p["name"] for p in store.find(tag="backend", include_deleted=True)] == ["api", "old"]
+    assert [p["name"] for p in store.find(name="web", tag="frontend")] == ["web"]
+    plan = " ".join(row[-1] for row in store._conn.execute("EXPLAIN QUERY PLAN SELECT path FROM projects WHERE status = 'clean'"))
+    assert "idx_projects_status" in plan
+
+
+def test_migration_from_json_runs_once(tmp_path):
+    json_path = tmp_path / "projects.json"
+    projects = [_project("a"), _project("b", tags=["x"])]
+    json_path.write_text(json.dumps(projects, indent=4))
+
+    store = project_store.open_store(project_store.SQLITE_BACKEND, str(tmp_path), str(json_path))
+    assert store.load() == projects
+    assert not json_path.exists() and (tmp_path / "projects.json.migrated").exists()
+
+    json_path.write_text(json.dumps([_project("stale")]))
+    again = project_store.open_store(project_store.SQLITE_BACKEND, str(tmp_path), str(json_path))
+    assert again.load() == projects
+
+
+def test_switching_back_to_json_exports_the_database(tmp_path):
+    json_path = tmp_path / "projects.json"
+    projects = [_project("a"), _project("b", tags=["x"])]
+    json_path.write_text(json.dumps(projects, indent=4))
+    store = project_store.open_store(project_store.SQLITE_BACKEND, str(tmp_path), str(json_path))
+    projects.append(_project("c"))
+    store.save(projects)
+    store.close()
+
+    back = project_store.open_store(project_store.JSON_BACKEND, str(tmp_path), str(json_path))
+    assert back.load() == projects
+    assert not (tmp_path / project_store.SQLITE_FILENAME).exists()
+
+    projects.append(_project("d"))
+    back.save(projects)
+    again = project_store.open_store(project_store.SQLITE_BACKEND, str(tmp_path), str(json_path))
+    assert again.load() == projects
+
+
+def test_failed_transaction_leaves_previous_rows(tmp_path, monkeypatch):
+    store = project_store.SqliteProjectStore(str(tmp_path / "projects.sqlite3"))
+    projects = [_project("a"), _project("b")]
+    store.save(projects)
+    projects[0]["status"] = "modified"
+    projects[1]["status"] = "modified"
+    write_row = store._write_row
+    calls = []
+
+    def failing_write_row(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise sqlite3.OperationalError("disk I/O error")
+        return write_row(*args)
+
+    monkeypatch.setattr(store, "_write_row", failing_write_row)
+    with pytest.raises(sqlite3.OperationalError):
+        store.save(projects)
+    assert [p["status"] for p in project_store.SqliteProjectStore(str(tmp_path / "projects.sqlite3")).load()] == ["clean", "clean"]
+
+
+def test_unknown_backend_falls_back_to_json(tmp_path):
+    store = project_store.open_store("yaml", str(tmp_path), str(tmp_path / "projects.json"))
+    assert isinstance(store, project_store.JsonProjectStore)
+    store.save([_project("a")])
+    assert store.load() == [_project("a")]
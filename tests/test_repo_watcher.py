@@ -0,0 +1,70 @@
+import pytest
+
+from installerpro.utils import repo_watcher
+
+from .conftest import git
+
+
+@pytest.fixture(params=["polling", "inotify"])
+def watcher(request):
+    w = repo_watcher.RepoWatcher(use_inotify=request.param == "inotify")
+    if request.param == "inotify" and w.backend != "inotify":
+        pytest.skip("inotify not available on this platform")
+    yield w
+    w.close()
+
+
+def test_only_changed_repos_are_reported(watcher, cloned_repo, tmp_path):
+    upstream, clone = cloned_repo
+    watcher.register(str(clone))
+    watcher.register(str(upstream))
+    assert watcher.collect_changed() == {str(clone), str(upstream)}
+    assert watcher.collect_changed() == set()
+
+    (clone / "new.txt").write_text("x\n")
+    assert watcher.collect_changed() == {str(clone)}
+
+    git(upstream, "commit", "-q", "--allow-empty", "-m", "more")
+    assert str(upstream) in watcher.collect_changed()
+
+
+def test_branch_switch_is_detected(watcher, cloned_repo):
+    _, clone = cloned_repo
+    watcher.register(str(clone))
+    watcher.collect_changed()
+    git(clone, "checkout", "-q", "-b", "topic")
+    assert watcher.collect_changed() == {str(clone)}
+
+
+def test_unregistered_repos_are_ignored(watcher, cloned_repo):
+    _, clone = cloned_repo
+    watcher.register(str(clone))
+    watcher.unregister(str(clone))
+    (clone / "new.txt").write_text("x\n")
+    assert watcher.collect_changed() == set()
+
+
+def test_in_place_edit_of_tracked_file_is_detected(watcher, cloned_repo):
+    _, clone = cloned_repo
+    (clone / "src").mkdir()
+    (clone / "src" / "app.py").write_text("print(1)\n")
+    git(clone, "add", "src")
+    watcher.register(str(clone))
+    watcher.collect_changed()
+
+    (clone / "src" / "app.py").write_text("print(22)\n")
+    assert watcher.collect_changed() == {str(clone)}
+
+
+def test_ignored_directories_are_not_watched(watcher, cloned_repo):
+    _, clone = cloned_repo
+    (clone / ".gitignore").write_text("node_modules/\n")
+    git(clone, "add", ".gitignore")
+    (clone / "node_modules" / "pkg").mkdir(parents=True)
+    watcher.register(str(clone))
+    watcher.collect_changed()
+
+    (clone / "node_modules" / "pkg" / "index.js").write_text("x\n")
+    assert watcher.collect_changed() == set()
+    watched = {directory for watches in watcher._watches.values() for directory in watches.values()}
+    assert str(clone / "node_modules") not in watched
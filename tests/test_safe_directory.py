@@ -0,0 +1,95 @@
+import os
+import threading
+
+import pytest
+
+from installerpro.utils import git_operations
+
+from .conftest import git
+
+
+def _global_values(tmp_path):
+    return git(tmp_path, "config", "--global", "--get-all", "safe.directory").splitlines()
+
+
+def test_missing_entries_are_added_once_in_one_block(tmp_path):
+    repos = [tmp_path / name for name in ("one", "two words", 'quo"te')]
+    for repo in repos:
+        repo.mkdir()
+    (tmp_path / "gitconfig").write_text("# keep me\n[user]\n\tname = Someone")
+
+    added = git_operations.ensure_safe_directories([str(r) for r in repos], check_ownership=False)
+    assert added == [os.path.normpath(str(r)) for r in repos]
+    assert _global_values(tmp_path) == added
+    assert "# keep me" in (tmp_path / "gitconfig").read_text()
+
+    assert git_operations.ensure_safe_directories([str(r) for r in repos], check_ownership=False) == []
+    assert _global_values(tmp_path) == added
+
+
+def test_duplicates_are_removed(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    for value in ("/srv/a", "/srv/a/", "/srv/b", "/srv/a"):
+        git(tmp_path, "config", "--global", "--add", "safe.directory", value)
+
+    assert git_operations.ensure_safe_directories([str(repo)], check_ownership=False) == [os.path.normpath(str(repo))]
+    assert _global_values(tmp_path) == ["/srv/a", "/srv/b", os.path.normpath(str(repo))]
+
+
+def test_concurrent_calls_do_not_lose_or_duplicate_entries(tmp_path):
+    repos = [tmp_path / f"repo{i}" for i in range(8)]
+    for repo in repos:
+        repo.mkdir()
+    git(tmp_path, "config", "--global", "--add", "safe.directory", "/srv/a")
+    git(tmp_path, "config", "--global", "--add", "safe.directory", "/srv/a")
+    threads = [threading.Thread(target=git_operations.ensure_safe_directories, args=([str(repo)],), kwargs={"check_ownership": False})
+               for repo in repos]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    values = _global_values(tmp_path)
+    assert sorted(values) == sorted(["/srv/a"] + [os.path.normpath(str(repo)) for repo in repos])
+    assert not (tmp_path / "gitconfig.lock").exists()
+
+
+def test_locked_config_is_left_untouched(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (tmp_path / "gitconfig").write_text("[user]\n\tname = Someone\n")
+    (tmp_path / "gitconfig.lock").write_text("")
+    with pytest.raises(git_operations.GitOperationError):
+        git_operations.ensure_safe_directories([str(repo)], check_ownership=False)
+    assert (tmp_path / "gitconfig").read_text() == "[user]\n\tname = Someone\n"
+    assert (tmp_path / "gitconfig.lock").exists()
+
+
+def test_wildcard_means_nothing_to_do(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(tmp_path, "config", "--global", "--add", "safe.directory", "*")
+    assert git_operations.ensure_safe_directories([str(repo)], check_ownership=False) == []
+    assert _global_values(tmp_path) == ["*"]
+
+
+def test_only_repositories_owned_by_someone_else_are_added(cloned_repo):
+    _upstream, clone = cloned_repo
+    assert not git_operations.needs_safe_directory(str(clone))
+    assert git_operations.ensure_safe_directories([str(clone)]) == []
+
+
+@pytest.mark.skipif(not hasattr(os, "geteuid") or os.geteuid() != 0, reason="changing ownership requires root")
+def test_foreign_repository_works_without_retry(cloned_repo, monkeypatch):
+    _upstream, clone = cloned_repo
+    monkeypatch.delenv("SUDO_UID", raising=False)
+    for root, dirs, files in os.walk(clone):
+        for name in dirs + files:
+            os.lchown(os.path.join(root, name), 12345, 12345)
+    os.lchown(clone, 12345, 12345)
+    assert git_operations.needs_safe_directory(str(clone))
+
+    assert git_operations.ensure_safe_directories([str(clone)]) == [os.path.normpath(str(clone))]
+    return_code, _stdout, stderr = git_operations._run_cmd_with_output(["git", "status", "--porcelain"], cwd=str(clone))
+    assert return_code == 0, stderr
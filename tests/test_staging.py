@@ -0,0 +1,66 @@
+import pytest
+
+from installerpro.utils import git_operations
+
+from .conftest import git
+
+
+def _staged(repo):
+    return set(filter(None, git(repo, "diff", "--cached", "--name-only", "-z").split("\0")))
+
+
+@pytest.mark.parametrize("backend", ["cli", "gitpython"])
+def test_stage_in_chunks_with_progress(cloned_repo, backend):
+    _, clone = cloned_repo
+    names = [f"file {i} [x]*.txt" for i in range(25)] + ["-rf", "ünïcode.txt"]
+    for name in names:
+        (clone / name).write_text(name)
+    (clone / "README.md").unlink()
+    events = []
+
+    git_operations.stage_files(str(clone), names + ["README.md"], on_progress=events.append, chunk_size=10, backend=backend)
+    assert _staged(clone) == set(names) | {"README.md"}
+    assert [e.current for e in events] == [10, 20, 28]
+    assert events[-1].done and events[-1].percent == 100 and events[-1].operation == "stage"
+
+
+def test_stage_collapsed_directory_and_unstage(cloned_repo):
+    _, clone = cloned_repo
+    (clone / "pkg").mkdir()
+    for i in range(5):
+        (clone / "pkg" / f"m{i}.py").write_text("x")
+    git_operations.stage_files(str(clone), ["pkg/"])
+    assert len(_staged(clone)) == 5
+
+    git_operations.unstage_files(str(clone), ["pkg/m0.py", "pkg/m1.py"], chunk_size=1)
+    assert _staged(clone) == {"pkg/m2.py", "pkg/m3.py", "pkg/m4.py"}
+    assert (clone / "pkg" / "m0.py").exists()
+
+
+def test_only_selected_paths_stay_staged(cloned_repo):
+    _, clone = cloned_repo
+    (clone / "pkg").mkdir()
+    for name in ("pkg/a.py", "pkg/b.py", "unseen.txt", "other.txt"):
+        (clone / name).write_text("x")
+    git(clone, "mv", "README.md", "README.rst")
+    git(clone, "add", "--all")
+
+    unstaged = git_operations.unstage_unselected(str(clone), ["pkg/", "README.rst"])
+    assert sorted(unstaged) == ["other.txt", "unseen.txt"]
+    assert _staged(clone) == {"pkg/a.py", "pkg/b.py", "README.rst"}
+    assert git(clone, "ls-files", "README.md") == ""  # el renombrado sigue entero en el índice
+
+
+def test_unstage_on_unborn_branch(tmp_path):
+    repo = tmp_path / "repo"
+    git(tmp_path, "init", "-q", str(repo))
+    (repo / "pkg").mkdir()
+    (repo / "a.txt").write_text("a")
+    (repo / "pkg" / "b.txt").write_text("b")
+    git(repo, "add", "--all")
+
+    git_operations.unstage_files(str(repo), ["pkg/"])
+    assert _staged(repo) == {"a.txt"}
+    assert git_operations.unstage_unselected(str(repo), []) == ["a.txt"]
+    assert _staged(repo) == set()
+    assert (repo / "a.txt").exists() and (repo / "pkg" / "b.txt").exists()
@@ -0,0 +1,44 @@
+import threading
+import time
+
+from installerpro.utils import status_engine
+
+
+def test_results_stream_in_completion_order():
+    """El repositorio rápido se entrega antes que el lento."""
+    delays = {"slow": 0.3, "fast": 0.0}
+
+    def collector(path):
+        time.sleep(delays[path])
+        return {"status": "clean", "branch": path, "repo_url": "N/A"}
+
+    order = [path for path, _ in status_engine.iter_project_statuses(["slow", "fast"], max_workers=2, collector=collector)]
+    assert order == ["fast", "slow"]
+
+
+def test_concurrency_is_bounded():
+    """Nunca hay más collectors simultáneos que max_workers."""
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    def collector(path):
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.02)
+        with lock:
+            running["now"] -= 1
+        return {"status": "clean"}
+
+    results = status_engine.refresh_statuses([f"repo{i}" for i in range(12)], max_workers=3, collector=collector)
+    assert len(results) == 12
+    assert running["peak"] <= 3
+
+
+def test_collector_errors_become_unknown():
+    def collector(path):
+        raise RuntimeError("boom")
+
+    results = status_engine.refresh_statuses(["broken"], collector=collector)
+    assert results["broken"]["status"] == "unknown"
+    assert "boom" in results["broken"]["error"]
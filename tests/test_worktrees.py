@@ -0,0 +1,55 @@
+import os
+import shutil
+
+import pytest
+
+from installerpro.utils import git_metadata, git_operations
+
+from .conftest import git
+
+
+def test_add_and_list_worktrees(cloned_repo, tmp_path):
+    upstream, clone = cloned_repo
+    git(upstream, "branch", "release")
+    git(clone, "fetch", "-q")
+    feature = tmp_path / "clone.worktrees" / "feature"
+    release = tmp_path / "clone.worktrees" / "release"
+
+    git_operations.add_worktree(str(clone), str(feature), "feature", new_branch=True)
+    git_operations.add_worktree(str(clone), str(release), "release")
+
+    worktrees = {w["branch"]: w for w in git_metadata.list_worktrees(str(clone))}
+    assert set(worktrees) == {"feature", "release"}
+    assert worktrees["feature"]["path"] == os.path.normpath(str(feature))
+    assert worktrees["release"]["head_sha"] == git(upstream, "rev-parse", "release")
+    assert not worktrees["feature"]["prunable"] and not worktrees["feature"]["locked"]
+    # Desde un worktree se ven los mismos worktrees enlazados (comparten el directorio común).
+    assert git_metadata.list_worktrees(str(feature)) == git_metadata.list_worktrees(str(clone))
+
+
+def test_add_worktree_refuses_non_empty_target(cloned_repo, tmp_path):
+    _upstream, clone = cloned_repo
+    target = tmp_path / "busy"
+    target.mkdir()
+    (target / "file.txt").write_text("x\n")
+    with pytest.raises(git_operations.GitOperationError):
+        git_operations.add_worktree(str(clone), str(target), "feature", new_branch=True)
+
+
+def test_remove_worktree_and_prune(cloned_repo, tmp_path):
+    _upstream, clone = cloned_repo
+    kept = tmp_path / "wt" / "kept"
+    lost = tmp_path / "wt" / "lost"
+    git_operations.add_worktree(str(clone), str(kept), "kept", new_branch=True)
+    git_operations.add_worktree(str(clone), str(lost), "lost", new_branch=True)
+    (kept / "dirty.txt").write_text("dirty\n")
+
+    shutil.rmtree(lost)
+    assert [w["prunable"] for w in git_metadata.list_worktrees(str(clone))] == [False, True]
+
+    with pytest.raises(git_operations.GitOperationError):
+        git_operations.remove_worktree(str(clone), str(kept))
+    git_operations.remove_worktree(str(clone), str(kept), force=True)
+    assert not kept.exists()
+    assert git_metadata.list_worktrees(str(clone)) == []
+    assert "kept" in git(clone, "branch", "--list", "kept")